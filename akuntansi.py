@@ -0,0 +1,1053 @@
+"""Inti akuntansi BUMDes tanpa Streamlit.
+
+Fungsi murni di atas DataFrame: jurnal -> buku besar -> Neraca Saldo ->
+Laba/Rugi, Neraca, Arus Kas, plus saldo awal dari snapshot akhir bulan.
+Tidak ada ``st.session_state`` di sini; ``bumdes.py`` hanya memanggil
+modul ini dan menyimpan hasilnya di sesi, sehingga laporan bisa dibuat
+dan diukur dari skrip Python biasa (lihat ``laporan_periode``).
+"""
+import hashlib
+import json
+import numpy as np
+import pandas as pd
+from skema_buku import ikuti_tipe, parse_tanggal, rupiah, tampilan_tabel, teks_tanggal
+from bagan_akun import INDEKS_DEFAULT, akun_nominal, kategori_arus_kas, klasifikasi_akun
+
+# === Fungsi format rupiah aman ===
+def _teks_rupiah(x):
+    # x bilangan bulat rupiah; negatif ditulis dalam kurung
+    if x < 0:
+        return f"({-x:,})".replace(",", ".")
+    return f"{x:,}".replace(",", ".")
+
+
+def format_rupiah(x):
+    try:
+        # Bilangan bulat diformat apa adanya (tanpa lewat float) supaya nominal besar tetap persis
+        return _teks_rupiah(int(x) if isinstance(x, (int, np.integer)) else round(float(x)))
+    except (ValueError, TypeError, OverflowError):
+        return ""
+
+
+def format_rupiah_kolom(seri):
+    """format_rupiah untuk satu kolom sekaligus (Series teks, index sama).
+
+    Tiap nilai unik diformat sekali lalu disebar lewat kode factorize.
+    Isian bukan angka (judul baris, sel kosong di tabel laporan) dibiarkan
+    apa adanya; NaN/None jadi "".
+    """
+    seri = seri if isinstance(seri, pd.Series) else pd.Series(seri, dtype=object)
+    if pd.api.types.is_integer_dtype(seri.dtype):
+        nilai, ada = seri.to_numpy(dtype=np.int64), np.ones(len(seri), dtype=bool)
+    else:
+        ada = pd.to_numeric(seri, errors="coerce").notna().to_numpy()
+        # Diubah ulang tanpa isian teks supaya kolom campuran berisi int tetap int64 (tanpa lewat float)
+        nilai = rupiah(pd.to_numeric(seri[ada])).to_numpy()
+    hasil = seri.astype(object).where(seri.notna(), "").to_numpy(copy=True)
+    if ada.any():
+        kode, unik = pd.factorize(nilai)
+        hasil[ada] = np.array([_teks_rupiah(u) for u in unik.tolist()], dtype=object)[kode]
+    return pd.Series(hasil, index=seri.index, dtype=object)
+
+
+def baris_tebal(*kolom, pola):
+    # Baris yang teks salah satu kolom labelnya cocok pola; satu str.contains untuk semua baris
+    teks = kolom[0].astype(str)
+    for seri in kolom[1:]:
+        teks = teks + "\n" + seri.astype(str).to_numpy()
+    return teks.str.contains(pola, regex=True).to_numpy()
+
+
+# === Sidik jari isi (kunci cache ekspor) ===
+def hash_konten(*objek):
+    """Sidik jari isi argumen builder PDF (DataFrame, dict buku besar, angka/teks)."""
+    h = hashlib.sha1()
+    for obj in objek:
+        if isinstance(obj, pd.DataFrame):
+            h.update(json.dumps([str(c) for c in obj.columns]).encode())
+            try:
+                h.update(pd.util.hash_pandas_object(obj, index=True).values.tobytes())
+            except TypeError:
+                h.update(obj.to_json(orient="split", default_handler=str).encode())
+        elif isinstance(obj, dict) and any(isinstance(v, pd.DataFrame) for v in obj.values()):
+            # Dict berisi tabel (mis. argumen paket buku): hash per tabel, bukan repr teks yang terpotong
+            h.update(json.dumps([str(k) for k in obj]).encode())
+            h.update(hash_konten(*obj.values()).encode())
+        else:
+            h.update(json.dumps(obj, sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+
+# === Fungsi untuk membuat buku besar ===
+def kolom_teks(df, col):
+    # Sama seperti str(row.get(col, "")).strip() tapi sekaligus satu kolom
+    if col not in df:
+        return pd.Series("", index=df.index, dtype=object)
+    if isinstance(df[col].dtype, pd.CategoricalDtype):
+        # Cukup olah daftar kategorinya, lalu sebar lewat kode per baris (kode -1 = NaN -> "nan")
+        kategori = np.append(df[col].cat.categories.map(str).str.strip().to_numpy(dtype=object), "nan")
+        return pd.Series(kategori[df[col].cat.codes.to_numpy()], index=df.index, dtype=object)
+    return df[col].map(str).str.strip()
+
+
+def _kunci_akun(df):
+    # Key buku besar per baris: Ref, fallback ke nama akun, lalu placeholder per baris
+    ref = kolom_teks(df, "Ref")
+    akun = kolom_teks(df, "Akun")
+    placeholder = pd.Series([f"Akun Tanpa Ref {i}" for i in df.index], index=df.index, dtype=object)
+    return ref.where(ref != "", akun.where(akun != "", placeholder)), akun
+
+
+def _normalisasi_jurnal(df):
+    # Semua kolom yang menentukan isi buku besar, sudah dalam bentuk akhirnya
+    kunci, akun = _kunci_akun(df)
+    if "Tanggal" in df:
+        tanggal = teks_tanggal(df["Tanggal"])
+    else:
+        tanggal = pd.Series("", index=df.index, dtype=object)
+    return pd.DataFrame({
+        "kunci": kunci.astype(object),
+        "akun": akun.astype(object),
+        "tanggal": tanggal.astype(object),
+        "keterangan": kolom_teks(df, "Keterangan").astype(object),
+        "debit": rupiah(df["Debit (Rp)"]),
+        "kredit": rupiah(df["Kredit (Rp)"]),
+    }, index=df.index)
+
+
+def jumlah_per_kode(kode, nilai, n):
+    """Jumlah int64 ``nilai`` per kode 0..n-1 (pengganti bincount yang selalu float)."""
+    total = np.zeros(n, dtype=np.int64)
+    np.add.at(total, kode, nilai)
+    return total
+
+
+def _posisi_transaksi(kode, debit, kredit):
+    # Posisi baris jurnal tiap transaksi, urut per akun lalu per baris (debit sebelum kredit)
+    idx_d = np.flatnonzero(debit > 0)
+    idx_k = np.flatnonzero(kredit > 0)
+    baris = np.concatenate([idx_d, idx_k])
+    urutan = np.lexsort((np.r_[np.zeros(len(idx_d)), np.ones(len(idx_k))], baris, kode[baris]))
+    return baris[urutan], urutan < len(idx_d)
+
+
+def _susun_buku_besar(norm):
+    # Hasil: buku besar, kode akun per baris, dan posisi baris tiap transaksi
+    debit = norm["debit"].to_numpy()
+    kredit = norm["kredit"].to_numpy()
+
+    # Urutan akun mengikuti kemunculan pertama di Jurnal Umum
+    kode, daftar_kunci = pd.factorize(norm["kunci"], sort=False)
+    _, posisi_pertama = np.unique(kode, return_index=True)
+    nama_pertama = norm["akun"].to_numpy()[posisi_pertama]
+
+    total_debit = jumlah_per_kode(kode, np.where(debit > 0, debit, 0), len(daftar_kunci))
+    total_kredit = jumlah_per_kode(kode, np.where(kredit > 0, kredit, 0), len(daftar_kunci))
+
+    # Satu baris jurnal bisa jadi dua transaksi (debit lalu kredit)
+    tanggal = norm["tanggal"].to_numpy()
+    keterangan = norm["keterangan"].to_numpy()
+
+    baris, is_debit = _posisi_transaksi(kode, debit, kredit)
+
+    trx = pd.DataFrame({
+        "tanggal": tanggal[baris],
+        "keterangan": keterangan[baris],
+        "debit": np.where(is_debit, debit[baris], 0),
+        "kredit": np.where(is_debit, 0, kredit[baris]),
+    }).to_dict("records")
+    batas = np.searchsorted(kode[baris], np.arange(len(daftar_kunci) + 1))
+
+    buku_besar = {}
+    for i, key in enumerate(daftar_kunci):
+        nama_akun_jurnal = nama_pertama[i]
+        buku_besar[key] = {
+            # Nama akun diambil dari Jurnal Umum; kalau kosong, beri placeholder
+            "nama_akun": nama_akun_jurnal if nama_akun_jurnal else "Tidak Ada Nama Akun",
+            "debit": int(total_debit[i]),
+            "kredit": int(total_kredit[i]),
+            "transaksi": trx[batas[i]:batas[i + 1]]
+        }
+
+    return buku_besar, kode, baris
+
+
+def buat_buku_besar(df):
+    # Versi kolumnar: tanpa iterrows, hasil dict sama persis dengan versi lama
+    if df is None or len(df) == 0:
+        return {}
+    return _susun_buku_besar(_normalisasi_jurnal(df))[0]
+
+
+def signature_buku_besar(bb: dict) -> str:
+    # Buat tanda tangan sederhana untuk deteksi perubahan
+    items = []
+    for ref, data in (bb or {}).items():
+        items.append({
+            "ref": str(ref),
+            "nama": data.get("nama_akun", ""),
+            "debit": int(data.get("debit", 0) or 0),
+            "kredit": int(data.get("kredit", 0) or 0),
+        })
+    items.sort(key=lambda x: x["ref"])
+    return json.dumps(items, sort_keys=True)
+
+
+# === Buku besar inkremental (hanya baris jurnal yang berubah) ===
+_BATAS_INKREMENTAL = 0.25  # di atas porsi ini, bangun ulang penuh lebih murah
+
+
+def _entri_transaksi(tanggal, keterangan, debit, kredit):
+    entri = []
+    if debit > 0:
+        entri.append({"tanggal": tanggal, "keterangan": keterangan, "debit": debit, "kredit": 0})
+    if kredit > 0:
+        entri.append({"tanggal": tanggal, "keterangan": keterangan, "debit": 0, "kredit": kredit})
+    return entri
+
+
+def _bangun_indeks_buku_besar(df):
+    # Bangun penuh + indeks per _id baris supaya edit berikutnya bisa diterapkan per baris
+    norm = _normalisasi_jurnal(df)
+    bb, kode, baris_trx = _susun_buku_besar(norm)
+    kunci = norm["kunci"].to_numpy()
+    akun = norm["akun"].to_numpy()
+    ids = df["_id"].to_numpy()
+
+    baris = {i: [k, a, []] for i, k, a in zip(ids.tolist(), kunci, akun)}
+    # Entri di bb[...]["transaksi"] adalah objek yang sama dengan di indeks
+    semua_entri = [e for data in bb.values() for e in data["transaksi"]]
+    for p, e in zip(baris_trx.tolist(), semua_entri):
+        baris[ids[p]][2].append(e)
+
+    # Per akun: daftar _id baris, berurutan sesuai posisi di jurnal
+    urut = np.argsort(kode, kind="stable")
+    batas = np.searchsorted(kode[urut], np.arange(len(bb) + 1))
+    akun_baris = {key: ids[urut[batas[i]:batas[i + 1]]].tolist() for i, key in enumerate(bb)}
+
+    return bb, {"jurnal": df, "baris": baris, "akun": akun_baris}
+
+
+def diff_tabel(lama, baru):
+    """Bandingkan dua versi tabel per ``_id`` (NaN dianggap sama dengan NaN).
+
+    Mengembalikan id baris yang diubah, dihapus, dan ditambah, plus
+    ``geser`` = True kalau posisi baris yang tetap ada ikut bergeser.
+    """
+    id_lama = lama["_id"].to_numpy()
+    id_baru = baru["_id"].to_numpy()
+    if len(id_lama) == len(id_baru) and (id_lama == id_baru).all():
+        # Jalur umum (edit sel saja): posisi semua baris sama
+        pos_lama = pos_baru = slice(None)
+        hapus, tambah, geser = [], [], False
+    else:
+        # Index object (bukan string Arrow) supaya pencocokan id tetap cepat
+        letak = pd.Index(id_lama, dtype=object).get_indexer(id_baru)
+        ada = letak >= 0
+        pos_baru = np.flatnonzero(ada)
+        pos_lama = letak[ada]
+        tambah = id_baru[~ada].tolist()
+        hapus = id_lama[pd.Index(id_baru, dtype=object).get_indexer(id_lama) < 0].tolist()
+        geser = not (np.array_equal(pos_lama, pos_baru) and np.array_equal(pos_baru, np.arange(len(pos_baru))))
+    beda = np.zeros(len(id_baru) if isinstance(pos_baru, slice) else len(pos_baru), dtype=bool)
+    for col in baru.columns:
+        if col == "_id":
+            continue
+        if col not in lama:
+            beda[:] = True
+            continue
+        a = lama[col].to_numpy()[pos_lama]
+        b = baru[col].to_numpy()[pos_baru]
+        beda |= (a != b) & ~(pd.isna(a) & pd.isna(b))
+    return {
+        "ubah": id_baru[pos_baru][beda].tolist(),
+        "hapus": hapus,
+        "tambah": tambah,
+        "geser": geser,
+    }
+
+
+def perbarui_buku_besar(df, bb=None, indeks=None):
+    """Terapkan perubahan jurnal ke buku besar yang sudah ada.
+
+    Baris dicocokkan lewat ``_id``; hanya baris yang ditambah, dihapus, atau
+    diubah yang diproses. Kalau perubahan terlalu banyak (atau belum ada
+    indeks), buku besar dibangun ulang penuh. Mengembalikan (buku_besar, indeks).
+    """
+    if df is None or len(df) == 0:
+        return {}, None
+    if "_id" not in df or not isinstance(df.index, pd.RangeIndex) or df.index.start != 0 or df.index.step != 1:
+        # Placeholder "Akun Tanpa Ref" memakai label index, jadi harus sama dengan posisi
+        return buat_buku_besar(df), None
+    if bb is None or indeks is None or list(indeks["jurnal"].columns) != list(df.columns):
+        return _bangun_indeks_buku_besar(df)
+
+    diff = diff_tabel(indeks["jurnal"], df)
+    jumlah_ubah = len(diff["ubah"]) + len(diff["hapus"]) + len(diff["tambah"])
+    if jumlah_ubah == 0 and not diff["geser"]:
+        return bb, indeks
+    if jumlah_ubah > max(50, _BATAS_INKREMENTAL * len(df)):
+        return _bangun_indeks_buku_besar(df)
+
+    baris = indeks["baris"]
+    akun_baris = indeks["akun"]
+    if diff["geser"]:
+        letak_lama = pd.Index(indeks["jurnal"]["_id"], dtype=object).get_indexer(df["_id"])
+        letak_lama = letak_lama[letak_lama >= 0]
+        if (np.diff(letak_lama) < 0).any() or any(k.startswith("Akun Tanpa Ref ") for k in akun_baris):
+            # Urutan baris berubah, atau ada kunci placeholder yang ikut posisi
+            return _bangun_indeks_buku_besar(df)
+
+    letak = pd.Index(df["_id"], dtype=object)
+    # Normalisasi hanya baris yang berubah; label index = posisi baris
+    posisi_berubah = np.sort(letak.get_indexer(diff["ubah"] + diff["tambah"]))
+    norm = _normalisasi_jurnal(df.iloc[posisi_berubah])
+    ids = df["_id"].to_numpy()
+    kolom = {ids[p]: tuple(r) for p, r in zip(norm.index, norm.itertuples(index=False))}
+    tersentuh = set()
+    disusun_ulang = set()  # akun yang daftar transaksinya harus disusun dari indeks
+
+    def _baru(i):
+        key, akun, tanggal, keterangan, debit, kredit = kolom[i]
+        return key, akun, _entri_transaksi(tanggal, keterangan, int(debit), int(kredit))
+
+    def _ubah_total(key, entri, tanda):
+        for e in entri:
+            bb[key]["debit"] += tanda * e["debit"]
+            bb[key]["kredit"] += tanda * e["kredit"]
+
+    dicabut = list(diff["hapus"])
+    dipasang = list(diff["tambah"])
+    for i in diff["ubah"]:
+        key_lama, _, entri_lama = baris[i]
+        key, akun, entri = _baru(i)
+        sama_bentuk = [e["debit"] > 0 for e in entri_lama] == [e["debit"] > 0 for e in entri]
+        if key == key_lama and sama_bentuk:
+            # Edit sel biasa: perbarui entri yang sama di tempat, tanpa menyusun ulang akun
+            _ubah_total(key, entri_lama, -1)
+            for e_lama, e in zip(entri_lama, entri):
+                e_lama.update(e)
+            _ubah_total(key, entri_lama, 1)
+            baris[i][1] = akun
+            tersentuh.add(key)
+        else:
+            dicabut.append(i)
+            dipasang.append(i)
+
+    # 1) Cabut kontribusi lama
+    for i in dicabut:
+        key, _, entri = baris.pop(i)
+        _ubah_total(key, entri, -1)
+        akun_baris[key].remove(i)
+        disusun_ulang.add(key)
+        tersentuh.add(key)
+
+    # 2) Pasang kontribusi baru (urut posisi di jurnal)
+    for i in sorted(dipasang, key=letak.get_loc):
+        key, akun, entri = _baru(i)
+        if key not in bb:
+            bb[key] = {"nama_akun": "", "debit": 0, "kredit": 0, "transaksi": []}
+            akun_baris[key] = []
+        daftar = akun_baris[key]
+        if key not in disusun_ulang and (not daftar or letak.get_loc(daftar[-1]) < letak.get_loc(i)):
+            # Baris baru di akhir akun: cukup ditambahkan di belakang
+            bb[key]["transaksi"].extend(entri)
+        else:
+            disusun_ulang.add(key)
+        daftar.append(i)
+        _ubah_total(key, entri, 1)
+        baris[i] = [key, akun, entri]
+        tersentuh.add(key)
+
+    # 3) Rapikan akun yang tersentuh
+    for key in disusun_ulang:
+        daftar = akun_baris[key]
+        if not daftar:
+            del bb[key], akun_baris[key]
+            continue
+        daftar.sort(key=letak.get_loc)
+        bb[key]["transaksi"] = [e for i in daftar for e in baris[i][2]]
+    for key in tersentuh & bb.keys():
+        nama_akun_jurnal = baris[akun_baris[key][0]][1]
+        bb[key]["nama_akun"] = nama_akun_jurnal if nama_akun_jurnal else "Tidak Ada Nama Akun"
+
+    # Urutan akun tetap mengikuti kemunculan pertama di jurnal
+    urutan = sorted(bb, key=lambda k: letak.get_loc(akun_baris[k][0]))
+    if urutan != list(bb):
+        bb = {k: bb[k] for k in urutan}
+
+    # Jurnal tidak pernah diubah di tempat, jadi referensinya cukup untuk diff berikutnya
+    indeks["jurnal"] = df
+    return bb, indeks
+
+def neraca_dari_buku_besar(bb, non_destructive: bool = True):
+    if not bb:
+        return pd.DataFrame(columns=["Ref", "Akun", "Debit (Rp)", "Kredit (Rp)"])
+
+    rows = []
+    for key, data in bb.items():
+        ref = key if key != data["nama_akun"] else ""  # kalau key sama dengan nama akun, berarti ref kosong
+        nama_akun = data["nama_akun"] if data["nama_akun"] else key
+        debit = int(data.get("debit", 0) or 0)
+        kredit = int(data.get("kredit", 0) or 0)
+
+        rows.append({
+            "Ref": ref,
+            "Akun": nama_akun,
+            "Debit (Rp)": debit,
+            "Kredit (Rp)": kredit
+        })
+
+    ns = pd.DataFrame(rows)
+
+    if not non_destructive:
+        # Hanya tampilkan Ref yang ada di buku besar
+        refs_bb = set(str(k) for k in bb.keys())
+        ns = ns[ns["Ref"].astype(str).isin(refs_bb)]
+
+    # Reset index
+    return ns.reset_index(drop=True)
+
+
+# === Delta tabel lewat _id (isian grid, tarikan buku bersama) ===
+def delta_grid(terkirim, hasil):
+    """Bandingkan isi grid dengan tabel yang dikirim, dicocokkan lewat ``_id``.
+
+    Mengembalikan ``{"tambah": DataFrame, "ubah": DataFrame, "hapus": [id]}``;
+    baris yang tidak diubah tidak ikut.
+    """
+    kosong = {"tambah": terkirim.iloc[:0], "ubah": terkirim.iloc[:0], "hapus": []}
+    hasil = pd.DataFrame(hasil)
+    if "_id" not in terkirim or "_id" not in hasil or (hasil.empty and not terkirim.empty):
+        return kosong
+    hasil = hasil[[c for c in terkirim.columns if c in hasil]].reset_index(drop=True)
+    # Grid mengembalikan teks; samakan tipenya dengan tabel yang dikirim
+    for col in hasil.columns:
+        if "(Rp)" in col and terkirim[col].dtype != np.int64:
+            hasil[col] = pd.to_numeric(hasil[col], errors="coerce").fillna(0)
+    if "Tanggal" in hasil and not pd.api.types.is_datetime64_dtype(terkirim["Tanggal"].dtype):
+        hasil["Tanggal"] = hasil["Tanggal"].apply(lambda x: "" if pd.isna(x) else str(x))
+    hasil = ikuti_tipe(hasil, terkirim.dtypes)
+    diff = diff_tabel(terkirim, hasil)
+    if not (diff["ubah"] or diff["tambah"] or diff["hapus"]):
+        return kosong
+    return {
+        "tambah": hasil[hasil["_id"].isin(diff["tambah"])],
+        "ubah": hasil[hasil["_id"].isin(diff["ubah"])],
+        "hapus": diff["hapus"],
+    }
+
+
+def terapkan_perubahan(df, perubahan):
+    """Terapkan delta dari grid ke tabel lewat ``_id``; objek sama kalau delta kosong."""
+    ubah, tambah, hapus = perubahan["ubah"], perubahan["tambah"], perubahan["hapus"]
+    if ubah.empty and tambah.empty and not hapus:
+        return df
+    skema = df.dtypes
+    df = df[~df["_id"].isin(hapus)] if hapus else df.copy()
+    if not ubah.empty:
+        posisi = pd.Index(df["_id"], dtype=object).get_indexer(ubah["_id"])
+        for col in ubah.columns.drop("_id"):
+            nilai = ubah[col].to_numpy()
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                # Nilai baru jadi kategori baru; kolom tetap kategori
+                baru = pd.Index(nilai, dtype=object).unique().difference(df[col].cat.categories)
+                if len(baru):
+                    df[col] = df[col].cat.add_categories(baru)
+            elif df[col].dtype == np.int64:
+                # Uang tetap int64: isian grid dibulatkan ke rupiah
+                nilai = rupiah(ubah[col]).to_numpy()
+            elif df[col].dtype != nilai.dtype:
+                df[col] = df[col].astype(object)
+            df.iloc[posisi, df.columns.get_loc(col)] = nilai
+    if not tambah.empty:
+        df = pd.concat([df, tambah], ignore_index=True)
+    return ikuti_tipe(df.reset_index(drop=True), skema)
+
+
+def gabung_tarikan(data, berubah, hapus):
+    """Terapkan baris dari penyimpanan (hasil tarik_jurnal) ke jurnal lokal lewat ``_id``."""
+    ada = berubah["_id"].isin(data["_id"]).to_numpy()
+    kolom = list(data.columns)
+    berubah = ikuti_tipe(berubah, data.dtypes)
+    return terapkan_perubahan(data, {
+        "ubah": berubah.loc[ada, kolom],
+        "tambah": berubah.loc[~ada, kolom],
+        "hapus": hapus,
+    })
+
+
+def ikuti_urutan(data, urutan):
+    """Susun ulang jurnal lokal mengikuti urutan ``_id`` tersimpan; baris yang belum disimpan tetap di belakang."""
+    posisi = pd.Index(data["_id"], dtype=object).get_indexer(urutan)
+    posisi = posisi[posisi >= 0]
+    sisa = np.setdiff1d(np.arange(len(data)), posisi, assume_unique=True)
+    baru = np.concatenate([posisi, sisa])
+    if np.array_equal(baru, np.arange(len(data))):
+        return data
+    return data.iloc[baru].reset_index(drop=True)
+
+
+# === Periode (bulan/tahun) dengan indeks tanggal terurut ===
+def buat_indeks_periode(df):
+    # Tanggal diparse sekali, lalu diurutkan; NaT (tanggal tak terbaca) ada di ujung
+    tanggal = parse_tanggal(df["Tanggal"])
+    nilai = tanggal.to_numpy()
+    urutan = np.argsort(nilai, kind="stable")
+    # Kode bulan per baris (tahun*12 + bulan-1), -1 kalau tanggal tak terbaca
+    kode_bulan = (tanggal.dt.year * 12 + tanggal.dt.month - 1).fillna(-1).astype(int).to_numpy()
+    return {
+        "tanggal": nilai[urutan],
+        "urutan": urutan,
+        "kode_bulan": kode_bulan,
+        "tak_terbaca": int(np.isnat(nilai).sum()),
+    }
+
+
+def filter_periode(df, tahun, bulan, indeks=None):
+    # Ambil baris jurnal satu bulan lewat binary search, urutan baris asli tetap
+    if indeks is None:
+        indeks = buat_indeks_periode(df)
+    awal = pd.Timestamp(year=int(tahun), month=int(bulan), day=1)
+    akhir = awal + pd.DateOffset(months=1)
+    lo, hi = np.searchsorted(indeks["tanggal"], [np.datetime64(awal), np.datetime64(akhir)], side="left")
+    return df.iloc[np.sort(indeks["urutan"][lo:hi])]
+
+
+# === Saldo awal dari snapshot akhir bulan ===
+LABA_DITAHAN = "Laba Ditahan"
+# Naikkan kalau aturan penutupan tahun berubah: snapshot tersimpan dengan aturan lama dihitung ulang
+VERSI_SNAPSHOT = 2
+
+
+def mutasi_bulan(df):
+    # Mutasi bersih (debit - kredit) per akun untuk baris-baris satu bulan
+    norm = _normalisasi_jurnal(df)
+    return pd.DataFrame({
+        "nama_akun": norm["akun"],
+        "saldo": norm["debit"].clip(lower=0) - norm["kredit"].clip(lower=0),
+    }).groupby(norm["kunci"], sort=False).agg(nama_akun=("nama_akun", "first"), saldo=("saldo", "sum"))
+
+
+def _tambah_saldo(saldo, mutasi):
+    # Nama akun yang sudah ada dipertahankan, akun baru ikut di belakang
+    baru = mutasi.index.difference(saldo.index, sort=False)
+    hasil = pd.concat([saldo, mutasi.loc[baru, ["nama_akun"]].assign(saldo=0)]) if len(baru) else saldo.copy()
+    hasil["saldo"] = hasil["saldo"] + mutasi["saldo"].reindex(hasil.index, fill_value=0)
+    return hasil
+
+
+def _tutup_tahun(saldo, indeks_akun=INDEKS_DEFAULT):
+    # Saldo akun nominal (pos Pendapatan/Beban) dan Prive dinolkan dan dipindah ke Laba Ditahan (ekuitas)
+    ditutup = akun_nominal(saldo.index, saldo["nama_akun"], indeks_akun) | (
+        klasifikasi_akun(saldo.index, saldo["nama_akun"], indeks_akun).to_numpy() == "Prive"
+    )
+    if not ditutup.any():
+        return saldo
+    laba = saldo.loc[ditutup, "saldo"].sum()
+    tutup = pd.DataFrame({"nama_akun": [LABA_DITAHAN], "saldo": [laba]}, index=[LABA_DITAHAN])
+    return _tambah_saldo(saldo[~ditutup], tutup)
+
+
+def perbarui_snapshot(df, indeks, cache=None, indeks_akun=INDEKS_DEFAULT):
+    """Hitung snapshot saldo akhir bulan per akun.
+
+    Tiap bulan diberi sidik jari (jumlah hash baris); hanya bulan yang
+    sidik jarinya berubah yang mutasinya dihitung ulang, lalu snapshot
+    disusun ulang mulai bulan paling awal yang berubah. Sidik jari ikut
+    memuat bagan akun karena penutupan tahun bergantung padanya.
+    Mengembalikan (cache, himpunan bulan yang berubah).
+    """
+    if cache is None:
+        cache = {"hash": {}, "mutasi": {}, "snapshot": {}}
+
+    kode = indeks["kode_bulan"]
+    valid = np.flatnonzero(kode >= 0)
+    hash_bulan = {}
+    if len(valid):
+        hash_baris = pd.util.hash_pandas_object(df.iloc[valid], index=False).to_numpy()
+        urut = np.argsort(kode[valid], kind="stable")
+        kode_urut = kode[valid][urut]
+        awal = np.flatnonzero(np.r_[True, kode_urut[1:] != kode_urut[:-1]])
+        hash_bulan = dict(zip(kode_urut[awal].tolist(), np.add.reduceat(hash_baris[urut], awal).tolist()))
+        sidik_bagan = int(hash_konten(indeks_akun, VERSI_SNAPSHOT)[:16], 16)
+        hash_bulan = {b: (h + sidik_bagan) % 2**64 for b, h in hash_bulan.items()}
+
+    berubah = {b for b in set(hash_bulan) | set(cache["hash"]) if hash_bulan.get(b) != cache["hash"].get(b)}
+    if not berubah:
+        return cache, berubah
+
+    for b in berubah:
+        if b in hash_bulan:
+            cache["mutasi"][b] = mutasi_bulan(filter_periode(df, b // 12, b % 12 + 1, indeks))
+        else:
+            cache["mutasi"].pop(b, None)
+    cache["hash"] = hash_bulan
+
+    # Susun ulang snapshot mulai bulan paling awal yang berubah
+    mulai = min(berubah)
+    snapshot = {b: v for b, v in cache["snapshot"].items() if b < mulai}
+    sebelum = max(snapshot) if snapshot else None
+    saldo = snapshot[sebelum] if sebelum is not None else pd.DataFrame(
+        {"nama_akun": pd.Series(dtype=object), "saldo": pd.Series(dtype=np.int64)}
+    )
+    for b in sorted(k for k in cache["mutasi"] if k >= mulai):
+        if sebelum is not None and b // 12 > sebelum // 12:
+            saldo = _tutup_tahun(saldo, indeks_akun)
+        saldo = _tambah_saldo(saldo, cache["mutasi"][b])
+        snapshot[b] = saldo
+        sebelum = b
+    cache["snapshot"] = snapshot
+    return cache, berubah
+
+
+def saldo_awal_periode(snapshot, tahun, bulan, indeks_akun=INDEKS_DEFAULT):
+    # Snapshot terakhir sebelum periode; lewat tahun buku = akun nominal ditutup dulu
+    kode = int(tahun) * 12 + int(bulan) - 1
+    sebelum = [b for b in snapshot if b < kode]
+    if not sebelum:
+        return None
+    b = max(sebelum)
+    saldo = snapshot[b]
+    if b // 12 < kode // 12:
+        saldo = _tutup_tahun(saldo, indeks_akun)
+    return saldo
+
+
+def gabung_saldo_awal(bb, saldo_awal):
+    # Buku besar periode + baris "Saldo Awal" di depan tiap akun
+    if saldo_awal is None or saldo_awal.empty:
+        return bb
+    hasil = {}
+    for key, nama_akun, saldo in zip(saldo_awal.index, saldo_awal["nama_akun"], saldo_awal["saldo"]):
+        if saldo == 0:
+            continue
+        entri = {
+            "tanggal": "",
+            "keterangan": "Saldo Awal",
+            "debit": int(max(saldo, 0)),
+            "kredit": int(max(-saldo, 0)),
+        }
+        hasil[key] = {
+            "nama_akun": nama_akun if nama_akun else "Tidak Ada Nama Akun",
+            "debit": entri["debit"],
+            "kredit": entri["kredit"],
+            "transaksi": [entri],
+        }
+    for key, data in bb.items():
+        if key not in hasil:
+            hasil[key] = data
+            continue
+        awal = hasil[key]
+        hasil[key] = {
+            "nama_akun": data["nama_akun"],
+            "debit": awal["debit"] + data["debit"],
+            "kredit": awal["kredit"] + data["kredit"],
+            "transaksi": awal["transaksi"] + data["transaksi"],
+        }
+    return hasil
+
+
+# === Voucher seimbang ===
+def periksa_voucher(jurnal, bukti=None, toleransi=0):
+    """Kelompokkan baris per voucher dan cari voucher yang debit != kredit.
+
+    Dengan kolom bukti, voucher = baris dengan nomor bukti sama. Tanpa itu,
+    voucher = baris berurutan bertanggal sama sampai saldo berjalannya kembali 0.
+    Mengembalikan (kode voucher per baris, daftar kode yang tidak seimbang, selisih per kode).
+    """
+    selisih = (rupiah(jurnal["Debit (Rp)"]) - rupiah(jurnal["Kredit (Rp)"])).to_numpy()
+    if len(selisih) == 0:
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=int), np.zeros(0, dtype=np.int64)
+    if bukti is not None:
+        kode = pd.factorize(bukti)[0]
+    else:
+        tanggal = jurnal["Tanggal"].to_numpy()
+        if tanggal.dtype.kind == "M":
+            # NaT != NaT; bandingkan sebagai angka supaya tanggal kosong berurutan tetap satu blok
+            tanggal = tanggal.view(np.int64)
+        ganti_tanggal = np.r_[True, tanggal[1:] != tanggal[:-1]]
+        kum = np.cumsum(selisih)
+        # Saldo berjalan direset di tiap awal blok tanggal
+        awal_blok = np.flatnonzero(ganti_tanggal)
+        dasar = np.repeat(kum[awal_blok] - selisih[awal_blok], np.diff(np.r_[awal_blok, len(kum)]))
+        tutup = np.abs(kum - dasar) <= toleransi
+        kode = np.cumsum(ganti_tanggal | np.r_[False, tutup[:-1]]) - 1
+    total = jumlah_per_kode(kode, selisih, kode.max() + 1)
+    return kode, np.flatnonzero(np.abs(total) > toleransi), total
+
+
+# === Mesin laporan keuangan (Laba/Rugi, Neraca, Arus Kas tanpa loop per baris) ===
+def _angka(seri):
+    return rupiah(seri)
+
+
+def baris_terisi(df, kolom):
+    # Baris yang kolom namanya tidak kosong; index asli dipertahankan (dipakai untuk nomor urut)
+    return df[df[kolom].astype(str).str.strip() != ""]
+
+
+def _gabung_blok(*blok):
+    # Potongan laporan (list dict atau DataFrame) digabung sekali jalan
+    return pd.concat(
+        [b if isinstance(b, pd.DataFrame) else pd.DataFrame(b) for b in blok if len(b)],
+        ignore_index=True,
+    ).astype(object)
+
+
+def pisah_neraca_saldo(neraca, indeks_akun=INDEKS_DEFAULT):
+    """Bagi Neraca Saldo ke tabel isian laporan menurut pos di bagan akun.
+
+    Mengembalikan dict pendapatan, beban, aktiva_lancar, aktiva_tetap,
+    kewajiban (masing-masing diawali satu baris kosong seperti isian manual)
+    dan modal_data.
+    """
+    neraca = baris_terisi(neraca, "Akun")
+    pos = klasifikasi_akun(neraca["Ref"], neraca["Akun"], indeks_akun).to_numpy()
+    akun = neraca["Akun"].to_numpy()
+    debit = _angka(neraca["Debit (Rp)"]).to_numpy()
+    kredit = _angka(neraca["Kredit (Rp)"]).to_numpy()
+
+    def tabel(kolom_nama, pos_ini, **angka):
+        kosong = {kolom_nama: "", **{k: 0 for k in angka}}
+        isi = {kolom_nama: akun[pos == pos_ini]}
+        isi.update({k: (v[pos == pos_ini] if isinstance(v, np.ndarray) else v) for k, v in angka.items()})
+        return pd.concat([pd.DataFrame([kosong]), pd.DataFrame(isi)], ignore_index=True)
+
+    # Aset bersaldo normal debit, kewajiban kredit (akun kontra seperti akumulasi penyusutan jadi negatif)
+    return {
+        "pendapatan": tabel("Jenis Pendapatan", "Pendapatan", **{"Debit (Rp)": 0, "Kredit (Rp)": kredit}),
+        "beban": tabel("Jenis Beban", "Beban", **{"Debit (Rp)": debit, "Kredit (Rp)": 0}),
+        "aktiva_lancar": tabel("Item", "Aktiva Lancar", **{"Jumlah (Rp)": debit - kredit}),
+        "aktiva_tetap": tabel("Item", "Aktiva Tetap", **{"Jumlah (Rp)": debit - kredit}),
+        "kewajiban": tabel("Item", "Kewajiban", **{"Jumlah (Rp)": kredit - debit}),
+        # Modal + laba tahun-tahun sebelumnya (dari snapshot saldo awal)
+        "modal_data": {
+            "modal_awal": int((kredit - debit)[pos == "Modal"].sum()),
+            "prive": int((debit - kredit)[pos == "Prive"].sum()),
+        },
+    }
+
+
+def susun_laba_rugi(pendapatan, beban):
+    """Kembalikan (tabel Laba/Rugi, total_pendapatan, total_beban, laba_bersih)."""
+    p = baris_terisi(pendapatan, "Jenis Pendapatan")
+    b = baris_terisi(beban, "Jenis Beban")
+    p_debit, p_kredit = _angka(p["Debit (Rp)"]), _angka(p["Kredit (Rp)"])
+    b_debit, b_kredit = _angka(b["Debit (Rp)"]), _angka(b["Kredit (Rp)"])
+    # Pendapatan = Kredit, Beban = Debit
+    total_pendapatan = int(p_kredit.sum())
+    total_beban = int(b_debit.sum())
+    laba_bersih = total_pendapatan - total_beban
+    kosong = {"Keterangan": "", "Debit": "", "Kredit": ""}
+    tabel = _gabung_blok(
+        [{"Keterangan": "Pendapatan:", "Debit": "", "Kredit": ""}],
+        pd.DataFrame({
+            "Keterangan": "  " + (p.index + 1).astype(str) + ". " + p["Jenis Pendapatan"].astype(str),
+            "Debit": p_debit.astype(object).where(p_debit != 0, ""),
+            "Kredit": p_kredit,
+        }),
+        [kosong, {"Keterangan": "Total Pendapatan", "Debit": "", "Kredit": total_pendapatan}, kosong,
+         {"Keterangan": "Beban-Beban:", "Debit": "", "Kredit": ""}],
+        pd.DataFrame({
+            "Keterangan": "  " + (b.index + 1).astype(str) + ". " + b["Jenis Beban"].astype(str),
+            "Debit": b_debit,
+            "Kredit": b_kredit.astype(object).where(b_kredit != 0, ""),
+        }),
+        [kosong, {"Keterangan": "Total Beban", "Debit": total_beban, "Kredit": ""}, kosong,
+         # Laba Bersih = Kredit - Debit
+         {"Keterangan": "Laba Bersih", "Debit": "", "Kredit": laba_bersih} if laba_bersih >= 0
+         else {"Keterangan": "Rugi Bersih", "Debit": abs(laba_bersih), "Kredit": ""}],
+    )
+    return tabel, total_pendapatan, total_beban, laba_bersih
+
+
+def susun_neraca_lap(aktiva_lancar, aktiva_tetap, kewajiban, modal_awal, laba_bersih, prive=0):
+    """Kembalikan (tabel Neraca dua sisi, total_aktiva, total_passiva, modal_akhir).
+
+    Modal akhir = modal awal + laba bersih - prive.
+    """
+    lancar = baris_terisi(aktiva_lancar, "Item").reset_index(drop=True)
+    tetap = baris_terisi(aktiva_tetap, "Item")
+    wajib = baris_terisi(kewajiban, "Item").reset_index(drop=True)
+    total_aktiva_lancar = int(_angka(lancar["Jumlah (Rp)"]).sum())
+    total_aktiva = total_aktiva_lancar + int(_angka(tetap["Jumlah (Rp)"]).sum())
+    modal_awal = round(modal_awal)
+    prive = round(prive)
+    modal_akhir = modal_awal + laba_bersih - prive
+    total_passiva = int(_angka(wajib["Jumlah (Rp)"]).sum()) + modal_akhir
+
+    # Aktiva lancar dan kewajiban berdampingan; sisi yang lebih pendek diisi kosong
+    n = max(len(lancar), len(wajib))
+    lancar = lancar.reindex(range(n))
+    wajib = wajib.reindex(range(n))
+    kosong = {"Aktiva": "", "Jumlah1": "", "Passiva": "", "Jumlah2": ""}
+    tabel = _gabung_blok(
+        [{"Aktiva": "Aktiva", "Jumlah1": "", "Passiva": "Passiva", "Jumlah2": ""}, kosong,
+         {"Aktiva": "Aktiva Lancar:", "Jumlah1": "", "Passiva": "Kewajiban:", "Jumlah2": ""}],
+        pd.DataFrame({
+            "Aktiva": "  " + lancar["Item"].fillna("").astype(str),
+            "Jumlah1": lancar["Jumlah (Rp)"].astype(object).fillna(""),
+            "Passiva": "  " + wajib["Item"].fillna("").astype(str),
+            "Jumlah2": wajib["Jumlah (Rp)"].astype(object).fillna(""),
+        }),
+        [kosong,
+         {"Aktiva": "Jml aktiva lancar", "Jumlah1": total_aktiva_lancar, "Passiva": "Ekuitas:", "Jumlah2": ""},
+         {"Aktiva": "", "Jumlah1": "", "Passiva": "  Modal", "Jumlah2": modal_awal}],
+        # Prive (pengurang ekuitas) hanya tampil kalau ada
+        [{"Aktiva": "", "Jumlah1": "", "Passiva": "  Laba", "Jumlah2": laba_bersih},
+         {"Aktiva": "Aktiva Tetap:", "Jumlah1": "", "Passiva": "  Prive", "Jumlah2": -prive}] if prive else
+        [{"Aktiva": "Aktiva Tetap:", "Jumlah1": "", "Passiva": "  Laba", "Jumlah2": laba_bersih}],
+        pd.DataFrame({
+            "Aktiva": "  " + tetap["Item"].astype(str),
+            "Jumlah1": tetap["Jumlah (Rp)"].astype(object),
+            "Passiva": "",
+            "Jumlah2": "",
+        }),
+        [kosong,
+         {"Aktiva": "Jml Aktiva", "Jumlah1": total_aktiva, "Passiva": "Jml Kewajiban & Ekuitas", "Jumlah2": total_passiva}],
+    )
+    return tabel, total_aktiva, total_passiva, modal_akhir
+
+
+def susun_arus_kas(operasi, investasi, pendanaan):
+    """Tabel Arus Kas tiga bagian (DataFrame kosong kalau semua bagian kosong)."""
+    blok, ada_isi = [], False
+    for judul, df in (("Operasi", operasi), ("Investasi", investasi), ("Pendanaan", pendanaan)):
+        df = baris_terisi(df, "Aktivitas")
+        ada_isi = ada_isi or not df.empty
+        if blok:
+            blok.append([{"Aktivitas": "", "Jumlah": ""}])
+        blok.append([{"Aktivitas": f"Arus Kas {judul}:", "Jumlah": ""}])
+        blok.append(pd.DataFrame({
+            "Aktivitas": "  " + df["Aktivitas"].astype(str),
+            "Jumlah": df["Jumlah (Rp)"].astype(object),
+        }))
+    if not ada_isi:
+        return pd.DataFrame(columns=["Aktivitas", "Jumlah"])
+    return _gabung_blok(*blok)
+
+
+def _bagi_sebanding(kode, bobot, total_bobot, target):
+    # target[k] dibagi ke baris berkode k sebanding bobot/total_bobot[k]. Dibulatkan ke bawah
+    # lalu sisanya diberikan ke pecahan terbesar, jadi jumlah per kode tepat = target[k].
+    porsi = bobot / total_bobot[kode] * target[kode]
+    hasil = np.floor(porsi).astype(np.int64)
+    sisa = target - jumlah_per_kode(kode, hasil, len(target))
+    urut = np.lexsort((hasil - porsi, kode))
+    kode_urut = kode[urut]
+    ke = np.arange(len(urut)) - np.searchsorted(kode_urut, kode_urut)
+    n = np.bincount(kode, minlength=len(target))[kode_urut]
+    s = sisa[kode_urut]
+    # Sisa positif: +1 untuk s baris pertama; negatif (galat float): -1 untuk baris terakhir
+    hasil[urut] += (ke < s).astype(np.int64) - (ke >= n + s)
+    return hasil
+
+
+def arus_kas_dari_jurnal(df, indeks_akun=INDEKS_DEFAULT):
+    """Isian Arus Kas dari baris jurnal yang menyentuh akun kas/bank.
+
+    Baris dikelompokkan per voucher (lihat periksa_voucher). Kas bersih tiap
+    voucher dibagi ke baris non-kas di sisi seberangnya sebanding nilainya;
+    kelompok tiap lawan (Operasi/Investasi/Pendanaan) diambil dari bagan akun.
+    Mengembalikan (``{"operasi"|"investasi"|"pendanaan": DataFrame}``, perubahan kas bersih).
+    """
+    kelompok = {"Operasi": "operasi", "Investasi": "investasi", "Pendanaan": "pendanaan"}
+    hasil = {k: pd.DataFrame({"Aktivitas": [""], "Jumlah (Rp)": [0]}) for k in kelompok.values()}
+    if df is None or len(df) == 0:
+        return hasil, 0
+    norm = _normalisasi_jurnal(df)
+    debit = norm["debit"].clip(lower=0).to_numpy()
+    kredit = norm["kredit"].clip(lower=0).to_numpy()
+    kode, _, _ = periksa_voucher(pd.DataFrame({
+        "Tanggal": norm["tanggal"].to_numpy(), "Debit (Rp)": debit, "Kredit (Rp)": kredit,
+    }))
+    kategori = kategori_arus_kas(kolom_teks(df, "Ref"), norm["akun"], indeks_akun).to_numpy()
+
+    # Indeks per voucher: kas bersih dan total lawan transaksinya, sekali jalan.
+    # Lawan = baris non-kas di sisi berlawanan dengan kas (beli alat sebagian utang:
+    # hanya bagian tunai yang masuk arus kas investasi).
+    net = debit - kredit
+    kas = kategori == "Kas"
+    kas_v = jumlah_per_kode(kode, np.where(kas, net, 0), kode.max() + 1)
+    lawan = ~kas & (np.sign(net) == -np.sign(kas_v[kode]))
+    lawan_v = jumlah_per_kode(kode, np.where(lawan, net, 0), len(kas_v))
+    lawan &= lawan_v[kode] != 0
+    # Kas dibagi dalam rupiah bulat; jumlah efek tiap voucher tepat sama dengan kas bersihnya
+    efek = np.zeros(len(net), dtype=np.int64)
+    efek[lawan] = _bagi_sebanding(kode[lawan], net[lawan], lawan_v, kas_v)
+
+    pakai = efek != 0
+    nama = norm["akun"].where(norm["akun"] != "", norm["kunci"]).to_numpy()
+    arus = pd.DataFrame({
+        # Lawan yang belum terklasifikasi dianggap aktivitas operasi
+        "kelompok": np.where(kategori[pakai] == "", "Operasi", kategori[pakai]),
+        "Aktivitas": nama[pakai],
+        "Jumlah (Rp)": efek[pakai],
+    }).groupby(["kelompok", "Aktivitas"], sort=False)["Jumlah (Rp)"].sum().reset_index()
+    for k, bagian in arus.groupby("kelompok", sort=False):
+        hasil[kelompok[k]] = bagian[["Aktivitas", "Jumlah (Rp)"]].reset_index(drop=True)
+    return hasil, int(kas_v.sum())
+
+
+def susun_laporan(neraca, indeks_akun=INDEKS_DEFAULT, arus_kas=None):
+    """Ketiga laporan langsung dari Neraca Saldo dalam satu jalan.
+
+    ``arus_kas`` opsional: dict operasi/investasi/pendanaan. Mengembalikan
+    dict berisi tabel isian (lihat pisah_neraca_saldo), tabel laporan
+    ``labarugi``/``neraca_lap``/``arus_kas``, dan angka ringkasnya.
+    """
+    isian = pisah_neraca_saldo(neraca, indeks_akun)
+    labarugi, total_pendapatan, total_beban, laba_bersih = susun_laba_rugi(isian["pendapatan"], isian["beban"])
+    neraca_lap, total_aktiva, total_passiva, modal_akhir = susun_neraca_lap(
+        isian["aktiva_lancar"], isian["aktiva_tetap"], isian["kewajiban"],
+        isian["modal_data"]["modal_awal"], laba_bersih, isian["modal_data"]["prive"],
+    )
+    kosong = pd.DataFrame({"Aktivitas": [], "Jumlah (Rp)": []})
+    arus_kas = arus_kas or {}
+    return {
+        **isian,
+        "labarugi": labarugi,
+        "neraca_lap": neraca_lap,
+        "arus_kas": susun_arus_kas(
+            arus_kas.get("operasi", kosong), arus_kas.get("investasi", kosong), arus_kas.get("pendanaan", kosong)
+        ),
+        "total_pendapatan": total_pendapatan,
+        "total_beban": total_beban,
+        "laba_bersih": laba_bersih,
+        "total_aktiva": total_aktiva,
+        "total_passiva": total_passiva,
+        "modal_akhir": modal_akhir,
+    }
+
+
+# === Buku besar sebagai tabel datar ===
+def buku_besar_kolumnar(df):
+    """Semua transaksi buku besar sebagai satu tabel datar (satu baris per transaksi)."""
+    kolom = ["Ref", "Akun", "Tanggal", "Keterangan", "Debit (Rp)", "Kredit (Rp)"]
+    if df is None or len(df) == 0:
+        return pd.DataFrame(columns=kolom)
+    norm = _normalisasi_jurnal(df)
+    debit = norm["debit"].to_numpy()
+    kredit = norm["kredit"].to_numpy()
+    kode, daftar_kunci = pd.factorize(norm["kunci"], sort=False)
+    _, posisi_pertama = np.unique(kode, return_index=True)
+    nama = norm["akun"].to_numpy()[posisi_pertama]
+    nama = np.where(nama == "", "Tidak Ada Nama Akun", nama)
+    baris, is_debit = _posisi_transaksi(kode, debit, kredit)
+    return pd.DataFrame({
+        "Ref": np.asarray(daftar_kunci, dtype=object)[kode[baris]],
+        "Akun": nama[kode[baris]],
+        "Tanggal": norm["tanggal"].to_numpy()[baris],
+        "Keterangan": norm["keterangan"].to_numpy()[baris],
+        "Debit (Rp)": np.where(is_debit, debit[baris], 0),
+        "Kredit (Rp)": np.where(is_debit, 0, kredit[baris]),
+    }, columns=kolom)
+
+
+# === Tabel cetak Jurnal dan Neraca Saldo (tabel hasil dan PDF) ===
+def jurnal_cetak(df):
+    """Baris jurnal berketerangan, tanggal sebagai teks, ditutup baris TOTAL (kosong kalau tak ada baris)."""
+    bersih = df[df["Keterangan"].astype(str).str.strip() != ""].drop(columns="_id", errors="ignore")
+    if bersih.empty:
+        return bersih
+    total = pd.DataFrame({
+        "Tanggal": [""],
+        "Keterangan": ["TOTAL"],
+        "Ref": [""],
+        "Akun": [""],
+        "Debit (Rp)": [bersih["Debit (Rp)"].sum()],
+        "Kredit (Rp)": [bersih["Kredit (Rp)"].sum()],
+    })
+    return pd.concat([tampilan_tabel(bersih), total], ignore_index=True)
+
+
+def neraca_saldo_cetak(neraca):
+    """Baris Neraca Saldo berakun, bernomor urut mulai 1, ditutup baris Jumlah (kosong kalau tak ada baris)."""
+    bersih = neraca[neraca["Akun"].astype(str).str.strip() != ""].drop(columns="_id", errors="ignore")
+    if bersih.empty:
+        return bersih
+    total = pd.DataFrame({
+        "Ref": [""],
+        "Akun": ["Jumlah"],
+        "Debit (Rp)": [bersih["Debit (Rp)"].sum()],
+        "Kredit (Rp)": [bersih["Kredit (Rp)"].sum()],
+    })
+    hasil = pd.concat([bersih, total], ignore_index=True)
+    hasil.index = range(1, len(hasil) + 1)
+    hasil.index.name = "No"
+    return hasil
+
+
+def nama_akun_buku_besar(bb):
+    """Nama akun di buku besar, urut seperti buku besar (pilihan dropdown Neraca Saldo)."""
+    return [data["nama_akun"] for data in (bb or {}).values() if isinstance(data, dict) and "nama_akun" in data]
+
+
+# === Tabel hasil siap tampil: teks rupiah, nomor urut, HTML ===
+def teks_rupiah_tabel(df, kolom):
+    """Salinan dangkal ``df`` dengan kolom uang ``kolom`` sudah jadi teks rupiah."""
+    return df.assign(**{col: format_rupiah_kolom(df[col]) for col in kolom})
+
+
+def _escape_html(seri):
+    return seri.str.replace("&", "&amp;", regex=False).str.replace("<", "&lt;", regex=False).str.replace(
+        ">", "&gt;", regex=False
+    )
+
+
+def html_tabel(df, kanan=(), tebal=None):
+    """Tabel HTML dari ``df`` (semua kolom sudah teks/angka siap tampil).
+
+    Disusun kolom demi kolom dengan operasi string pandas, bukan per sel;
+    kolom ``kanan`` rata kanan, baris bermask ``tebal`` dicetak tebal.
+    """
+    judul = _escape_html(pd.Series(df.columns.astype(str)))
+    kepala = "".join(
+        f'<th class="angka">{j}</th>' if col in kanan else f"<th>{j}</th>" for col, j in zip(df.columns, judul)
+    )
+    baris = pd.Series("", index=df.index, dtype=object)
+    for col in df.columns:
+        teks = _escape_html(df[col].astype(object).where(df[col].notna(), "").astype(str))
+        baris = baris + ('<td class="angka">' if col in kanan else "<td>") + teks.to_numpy() + "</td>"
+    buka = np.where(tebal, '<tr class="tebal">', "<tr>") if tebal is not None else "<tr>"
+    isi = "".join((buka + baris + "</tr>").tolist())
+    return f'<div class="tabel-hasil"><table><thead><tr>{kepala}</tr></thead><tbody>{isi}</tbody></table></div>'
+
+
+def tabel_bernomor(df, kolom):
+    """Seperti ``teks_rupiah_tabel``, dengan index "No" mulai 1 (tabel hasil jurnal/transaksi)."""
+    tampil = teks_rupiah_tabel(df, kolom)
+    tampil.index = pd.RangeIndex(1, len(tampil) + 1, name="No")
+    return tampil
+
+
+# === Laporan satu periode tanpa UI (skrip batch, uji kinerja) ===
+def laporan_periode(jurnal, tahun=None, bulan=None, indeks_akun=INDEKS_DEFAULT, snapshot=None):
+    """Semua laporan satu periode langsung dari jurnal, jalur yang sama dengan tab aplikasi.
+
+    ``tahun``/``bulan`` kosong = seluruh jurnal tanpa saldo awal. Untuk satu
+    bulan, saldo awal diambil dari ``snapshot`` (bagian ``"snapshot"`` cache
+    perbarui_snapshot); kalau tidak diberikan, snapshot dihitung di sini.
+    Mengembalikan dict berisi ``jurnal`` periode, ``buku_besar``,
+    ``neraca_saldo``, semua isi susun_laporan dengan arus kas terisi dari
+    jurnal periode, dan ``kas_bersih``.
+    """
+    if tahun is None or bulan is None:
+        periode, saldo_awal = jurnal, None
+    else:
+        indeks = buat_indeks_periode(jurnal)
+        periode = filter_periode(jurnal, tahun, bulan, indeks).reset_index(drop=True)
+        if snapshot is None:
+            snapshot = perbarui_snapshot(jurnal, indeks, indeks_akun=indeks_akun)[0]["snapshot"]
+        saldo_awal = saldo_awal_periode(snapshot, tahun, bulan, indeks_akun)
+    buku_besar = gabung_saldo_awal(buat_buku_besar(periode), saldo_awal)
+    neraca = neraca_dari_buku_besar(buku_besar)
+    arus_kas, kas_bersih = arus_kas_dari_jurnal(periode, indeks_akun)
+    return {
+        "jurnal": periode,
+        "buku_besar": buku_besar,
+        "neraca_saldo": neraca,
+        **susun_laporan(neraca, indeks_akun, arus_kas),
+        "kas_bersih": kas_bersih,
+    }
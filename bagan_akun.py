@@ -0,0 +1,185 @@
+"""Bagan akun (chart of accounts) BUMDes.
+
+Tiap akun dikunci oleh Ref dan punya tipe, saldo normal, serta pos laporan
+keuangan tempat saldonya muncul. Klasifikasi baris Neraca Saldo memakai
+lookup Ref -> pos yang dibangun sekali per bagan (lihat ``indeks_bagan``);
+pencocokan kata kunci nama akun hanya jadi cadangan untuk Ref yang belum
+terdaftar.
+"""
+import numpy as np
+import pandas as pd
+
+KOLOM_BAGAN = ["Ref", "Akun", "Tipe", "Saldo Normal", "Pos Laporan", "Arus Kas"]
+
+# Tipe akun -> saldo normal
+SALDO_NORMAL = {
+    "Aset": "Debit",
+    "Kewajiban": "Kredit",
+    "Ekuitas": "Kredit",
+    "Pendapatan": "Kredit",
+    "Beban": "Debit",
+}
+
+POS_LAPORAN = ["Aktiva Lancar", "Aktiva Tetap", "Kewajiban", "Modal", "Prive", "Pendapatan", "Beban"]
+# Pos yang saldonya ditutup ke Laba Ditahan tiap akhir tahun buku
+POS_NOMINAL = {"Pendapatan", "Beban"}
+
+# Kolom "Arus Kas": "Kas" = akun kas/bank; lainnya = kelompok arus kas lawan transaksinya
+KATEGORI_ARUS_KAS = ["Kas", "Operasi", "Investasi", "Pendanaan"]
+# Kalau kolom Arus Kas kosong, kelompok diturunkan dari pos laporan
+_ARUS_PER_POS = {
+    "Aktiva Lancar": "Operasi", "Kewajiban": "Operasi", "Pendapatan": "Operasi", "Beban": "Operasi",
+    "Aktiva Tetap": "Investasi", "Modal": "Pendanaan", "Prive": "Pendanaan",
+}
+# Akun kas/bank yang belum terdaftar dikenali dari namanya
+_POLA_AKUN_KAS = r"^(?:kas|bank)\b"
+
+BAGAN_AKUN_DEFAULT = [
+    ("101", "Kas", "Aset", "Aktiva Lancar"),
+    ("102", "Bank", "Aset", "Aktiva Lancar"),
+    ("103", "Piutang Usaha", "Aset", "Aktiva Lancar"),
+    ("104", "Perlengkapan", "Aset", "Aktiva Lancar"),
+    ("105", "Persediaan Barang Dagang", "Aset", "Aktiva Lancar"),
+    ("106", "Sewa Dibayar di Muka", "Aset", "Aktiva Lancar"),
+    ("121", "Peralatan", "Aset", "Aktiva Tetap"),
+    ("122", "Akumulasi Penyusutan Peralatan", "Aset", "Aktiva Tetap"),
+    ("123", "Kendaraan", "Aset", "Aktiva Tetap"),
+    ("124", "Gedung", "Aset", "Aktiva Tetap"),
+    ("125", "Tanah", "Aset", "Aktiva Tetap"),
+    ("201", "Utang Usaha", "Kewajiban", "Kewajiban"),
+    ("202", "Utang Bank", "Kewajiban", "Kewajiban"),
+    ("203", "Utang Gaji", "Kewajiban", "Kewajiban"),
+    ("301", "Modal", "Ekuitas", "Modal"),
+    ("302", "Prive", "Ekuitas", "Prive"),
+    ("303", "Laba Ditahan", "Ekuitas", "Modal"),
+    ("401", "Pendapatan Usaha", "Pendapatan", "Pendapatan"),
+    ("402", "Pendapatan Jasa", "Pendapatan", "Pendapatan"),
+    ("403", "Pendapatan Lain-lain", "Pendapatan", "Pendapatan"),
+    ("501", "Beban Gaji", "Beban", "Beban"),
+    ("502", "Beban Listrik, Air & Telepon", "Beban", "Beban"),
+    ("503", "Beban Sewa", "Beban", "Beban"),
+    ("504", "Beban Perlengkapan", "Beban", "Beban"),
+    ("505", "Beban Penyusutan", "Beban", "Beban"),
+    ("506", "Beban Lain-lain", "Beban", "Beban"),
+]
+
+# Isi kolom Arus Kas bagan bawaan yang tidak sama dengan turunan pos laporannya
+_ARUS_KAS_DEFAULT = {"101": "Kas", "102": "Kas", "202": "Pendanaan"}
+
+# Cadangan untuk Ref yang belum ada di bagan: digit pertama Ref
+_POS_AWALAN_REF = {"1": "Aktiva Lancar", "2": "Kewajiban", "3": "Modal", "4": "Pendapatan", "5": "Beban", "6": "Beban"}
+
+# Cadangan terakhir (akun tanpa Ref): kata kunci nama akun, urutan = prioritas
+_KATA_KUNCI_POS = [
+    ("Pendapatan", "pendapatan|penjualan"),
+    ("Beban", "beban|biaya"),
+    ("Aktiva Lancar", "kas|perlengkapan|piutang"),
+    ("Aktiva Tetap", "peralatan|gedung|kendaraan"),
+    ("Modal", "modal|laba ditahan"),
+    ("Prive", "prive"),
+    ("Kewajiban", "hutang|utang"),
+]
+
+
+def bagan_akun_default():
+    """DataFrame bagan akun bawaan (kolom ``KOLOM_BAGAN``)."""
+    return pd.DataFrame(
+        [(ref, akun, tipe, SALDO_NORMAL[tipe], pos, _ARUS_KAS_DEFAULT.get(ref, ""))
+         for ref, akun, tipe, pos in BAGAN_AKUN_DEFAULT],
+        columns=KOLOM_BAGAN,
+    )
+
+
+def lengkapi_bagan(bagan):
+    """Tambah kolom bagan yang belum ada (bagan tersimpan dari versi lama); objek sama kalau lengkap."""
+    kurang = [c for c in KOLOM_BAGAN if c not in bagan]
+    if not kurang:
+        return bagan
+    bagan = bagan.copy()
+    bawaan = bagan_akun_default().set_index("Ref")
+    for col in kurang:
+        bagan[col] = bagan["Ref"].map(bawaan[col]).fillna("") if "Ref" in bagan else ""
+    return bagan
+
+
+def _teks(seri):
+    return seri.fillna("").astype(str).str.strip()
+
+
+def indeks_bagan(bagan):
+    """Lookup ``{"ref": {Ref: pos}, "nama": {nama akun huruf kecil: pos}}``.
+
+    Baris dengan pos laporan di luar ``POS_LAPORAN`` diabaikan.
+    """
+    if bagan is None or len(bagan) == 0:
+        return {"ref": {}, "nama": {}, "arus_ref": {}, "arus_nama": {}}
+    bagan = lengkapi_bagan(bagan)
+    ref = _teks(bagan["Ref"])
+    nama = _teks(bagan["Akun"]).str.lower()
+    pos = _teks(bagan["Pos Laporan"])
+    arus = _teks(bagan["Arus Kas"])
+    sah = pos.isin(POS_LAPORAN)
+    ada_ref = sah & (ref != "")
+    ada_nama = sah & (nama != "")
+    arus_sah = arus.isin(KATEGORI_ARUS_KAS)
+    return {
+        "ref": dict(zip(ref[ada_ref], pos[ada_ref])),
+        "nama": dict(zip(nama[ada_nama], pos[ada_nama])),
+        "arus_ref": dict(zip(ref[arus_sah & (ref != "")], arus[arus_sah & (ref != "")])),
+        "arus_nama": dict(zip(nama[arus_sah & (nama != "")], arus[arus_sah & (nama != "")])),
+    }
+
+
+def klasifikasi_akun(ref, akun, indeks):
+    """Pos laporan per baris (Series teks, "" kalau tidak dikenali).
+
+    Urutan: Ref di bagan, nama akun di bagan, kata kunci nama akun, lalu
+    digit pertama Ref.
+    """
+    ref = _teks(ref if isinstance(ref, pd.Series) else pd.Series(ref, dtype=object))
+    # Nama akun dipasangkan per posisi (index boleh beda, mis. index kunci saldo)
+    nama = _teks(pd.Series(np.asarray(akun, dtype=object), index=ref.index)).str.lower()
+    pos = ref.map(indeks["ref"]).astype(object)
+    kosong = pos.isna()
+    if kosong.any():
+        pos[kosong] = nama[kosong].map(indeks["nama"])
+        kosong = pos.isna()
+    for hasil, pola in _KATA_KUNCI_POS:
+        if not kosong.any():
+            break
+        cocok = kosong & nama.str.contains(pola, regex=True)
+        pos[cocok] = hasil
+        kosong &= ~cocok
+    if kosong.any():
+        pos[kosong] = ref[kosong].str[:1].map(_POS_AWALAN_REF)
+    return pos.fillna("")
+
+
+def kategori_arus_kas(ref, akun, indeks):
+    """Kelompok arus kas per baris: "Kas", "Operasi", "Investasi", "Pendanaan" atau "".
+
+    Urutan: kolom Arus Kas di bagan (per Ref, lalu nama), nama akun kas/bank,
+    lalu turunan dari pos laporan.
+    """
+    ref = _teks(ref if isinstance(ref, pd.Series) else pd.Series(ref, dtype=object))
+    nama = _teks(pd.Series(np.asarray(akun, dtype=object), index=ref.index)).str.lower()
+    arus = ref.map(indeks.get("arus_ref", {})).astype(object)
+    kosong = arus.isna()
+    if kosong.any():
+        arus[kosong] = nama[kosong].map(indeks.get("arus_nama", {}))
+        kosong = arus.isna()
+    if kosong.any():
+        kas = kosong & nama.str.contains(_POLA_AKUN_KAS, regex=True)
+        arus[kas] = "Kas"
+        kosong &= ~kas
+    if kosong.any():
+        arus[kosong] = klasifikasi_akun(ref[kosong], nama[kosong], indeks).map(_ARUS_PER_POS)
+    return arus.fillna("")
+
+
+def akun_nominal(ref, akun, indeks):
+    """Mask akun yang ditutup ke Laba Ditahan di akhir tahun (pos Pendapatan/Beban)."""
+    return klasifikasi_akun(ref, akun, indeks).isin(POS_NOMINAL).to_numpy()
+
+
+INDEKS_DEFAULT = indeks_bagan(bagan_akun_default())
@@ -0,0 +1,683 @@
+"""Benchmark jalur akuntansi dan ekspor dengan buku BUMDes sintetis, tanpa Streamlit.
+
+Contoh::
+
+    python benchmark_buku.py --keluaran hasil_benchmark.json
+    python benchmark_buku.py --voucher-per-bulan 100 1000 --tahun 3 --akun 40
+    python benchmark_buku.py --keluaran baru.json --bandingkan hasil_benchmark.json
+
+Jurnal dibangun dari pola voucher yang biasa di BUMDes (penjualan tunai/
+kredit, pelunasan piutang, beban, pembelian aset, utang, modal) dengan
+kolom asli (Tanggal, Keterangan, Ref, Akun, Debit (Rp), Kredit (Rp)) dan
+``_id``, ``--tahun`` tahun riwayat sampai bulan terakhir yang diukur.
+Tiap tahap dijalankan sekali di bawah tracemalloc (puncak memori) lalu
+``--ulang`` kali tanpa tracemalloc (waktu min/median). Hasil ditulis
+sebagai JSON dengan kunci stabil per ukuran buku dan per tahap, sehingga
+dua berkas hasil bisa dibandingkan dengan ``--bandingkan``.
+
+Skenario tetap (``--skenario``) mengukur hal yang tidak mengikuti ukuran
+buku di atas, mis. ``buku_bersama``: beberapa sesi (thread) menulis jurnal
+yang sama lewat satu penyimpanan bersama; dilaporkan simpan/detik, jumlah
+baris konflik, dan tulisan yang hilang (harus 0); ``buku_besar_iterrows``:
+buat_buku_besar dibanding loop iterrows versi awal aplikasi pada 1k, 10k,
+dan 100k baris jurnal; ``pdf_buku_besar_besar``: PDF buku besar 10k dan 100k
+transaksi lewat renderer reportlab per halaman (FPDF 10k sebagai pembanding);
+``memori_jurnal_sesi``: memori yang dipegang satu sesi untuk jurnal 50k baris,
+kolom teks/float tanpa skema plus salinan vs ketik_tabel dengan referensi.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from penyimpanan import PenyimpananSQLite
+from skema_buku import ketik_tabel, tampilan_tabel
+from bagan_akun import bagan_akun_default, indeks_bagan
+from akuntansi import (
+    buat_buku_besar, buat_indeks_periode, diff_tabel, filter_periode, format_rupiah_kolom, gabung_tarikan,
+    ikuti_urutan, jurnal_cetak, laporan_periode, neraca_dari_buku_besar, neraca_saldo_cetak,
+    perbarui_buku_besar, perbarui_snapshot,
+)
+from paket_buku import buat_paket_buku
+from laporan_pdf import (
+    _pdf_buku_besar_fpdf, pdf_arus_kas, pdf_buku_besar, pdf_buku_besar_stream, pdf_jurnal,
+    pdf_laba_rugi, pdf_neraca, pdf_neraca_saldo, zip_buku_besar_per_akun,
+)
+
+FORMAT_HASIL = "benchmark-bumdes/1"
+# Tahap yang lebih cepat dari ini tidak dinilai regresi (derau pengukuran)
+AMBANG_DERAU_DETIK = 0.005
+
+# (keterangan, Ref debit, Ref kredit, bobot, rentang nilai dalam ribuan rupiah)
+POLA_VOUCHER = [
+    ("Penjualan tunai", ["101", "102"], ["401", "402"], 30, (50, 2_000)),
+    ("Penjualan kredit", ["103"], ["401", "402"], 10, (200, 5_000)),
+    ("Pelunasan piutang", ["101", "102"], ["103"], 8, (200, 5_000)),
+    ("Pendapatan lain-lain", ["101"], ["403"], 3, (10, 500)),
+    ("Bayar beban", ["501", "502", "503", "504", "506"], ["101", "102"], 25, (20, 3_000)),
+    ("Beli perlengkapan", ["104", "105"], ["101", "201"], 8, (100, 4_000)),
+    ("Beli aset tetap", ["121", "123"], ["102", "201"], 2, (2_000, 50_000)),
+    ("Bayar utang usaha", ["201"], ["101", "102"], 6, (100, 4_000)),
+    ("Penyusutan", ["505"], ["122"], 2, (100, 2_000)),
+    ("Bayar gaji terutang", ["203"], ["101"], 2, (500, 5_000)),
+    ("Pinjaman bank", ["102"], ["202"], 1, (10_000, 100_000)),
+    ("Setoran modal", ["101", "102"], ["301"], 1, (5_000, 50_000)),
+    ("Prive", ["302"], ["101"], 1, (100, 2_000)),
+]
+# Sebagian voucher memecah sisi debit ke dua akun (voucher majemuk, tiga baris)
+PELUANG_VOUCHER_MAJEMUK = 0.2
+
+
+# === Buku sintetis ===
+def bagan_sintetis(n_akun):
+    """Bagan akun bawaan, ditambah sub-akun (Ref ``101.1``, ...) sampai ``n_akun`` baris."""
+    bagan = bagan_akun_default()
+    if n_akun <= len(bagan):
+        return bagan.head(max(n_akun, 1)).reset_index(drop=True)
+    tambahan = []
+    for k in range(n_akun - len(bagan)):
+        induk = bagan.iloc[k % len(bagan)]
+        nomor = k // len(bagan) + 1
+        tambahan.append({**induk.to_dict(), "Ref": f"{induk['Ref']}.{nomor}", "Akun": f"{induk['Akun']} {nomor}"})
+    return pd.concat([bagan, pd.DataFrame(tambahan)], ignore_index=True)
+
+
+def jurnal_sintetis(voucher_per_bulan, tahun=2, n_akun=26, tahun_akhir=2025, seed=0):
+    """(jurnal, bagan) sintetis: ``tahun`` tahun riwayat yang berakhir Desember ``tahun_akhir``.
+
+    Tiap voucher seimbang (debit = kredit); Ref yang tidak ada di bagan
+    (bagan dipotong di bawah 26 akun) jatuh ke akun bagan yang ada.
+    """
+    rng = np.random.default_rng(seed)
+    bagan = bagan_sintetis(n_akun)
+    nama = dict(zip(bagan["Ref"], bagan["Akun"]))
+    # Ref induk -> semua sub-akunnya di bagan (induk sendiri termasuk)
+    keluarga = {}
+    for ref in bagan["Ref"]:
+        keluarga.setdefault(ref.split(".")[0], []).append(ref)
+    cadangan = list(nama)
+
+    def pilih(refs):
+        calon = [r for induk in refs for r in keluarga.get(induk, [])]
+        return calon[rng.integers(len(calon))] if calon else cadangan[rng.integers(len(cadangan))]
+
+    bobot = np.array([p[3] for p in POLA_VOUCHER], dtype=float)
+    bobot /= bobot.sum()
+    bulan_semua = pd.period_range(f"{tahun_akhir - tahun + 1}-01", f"{tahun_akhir}-12", freq="M")
+    baris = []
+    nomor = 0
+    for bulan in bulan_semua:
+        hari = np.sort(rng.integers(1, bulan.days_in_month + 1, voucher_per_bulan))
+        for pola, h in zip(rng.choice(len(POLA_VOUCHER), voucher_per_bulan, p=bobot), hari):
+            keterangan, ref_debit, ref_kredit, _, (rendah, tinggi) = POLA_VOUCHER[pola]
+            nomor += 1
+            tanggal = f"{bulan.year}-{bulan.month:02d}-{h:02d}"
+            teks = f"{keterangan} #{nomor}"
+            nilai = int(rng.integers(rendah, tinggi + 1)) * 1000
+            if rng.random() < PELUANG_VOUCHER_MAJEMUK and nilai >= 2000:
+                pecah = int(rng.integers(1, nilai // 1000)) * 1000
+                debit = [(pilih(ref_debit), pecah), (pilih(ref_debit), nilai - pecah)]
+            else:
+                debit = [(pilih(ref_debit), nilai)]
+            for ref, jumlah in debit:
+                baris.append((tanggal, teks, ref, nama[ref], jumlah, 0))
+            ref = pilih(ref_kredit)
+            baris.append((tanggal, teks, ref, nama[ref], 0, nilai))
+    jurnal = pd.DataFrame(baris, columns=["Tanggal", "Keterangan", "Ref", "Akun", "Debit (Rp)", "Kredit (Rp)"])
+    jurnal["_id"] = [f"{x:016x}" for x in rng.integers(0, 2**63, len(jurnal), dtype=np.int64)]
+    return ketik_tabel(jurnal), bagan
+
+
+# === Pengukuran ===
+def ukur(fungsi, siapkan=None, ulang=3):
+    """Puncak memori (satu jalan, tracemalloc) dan waktu min/median ``ulang`` jalan.
+
+    ``siapkan()`` (tidak diukur) mengembalikan argumen ``fungsi`` untuk
+    tahap yang mengubah masukannya di tempat.
+    """
+    siapkan = siapkan or tuple
+    args = siapkan()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fungsi(*args)
+        _, puncak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    waktu = []
+    for _ in range(ulang):
+        args = siapkan()
+        gc.collect()
+        mulai = time.perf_counter()
+        fungsi(*args)
+        waktu.append(time.perf_counter() - mulai)
+    return {
+        "detik_min": round(min(waktu), 5),
+        "detik_median": round(statistics.median(waktu), 5),
+        "puncak_mb": round(puncak / 2**20, 2),
+    }
+
+
+def _jurnal_satu_edit(jurnal):
+    # Satu sel nominal diubah di tengah jurnal (jalur edit grid)
+    hasil = jurnal.copy()
+    posisi = len(hasil) // 2
+    kolom = "Debit (Rp)" if hasil.at[posisi, "Debit (Rp)"] else "Kredit (Rp)"
+    hasil.at[posisi, kolom] = hasil.at[posisi, kolom] + 1000
+    return hasil
+
+
+def _simpan_baru(folder, jurnal):
+    # Basis data baru tiap jalan supaya simpan_jurnal selalu menulis penuh
+    path = os.path.join(folder, f"bench_{time.perf_counter_ns()}.db")
+    penyimpanan = PenyimpananSQLite(path)
+    try:
+        penyimpanan.simpan_jurnal(jurnal)
+    finally:
+        penyimpanan.tutup()
+    return path
+
+
+def _muat(path):
+    penyimpanan = PenyimpananSQLite(path)
+    try:
+        return penyimpanan.muat_jurnal()
+    finally:
+        penyimpanan.tutup()
+
+
+def tahap_benchmark(jurnal, bagan, tahun, bulan, folder):
+    """``{nama tahap: (fungsi, siapkan)}`` untuk satu buku; bulan terakhir = periode laporan."""
+    bulan_teks = f"{bulan:02d}"
+    indeks_akun = indeks_bagan(bagan)
+    indeks_periode = buat_indeks_periode(jurnal)
+    snapshot, _ = perbarui_snapshot(jurnal, indeks_periode, indeks_akun=indeks_akun)
+    laporan = laporan_periode(jurnal, tahun, bulan_teks, indeks_akun, snapshot["snapshot"])
+    jurnal_edit = _jurnal_satu_edit(jurnal)
+    jurnal_final = jurnal_cetak(laporan["jurnal"])
+    neraca_final = neraca_saldo_cetak(laporan["neraca_saldo"])
+    path_muat = _simpan_baru(folder, jurnal)
+    return {
+        # Buku besar dan neraca saldo
+        "buku_besar_penuh": (lambda: buat_buku_besar(jurnal), None),
+        "buku_besar_indeks": (lambda: perbarui_buku_besar(jurnal), None),
+        "buku_besar_satu_edit": (
+            lambda bb, ix: perbarui_buku_besar(jurnal_edit, bb, ix), lambda: perbarui_buku_besar(jurnal),
+        ),
+        "neraca_saldo": (lambda: neraca_dari_buku_besar(laporan["buku_besar"]), None),
+        "snapshot_bulanan": (lambda: perbarui_snapshot(jurnal, indeks_periode, indeks_akun=indeks_akun), None),
+        # Laporan keuangan satu periode (buku besar, neraca saldo, laba/rugi, neraca, arus kas)
+        "laporan_periode": (
+            lambda: laporan_periode(jurnal, tahun, bulan_teks, indeks_akun, snapshot["snapshot"]), None,
+        ),
+        "format_rupiah": (
+            lambda: (format_rupiah_kolom(jurnal["Debit (Rp)"]), format_rupiah_kolom(jurnal["Kredit (Rp)"])), None,
+        ),
+        # Ekspor
+        "pdf_jurnal": (lambda: pdf_jurnal(jurnal_final, bulan_teks, tahun), None),
+        "pdf_buku_besar": (lambda: pdf_buku_besar(laporan["buku_besar"]), None),
+        "zip_buku_besar_per_akun": (lambda: zip_buku_besar_per_akun(laporan["buku_besar"]), None),
+        "pdf_neraca_saldo": (lambda: pdf_neraca_saldo(neraca_final, bulan_teks, tahun), None),
+        "pdf_laba_rugi": (lambda: pdf_laba_rugi(laporan["labarugi"], bulan_teks, tahun), None),
+        "pdf_neraca": (lambda: pdf_neraca(laporan["neraca_lap"], bulan_teks, tahun), None),
+        "pdf_arus_kas": (lambda: pdf_arus_kas(laporan["arus_kas"], bulan_teks, tahun), None),
+        "paket_buku": (lambda: buat_paket_buku(jurnal, {"neraca_saldo": laporan["neraca_saldo"]}, {}), None),
+        # Penyimpanan SQLite
+        "simpan_jurnal": (lambda: _simpan_baru(folder, jurnal), None),
+        "muat_jurnal": (lambda: _muat(path_muat), None),
+    }
+
+
+# === Skenario buku besar: loop iterrows lama vs buat_buku_besar ===
+def buku_besar_iterrows(df):
+    """buat_buku_besar versi awal (satu iterasi Python per baris jurnal), sebagai pembanding."""
+    df = df.copy()
+    for col in ["Debit (Rp)", "Kredit (Rp)"]:
+        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0.0)
+
+    buku_besar = {}
+    for _, row in df.iterrows():
+        ref = str(row.get("Ref", "")).strip()
+        nama_akun_jurnal = str(row.get("Akun", "")).strip()
+        key = ref if ref else (nama_akun_jurnal if nama_akun_jurnal else f"Akun Tanpa Ref {_}")
+        if key not in buku_besar:
+            buku_besar[key] = {
+                "nama_akun": nama_akun_jurnal if nama_akun_jurnal else "Tidak Ada Nama Akun",
+                "debit": 0.0,
+                "kredit": 0.0,
+                "transaksi": [],
+            }
+        debit_val = float(row.get("Debit (Rp)", 0) or 0)
+        kredit_val = float(row.get("Kredit (Rp)", 0) or 0)
+        tanggal = "" if pd.isna(row.get("Tanggal", "")) else str(row.get("Tanggal", ""))
+        keterangan = str(row.get("Keterangan", "")).strip()
+        if debit_val > 0:
+            buku_besar[key]["transaksi"].append(
+                {"tanggal": tanggal, "keterangan": keterangan, "debit": debit_val, "kredit": 0.0}
+            )
+            buku_besar[key]["debit"] += debit_val
+        if kredit_val > 0:
+            buku_besar[key]["transaksi"].append(
+                {"tanggal": tanggal, "keterangan": keterangan, "debit": 0.0, "kredit": kredit_val}
+            )
+            buku_besar[key]["kredit"] += kredit_val
+    return buku_besar
+
+
+def _total_per_akun(bb):
+    return {k: (round(v["debit"]), round(v["kredit"]), len(v["transaksi"])) for k, v in bb.items()}
+
+
+def skenario_buku_besar_iterrows(folder, ulang, ukuran=(1_000, 10_000, 100_000), cetak=print):
+    """Waktu dan puncak memori buku besar dari jurnal ``ukuran`` baris, loop lama vs vektor."""
+    terbesar = jurnal_sintetis(max(ukuran) // 48 + 1, 2)[0]
+    hasil = {}
+    for n in ukuran:
+        jurnal = terbesar.head(n).reset_index(drop=True)
+        # Pembanding hanya sah kalau hasilnya sama (total dan jumlah transaksi per akun)
+        if _total_per_akun(buku_besar_iterrows(jurnal)) != _total_per_akun(buat_buku_besar(jurnal)):
+            raise AssertionError(f"buku besar iterrows dan vektor berbeda untuk {n} baris")
+        lama = hasil[f"{n}_iterrows"] = ukur(lambda: buku_besar_iterrows(jurnal), ulang=ulang)
+        baru = hasil[f"{n}_vektor"] = ukur(lambda: buat_buku_besar(jurnal), ulang=ulang)
+        cetak(
+            f"  {n:>7} baris  iterrows {lama['detik_median'] * 1000:>9.1f} ms {lama['puncak_mb']:>7.1f} MB  "
+            f"vektor {baru['detik_median'] * 1000:>8.1f} ms {baru['puncak_mb']:>7.1f} MB  "
+            f"({lama['detik_median'] / max(baru['detik_median'], 1e-9):.0f}x)"
+        )
+    return hasil
+
+
+# === Skenario PDF buku besar besar (renderer reportlab per halaman) ===
+def skenario_pdf_buku_besar_besar(folder, ulang, ukuran=(10_000, 100_000), cetak=print):
+    """Waktu, puncak memori, dan ukuran PDF buku besar ``ukuran`` transaksi."""
+    terbesar = jurnal_sintetis(max(ukuran) // 48 + 1, 2)[0]
+    hasil = {}
+    for n in ukuran:
+        buku_besar = buat_buku_besar(terbesar.head(n))
+        jalur = [("stream", pdf_buku_besar_stream)]
+        if n <= 10_000:
+            # FPDF menahan semua halaman mentah; di 100k hanya menghabiskan waktu
+            jalur.append(("fpdf", _pdf_buku_besar_fpdf))
+        for nama, fungsi in jalur:
+            ukuran_pdf = len(fungsi(buku_besar))
+            catatan = hasil[f"{n}_{nama}"] = ukur(lambda: fungsi(buku_besar), ulang=ulang)
+            catatan["pdf_kb"] = ukuran_pdf // 1024
+            cetak(
+                f"  {n:>7} transaksi  {nama:<6} {catatan['detik_median']:>7.2f} s "
+                f"{catatan['puncak_mb']:>7.1f} MB  PDF {catatan['pdf_kb']:>6} KB"
+            )
+    return hasil
+
+
+# === Skenario memori jurnal per sesi: tanpa skema + salinan vs ketik_tabel ===
+def _tertahan(fungsi, *args):
+    """(hasil, MB yang masih teralokasi selama hasil dipegang).
+
+    Heap Python dari tracemalloc ditambah buffer Arrow (kolom ``str`` pandas)
+    yang dialokasikan di luar heap Python dan tidak terlihat oleh tracemalloc.
+    """
+    gc.collect()
+    arrow_awal = pa.total_allocated_bytes()
+    tracemalloc.start()
+    try:
+        hasil = fungsi(*args)
+        gc.collect()
+        sekarang, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return hasil, round((sekarang + pa.total_allocated_bytes() - arrow_awal) / 2**20, 2)
+
+
+def _sesi_tanpa_skema(path):
+    """Jalur sesi sebelum skema bertipe: kolom object/float, tersimpan dan indeks buku besar disalin."""
+    data = _muat(path).astype({k: object for k in ["Tanggal", "Keterangan", "Ref", "Akun", "_id"]})
+    data = data.astype({"Debit (Rp)": float, "Kredit (Rp)": float})
+    tersimpan, indeks = data.copy(), data.copy()
+    # Satu edit grid: jendela dikirim sebagai salinan, jurnal baru disalin lagi ke tersimpan dan indeks
+    jendela = data.iloc[:100].copy()
+    data = data.copy()
+    data.iat[5, data.columns.get_loc("Debit (Rp)")] = 12345.0
+    tersimpan, indeks = data.copy(), data.copy()
+    return data, tersimpan, indeks, jendela
+
+
+def _sesi_bertipe(path):
+    """Jalur sesi sekarang: ketik_tabel sekali, tersimpan dan indeks merujuk objek jurnal yang sama."""
+    data = ketik_tabel(_muat(path))
+    tersimpan = indeks = data
+    jendela = tampilan_tabel(data.iloc[:100])
+    data = data.copy()
+    data.iat[5, data.columns.get_loc("Debit (Rp)")] = 12345
+    tersimpan = indeks = data
+    return data, tersimpan, indeks, jendela
+
+
+def skenario_memori_jurnal_sesi(folder, ulang, baris=50_000, cetak=print):
+    """Memori yang tertahan di sesi dan puncak tracemalloc: muat jurnal ``baris`` baris lalu satu edit."""
+    jurnal = jurnal_sintetis(baris // 48 + 1, 2)[0].head(baris)
+    path = _simpan_baru(folder, jurnal)
+    hasil = {}
+    for nama, fungsi in (("tanpa_skema", _sesi_tanpa_skema), ("ketik_tabel", _sesi_bertipe)):
+        catatan = hasil[nama] = ukur(lambda: fungsi(path), ulang=ulang)
+        _, catatan["tertahan_mb"] = _tertahan(fungsi, path)
+        cetak(
+            f"  {baris:>7} baris  {nama:<12} tertahan {catatan['tertahan_mb']:>6.1f} MB  "
+            f"puncak {catatan['puncak_mb']:>6.1f} MB  {catatan['detik_median'] * 1000:>7.1f} ms"
+        )
+    return hasil
+
+
+# === Skenario buku bersama: banyak sesi menulis jurnal yang sama ===
+def _tarik(penyimpanan, sejak):
+    # Kolom teks sebagai object supaya diff/gabung di sesi tiruan tidak didominasi konversi Arrow
+    revisi, berubah, hapus, urutan = penyimpanan.tarik_jurnal(sejak)
+    berubah = berubah.astype({k: object for k in ["Tanggal", "Keterangan", "Ref", "Akun", "_id"]})
+    return revisi, berubah, hapus, urutan
+
+
+def _sesi_bersama(penyimpanan, nomor, n_tulis, mulai, catatan):
+    """Satu sesi: tarik, edit acak (ubah/tambah/hapus/geser), simpan; tulisan diterima dicatat.
+
+    Tiap baris yang ditulis dicatat sebagai ``(jenis, id, versi dasar, versi baru, isi)``;
+    versi dasar = versi baris yang dilihat sesi saat mengedit, jenis ``konflik`` = ditolak.
+    """
+    rng = np.random.default_rng(nomor)
+    revisi, data, _, _ = _tarik(penyimpanan, 0)
+    versi = dict(zip(data["_id"], data.pop("_versi").tolist()))
+    mulai.wait()
+    for k in range(n_tulis):
+        # Sinkron di awal tiap run (sinkron_buku_bersama)
+        if penyimpanan.revisi_jurnal() != revisi:
+            revisi, berubah, hapus, urutan = _tarik(penyimpanan, revisi)
+            lain = [versi.get(i) != v for i, v in zip(berubah["_id"], berubah["_versi"])]
+            berubah = berubah[np.array(lain, dtype=bool)]
+            hapus = [i for i in hapus if i in versi]
+            data = gabung_tarikan(data, berubah.drop(columns="_versi"), hapus)
+            if urutan is not None:
+                data = ikuti_urutan(data, urutan)
+            versi.update(zip(berubah["_id"], berubah["_versi"].tolist()))
+            for i in hapus:
+                versi.pop(i, None)
+        baru = data.copy()
+        pilih = rng.random()
+        isi = f"sesi {nomor} tulisan {k}"
+        if pilih < 0.7 or len(baru) < 2:
+            posisi = int(rng.integers(len(baru)))
+            baru.iat[posisi, baru.columns.get_loc("Keterangan")] = isi
+        elif pilih < 0.85:
+            tambah = baru.iloc[[0]].assign(Keterangan=isi, _id=f"{nomor:04x}{k:012x}")
+            baru = pd.concat([baru, tambah], ignore_index=True)
+        elif pilih < 0.95:
+            baru = baru.drop(index=int(rng.integers(len(baru)))).reset_index(drop=True)
+        else:
+            a, b = rng.choice(len(baru), 2, replace=False)
+            urut = np.arange(len(baru))
+            urut[[a, b]] = urut[[b, a]]
+            baru = baru.iloc[urut].reset_index(drop=True)
+        perubahan = diff_tabel(data, baru)
+        dasar = {i: versi.get(i) for i in perubahan["ubah"] + perubahan["hapus"]}
+        hasil = penyimpanan.simpan_jurnal_bersama(baru, perubahan, versi)
+        konflik = set(hasil["konflik"])
+        catatan.extend(("konflik", i, dasar.get(i), None, None) for i in konflik)
+        for i in perubahan["ubah"] + perubahan["tambah"]:
+            if i in hasil["versi"]:
+                catatan.append(("ubah", i, dasar.get(i), hasil["versi"][i], isi))
+        for i in set(perubahan["hapus"]) - konflik:
+            if versi.pop(i, None) is not None:
+                catatan.append(("hapus", i, dasar[i], None, None))
+        versi.update(hasil["versi"])
+        data = baru
+
+
+def periksa_buku_bersama(penyimpanan, catatan):
+    """Jumlah tulisan hilang: tulisan diterima yang dasar versinya bukan tulisan diterima sebelumnya.
+
+    Tiap baris harus membentuk rantai versi tanpa celah (versi awal -> tulisan
+    diterima berikutnya -> ...), dan isi tersimpan sama dengan tulisan terakhir.
+    """
+    _, akhir, _, _ = penyimpanan.tarik_jurnal(0)
+    tersimpan = dict(zip(akhir["_id"], zip(akhir["_versi"], akhir["Keterangan"])))
+    per_baris = {}
+    for jenis, i, dasar, versi, isi in catatan:
+        if jenis == "konflik":
+            continue
+        per_baris.setdefault(i, []).append((jenis, dasar, versi, isi))
+    hilang = 0
+    for i, tulisan in per_baris.items():
+        ubah = sorted((t for t in tulisan if t[0] == "ubah"), key=lambda t: t[2])
+        # Tiap tulisan harus berdasar pada tulisan diterima tepat sebelumnya
+        for sebelum, sesudah in zip(ubah, ubah[1:]):
+            if sesudah[1] != sebelum[2]:
+                hilang += 1
+        dihapus = [t for t in tulisan if t[0] == "hapus"]
+        if dihapus:
+            hilang += i in tersimpan or (bool(ubah) and dihapus[0][1] != ubah[-1][2])
+        elif ubah and tersimpan.get(i) != (ubah[-1][2], ubah[-1][3]):
+            hilang += 1
+    return hilang
+
+
+def simulasi_buku_bersama(path, n_sesi=8, n_tulis=50):
+    """Jalankan ``n_sesi`` sesi serentak pada satu penyimpanan bersama (seperti st.cache_resource)."""
+    penyimpanan = PenyimpananSQLite(path)
+    penyimpanan.bersama = True
+    try:
+        catatan = []
+        mulai = threading.Barrier(n_sesi + 1)
+        sesi = [
+            threading.Thread(target=_sesi_bersama, args=(penyimpanan, nomor, n_tulis, mulai, catatan))
+            for nomor in range(n_sesi)
+        ]
+        for t in sesi:
+            t.start()
+        mulai.wait()
+        detik = time.perf_counter()
+        for t in sesi:
+            t.join()
+        detik = time.perf_counter() - detik
+        return {
+            "sesi": n_sesi,
+            "simpan": n_sesi * n_tulis,
+            "konflik": sum(c[0] == "konflik" for c in catatan),
+            "simpan_per_detik": round(n_sesi * n_tulis / detik, 1),
+            "hilang": periksa_buku_bersama(penyimpanan, catatan),
+        }
+    finally:
+        penyimpanan.tutup()
+
+
+def skenario_buku_bersama(folder, ulang, baris=2000, n_tulis=30, cetak=print):
+    """Throughput dan tulisan hilang untuk 1, 4, dan 8 sesi serentak atas jurnal ``baris`` baris."""
+    jurnal = jurnal_sintetis(max(baris // 50, 1), 2)[0].head(baris)
+    hasil = {}
+    for n_sesi in (1, 4, 8):
+        statistik = {}
+        ukuran = ukur(
+            lambda path: statistik.update(simulasi_buku_bersama(path, n_sesi, n_tulis)),
+            lambda: (_simpan_baru(folder, jurnal),), ulang,
+        )
+        hasil[f"{n_sesi}_sesi"] = {**ukuran, **statistik}
+        cetak(
+            f"  {n_sesi:>2} sesi  {statistik['simpan_per_detik']:>8.1f} simpan/detik  "
+            f"{statistik['konflik']:>4} konflik  {statistik['hilang']} hilang"
+        )
+    return hasil
+
+
+SKENARIO = {
+    "buku_besar_iterrows": skenario_buku_besar_iterrows,
+    "memori_jurnal_sesi": skenario_memori_jurnal_sesi,
+    "pdf_buku_besar_besar": skenario_pdf_buku_besar_besar,
+    "buku_bersama": skenario_buku_bersama,
+}
+
+
+def jalankan_skenario(nama, ulang, cetak=print):
+    with tempfile.TemporaryDirectory() as folder:
+        return SKENARIO[nama](folder, ulang, cetak=cetak)
+
+
+def jalankan(voucher_per_bulan, tahun, n_akun, ulang, pilihan=None, seed=0, cetak=print):
+    """Hasil benchmark satu ukuran buku (dict siap JSON)."""
+    tahun_akhir = 2025
+    jurnal, bagan = jurnal_sintetis(voucher_per_bulan, tahun, n_akun, tahun_akhir, seed)
+    with tempfile.TemporaryDirectory() as folder:
+        semua = tahap_benchmark(jurnal, bagan, tahun_akhir, 12, folder)
+        tahap = {}
+        for nama, (fungsi, siapkan) in semua.items():
+            if pilihan and nama not in pilihan:
+                continue
+            tahap[nama] = ukur(fungsi, siapkan, ulang)
+            cetak(
+                f"  {nama:<24} {tahap[nama]['detik_median'] * 1000:>10.1f} ms "
+                f"{tahap[nama]['puncak_mb']:>8.1f} MB"
+            )
+    baris_periode = len(filter_periode(jurnal, tahun_akhir, "12", buat_indeks_periode(jurnal)))
+    return {
+        "voucher_per_bulan": voucher_per_bulan,
+        "tahun": tahun,
+        "akun": n_akun,
+        "baris_jurnal": len(jurnal),
+        "baris_periode": baris_periode,
+        "tahap": tahap,
+    }
+
+
+def _lingkungan():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu": os.cpu_count(),
+    }
+
+
+# === Perbandingan dua berkas hasil ===
+def _kunci_ukuran(hasil):
+    return hasil["voucher_per_bulan"], hasil["tahun"], hasil["akun"]
+
+
+def bandingkan(lama, baru, batas=1.25):
+    """Baris perbandingan median waktu dan puncak memori per ukuran/tahap yang ada di kedua hasil.
+
+    ``regresi`` True kalau waktu (di atas ambang derau) atau memori naik lebih dari ``batas`` kali.
+    """
+    lama_per_ukuran = {_kunci_ukuran(h): h["tahap"] for h in lama["hasil"]}
+    lama_per_ukuran.update((("skenario", nama), t) for nama, t in lama.get("skenario", {}).items())
+    semua = [(_kunci_ukuran(h), h["tahap"]) for h in baru["hasil"]]
+    semua += [(("skenario", nama), t) for nama, t in baru.get("skenario", {}).items()]
+    baris = []
+    for ukuran, tahap_baru in semua:
+        tahap_lama = lama_per_ukuran.get(ukuran)
+        if tahap_lama is None:
+            continue
+        for nama, b in tahap_baru.items():
+            a = tahap_lama.get(nama)
+            if a is None:
+                continue
+            rasio_waktu = b["detik_median"] / a["detik_median"] if a["detik_median"] else None
+            rasio_memori = b["puncak_mb"] / a["puncak_mb"] if a["puncak_mb"] else None
+            regresi = (
+                rasio_waktu is not None and rasio_waktu > batas
+                and max(a["detik_median"], b["detik_median"]) >= AMBANG_DERAU_DETIK
+            ) or (rasio_memori is not None and rasio_memori > batas and b["puncak_mb"] >= 1)
+            baris.append({
+                "ukuran": ukuran, "tahap": nama,
+                "ms_lama": a["detik_median"] * 1000, "ms_baru": b["detik_median"] * 1000,
+                "rasio_waktu": rasio_waktu, "mb_lama": a["puncak_mb"], "mb_baru": b["puncak_mb"],
+                "rasio_memori": rasio_memori, "regresi": regresi,
+            })
+    return baris
+
+
+def _cetak_perbandingan(baris):
+    for b in baris:
+        rasio_waktu = f"{b['rasio_waktu']:.2f}x" if b["rasio_waktu"] is not None else "-"
+        rasio_memori = f"{b['rasio_memori']:.2f}x" if b["rasio_memori"] is not None else "-"
+        if b["ukuran"][0] == "skenario":
+            ukuran = f"{b['ukuran'][1]:<24}"
+        else:
+            vpb, tahun, akun = b["ukuran"]
+            ukuran = f"{vpb:>6} v/bln {tahun} th {akun:>3} akun"
+        print(
+            f"{ukuran}  {b['tahap']:<24} "
+            f"{b['ms_lama']:>9.1f} -> {b['ms_baru']:>9.1f} ms ({rasio_waktu:>6})  "
+            f"{b['mb_lama']:>7.1f} -> {b['mb_baru']:>7.1f} MB ({rasio_memori:>6})"
+            + ("  REGRESI" if b["regresi"] else "")
+        )
+
+
+def _argumen(argv):
+    parser = argparse.ArgumentParser(description="Benchmark buku BUMDes sintetis (waktu dan puncak memori).")
+    parser.add_argument("--voucher-per-bulan", type=int, nargs="+", default=[50, 500, 2000],
+                        help="ukuran buku yang diukur (default: 50 500 2000)")
+    parser.add_argument("--tahun", type=int, default=2, help="tahun riwayat jurnal (default: 2)")
+    parser.add_argument("--akun", type=int, default=26, help="jumlah akun di bagan (default: 26, bagan bawaan)")
+    parser.add_argument("--ulang", type=int, default=3, help="jalan berwaktu per tahap (default: 3)")
+    parser.add_argument("--tahap", nargs="+", help="hanya tahap ini (default: semua)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skenario", nargs="+", choices=sorted(SKENARIO),
+                        help="skenario tetap yang ikut diukur (default: tidak ada)")
+    parser.add_argument("--keluaran", help="tulis hasil JSON ke berkas ini")
+    parser.add_argument("--bandingkan", help="hasil JSON lama sebagai pembanding")
+    parser.add_argument("--batas", type=float, default=1.25,
+                        help="rasio baru/lama yang dianggap regresi (default: 1.25)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _argumen(argv)
+    hasil = {
+        "format": FORMAT_HASIL,
+        "dibuat": datetime.now().isoformat(timespec="seconds"),
+        "lingkungan": _lingkungan(),
+        "parameter": {"tahun": args.tahun, "akun": args.akun, "ulang": args.ulang, "seed": args.seed},
+        "hasil": [],
+    }
+    for voucher_per_bulan in args.voucher_per_bulan:
+        print(f"{voucher_per_bulan} voucher/bulan, {args.tahun} tahun, {args.akun} akun:")
+        hasil["hasil"].append(jalankan(voucher_per_bulan, args.tahun, args.akun, args.ulang, args.tahap, args.seed))
+    for nama in args.skenario or []:
+        print(f"Skenario {nama}:")
+        hasil.setdefault("skenario", {})[nama] = jalankan_skenario(nama, args.ulang)
+    if args.keluaran:
+        with open(args.keluaran, "w", encoding="utf-8") as f:
+            json.dump(hasil, f, ensure_ascii=False, indent=1)
+        print(f"Hasil -> {args.keluaran}")
+    if args.bandingkan:
+        with open(args.bandingkan, encoding="utf-8") as f:
+            lama = json.load(f)
+        if lama.get("format") != FORMAT_HASIL:
+            print(f"Format {args.bandingkan} bukan {FORMAT_HASIL}", file=sys.stderr)
+            return 2
+        baris = bandingkan(lama, hasil, args.batas)
+        _cetak_perbandingan(baris)
+        if any(b["regresi"] for b in baris):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
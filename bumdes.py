@@ -1,19 +1,148 @@
 import streamlit as st
+import copy
+import os
+import re
+import zipfile
 import pandas as pd
-from fpdf import FPDF
-import tempfile
+import numpy as np
 from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode
+from penyimpanan import KOLOM_JURNAL, UNIT_DEFAULT, buka_penyimpanan
+from skema_buku import ketik_tabel, tampilan_tabel
+from bagan_akun import POS_LAPORAN, bagan_akun_default, indeks_bagan, lengkapi_bagan
+from akuntansi import (
+    arus_kas_dari_jurnal, baris_tebal, baris_terisi, buat_buku_besar, buat_indeks_periode, delta_grid,
+    diff_tabel, filter_periode, format_rupiah, gabung_saldo_awal, gabung_tarikan, hash_konten, html_tabel,
+    ikuti_urutan, jurnal_cetak, kolom_teks, nama_akun_buku_besar, neraca_dari_buku_besar, neraca_saldo_cetak,
+    perbarui_buku_besar, perbarui_snapshot, pisah_neraca_saldo, saldo_awal_periode, signature_buku_besar,
+    susun_arus_kas, susun_laba_rugi, susun_neraca_lap, tabel_bernomor, teks_rupiah_tabel, terapkan_perubahan,
+)
+from cache_turunan import CacheBersama, CacheTurunan
+from profil_rerun import ProfilRerun, tulis_metrik
+from impor_buku import KOLOM_BUKTI, baca_potongan_impor, impor_jurnal, tebak_pemetaan
+from paket_buku import TABEL_PAKET, baca_paket_buku, buat_paket_buku
+from laporan_pdf import (
+    pdf_arus_kas, pdf_buku_besar, pdf_jurnal, pdf_laba_rugi, pdf_neraca, pdf_neraca_saldo,
+    zip_buku_besar_per_akun,
+)
 
 # === Konfigurasi dasar ===
 st.set_page_config(page_title="Administrasi BUMDes", layout="wide")
 st.title("📘 Sistem Akuntansi BUMDes")
 
+# === Profil rerun: waktu per tahap (panel debug: BUMDES_DEBUG=1 atau ?debug=1; berkas JSONL: BUMDES_METRIK) ===
+profil = ProfilRerun()
+MODE_DEBUG = os.environ.get("BUMDES_DEBUG", "0") == "1" or st.query_params.get("debug") == "1"
+BERKAS_METRIK = os.environ.get("BUMDES_METRIK")
+
+# === Penyimpanan permanen (dibagi semua sesi) ===
+@st.cache_resource
+def get_penyimpanan():
+    return buka_penyimpanan()
+
+penyimpanan_pusat = get_penyimpanan()
+
+# === Unit BUMDes (satu proses melayani banyak unit, buku dipilah per unit) ===
+def _tambah_unit():
+    # Callback tombol: jalan sebelum rerun, jadi pilihan unit masih boleh diubah
+    kode = st.session_state.get("kode_unit_baru", "").strip().lower()
+    nama = st.session_state.get("nama_unit_baru", "").strip() or kode
+    if not re.fullmatch(r"[a-z0-9_-]+", kode):
+        st.session_state.pesan_unit = "Kode unit hanya boleh huruf kecil, angka, '-' dan '_'."
+        return
+    penyimpanan_pusat.simpan_unit(kode, nama)
+    st.session_state.pilih_unit = kode
+
+
+def pilih_unit():
+    """Pilihan unit di atas halaman; unit awal bisa dari URL (``?unit=kode``)."""
+    if penyimpanan_pusat is None:
+        return UNIT_DEFAULT
+    daftar = dict(penyimpanan_pusat.daftar_unit())
+    if "pilih_unit" not in st.session_state:
+        st.session_state.pilih_unit = st.query_params.get("unit", UNIT_DEFAULT)
+    if st.session_state.pilih_unit not in daftar:
+        # Unit baru hanya lewat "Tambah Unit"; kode asing di URL tidak membuka/membuat buku
+        st.warning(f"Unit '{st.session_state.pilih_unit}' tidak terdaftar; membuka unit {daftar[UNIT_DEFAULT]}.")
+        st.session_state.pilih_unit = UNIT_DEFAULT
+    col_unit, col_tambah = st.columns([3, 2])
+    with col_unit:
+        unit = st.selectbox(
+            "🏢 Unit BUMDes", list(daftar), key="pilih_unit",
+            format_func=lambda k: f"{daftar[k]} ({k})" if daftar[k] != k else k,
+        )
+    with col_tambah:
+        with st.expander("➕ Tambah Unit", expanded=False):
+            st.text_input("Kode unit", key="kode_unit_baru", placeholder="mis. desa-sukamaju")
+            st.text_input("Nama unit", key="nama_unit_baru")
+            st.button("Simpan Unit", key="simpan_unit", on_click=_tambah_unit)
+            if st.session_state.get("pesan_unit"):
+                st.error(st.session_state.pop("pesan_unit"))
+    st.query_params["unit"] = unit
+    return unit
+
+
+unit_aktif = pilih_unit()
+if st.session_state.get("unit_dimuat", unit_aktif) != unit_aktif:
+    # Ganti unit: buang buku sesi supaya inisialisasi di bawah memuat buku unit baru
+    for nama in list(st.session_state.keys()):
+        if nama not in ("pilih_unit", "kode_unit_baru", "nama_unit_baru"):
+            del st.session_state[nama]
+st.session_state.unit_dimuat = unit_aktif
+penyimpanan = penyimpanan_pusat.untuk_unit(unit_aktif) if penyimpanan_pusat is not None else None
+
 # === Inisialisasi data awal ===
 def init_dataframe(columns):
     return pd.DataFrame([{col: 0 if "(Rp)" in col or col == "Jumlah (Rp)" else "" for col in columns}])
 
+# === Id baris permanen (kolom tersembunyi _id di semua tabel) ===
+def id_baru(n):
+    # 16 digit hex acak, praktis tidak mungkin bertabrakan antar sesi/penyimpanan
+    return [f"{x:016x}" for x in np.random.default_rng().integers(0, 2**63, n, dtype=np.int64)]
+
+def pastikan_id(df):
+    """Beri ``_id`` ke baris yang belum punya (atau id-nya dobel).
+
+    Objek yang sama dikembalikan kalau semua baris sudah punya id unik.
+    """
+    if df is None:
+        return df
+    if "_id" not in df:
+        df = df.copy()
+        df["_id"] = id_baru(len(df))
+        return df
+    ids = df["_id"]
+    kosong = (ids.isna() | ids.eq("")).to_numpy()
+    perlu = kosong | (ids.duplicated() & ~kosong).to_numpy()
+    if not perlu.any():
+        return df
+    df = df.copy()
+    df["_id"] = df["_id"].astype(object)
+    df.loc[perlu, "_id"] = id_baru(int(perlu.sum()))
+    return df
+
+# Tabel yang barisnya diedit lewat grid dan membawa _id
+TABEL_BERID = [
+    "data", "neraca_saldo", "pendapatan", "beban", "aktiva_lancar", "aktiva_tetap", "kewajiban",
+    "arus_kas_operasi", "arus_kas_investasi", "arus_kas_pendanaan", "bagan_akun",
+]
+
 if "data" not in st.session_state:
-    st.session_state.data = init_dataframe(["Tanggal", "Keterangan", "Ref", "Akun", "Debit (Rp)", "Kredit (Rp)"])
+    # Muat jurnal tersimpan sekali saja di awal sesi
+    if penyimpanan is not None and penyimpanan.bersama:
+        # Buku bersama: versi tiap baris dicatat untuk penguncian optimistis
+        revisi_awal, data_tersimpan, _, _ = penyimpanan.tarik_jurnal(0)
+        st.session_state.jurnal_versi = dict(zip(data_tersimpan["_id"], data_tersimpan.pop("_versi").tolist()))
+        st.session_state.jurnal_revisi = revisi_awal
+        if data_tersimpan.empty:
+            data_tersimpan = None
+    else:
+        data_tersimpan = penyimpanan.muat_jurnal() if penyimpanan else None
+    if data_tersimpan is None:
+        data_tersimpan = init_dataframe(["Tanggal", "Keterangan", "Ref", "Akun", "Debit (Rp)", "Kredit (Rp)"])
+    data_tersimpan = ketik_tabel(pastikan_id(data_tersimpan))
+    st.session_state.data = data_tersimpan
+    # Jurnal sesi tidak pernah diubah di tempat (selalu diganti objek baru), jadi cukup referensi
+    st.session_state.jurnal_tersimpan = data_tersimpan
 
 if "neraca_saldo" not in st.session_state:
     st.session_state.neraca_saldo = pd.DataFrame([
@@ -69,21 +198,88 @@ if "arus_kas_pendanaan" not in st.session_state:
 if "buku_besar" not in st.session_state:
     st.session_state.buku_besar = {}
 
-# === Fungsi format rupiah aman ===
-def format_rupiah(x):
-    try:
-        x = float(x)
-        if x < 0:
-            return f"({abs(x):,.0f})".replace(",", ".")
-        return f"{x:,.0f}".replace(",", ".")
-    except (ValueError, TypeError):
-        return ""
+if "bagan_akun" not in st.session_state:
+    st.session_state.bagan_akun = bagan_akun_default()
+
+# Tabel laporan yang ikut disimpan (buku besar selalu dibangun ulang dari jurnal)
+TABEL_TERSIMPAN = [
+    "neraca_saldo", "buku_besar_signature", "laporan_periode", "pendapatan", "beban", "modal_data",
+    "aktiva_lancar", "aktiva_tetap", "kewajiban",
+    "arus_kas_operasi", "arus_kas_investasi", "arus_kas_pendanaan", "bagan_akun",
+]
+
+if "tabel_tersimpan" not in st.session_state:
+    st.session_state.tabel_tersimpan = {}
+    for nama in TABEL_TERSIMPAN:
+        isi = penyimpanan.muat_tabel(nama) if penyimpanan else None
+        if isi is not None:
+            st.session_state[nama] = isi
+            # Jangan timpa isian laporan yang sudah tersimpan dengan auto-load
+            st.session_state.pendapatan_loaded = True
+        st.session_state.tabel_tersimpan[nama] = copy.deepcopy(st.session_state.get(nama))
+
+# Bagan akun tersimpan dari versi lama belum punya semua kolom
+st.session_state.bagan_akun = lengkapi_bagan(st.session_state.bagan_akun)
+
+# Baris baru (tombol tambah, auto-load, jurnal lama tanpa id) diberi _id dan tipe kolom sebelum dirender
+for nama in TABEL_BERID:
+    if isinstance(st.session_state.get(nama), pd.DataFrame):
+        st.session_state[nama] = ketik_tabel(pastikan_id(st.session_state[nama]))
+
+
+# === Tabel hasil tanpa Styler: teks rupiah dan baris tebal disiapkan per kolom ===
+KOLOM_RUPIAH = st.column_config.TextColumn(alignment="right")
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def html_tabel_cache(df, kanan=(), tebal=None):
+    # HTML tabel hasil di-cache per isi tabel
+    return html_tabel(df, kanan, tebal)
+
+
+def tampilkan_tabel_html(df, kanan=(), tebal=None):
+    # st.html: isi tidak lewat parser Markdown (nama akun berisi *, $, _ tetap apa adanya)
+    with profil.ukur("tabel_html", baris=len(df)):
+        st.html(html_tabel_cache(df, tuple(kanan), tebal))
+
+
+# === Ekspor PDF sesuai permintaan (dibuat saat diminta, di-cache per isi data) ===
+def tombol_pdf(label, file_name, buat_pdf, *args, key, mime="application/pdf", sidik=None):
+    """Tombol "Siapkan PDF" lalu "Download PDF".
+
+    PDF baru dibuat saat diminta; hasilnya disimpan per ``key`` bersama hash isi
+    argumennya, sehingga selama data tidak berubah tombol download langsung muncul
+    tanpa membangun ulang. Argumen yang berasal dari cache tampilan turunan boleh
+    memberi ``sidik`` (kunci turunannya) supaya isinya tidak di-hash tiap rerun.
+    """
+    cache = st.session_state.setdefault("pdf_cache", {})
+    sidik = hash_konten(buat_pdf.__name__, *(args if sidik is None else (sidik,)))
+    tersimpan = cache.get(key)
+    if tersimpan is None or tersimpan[0] != sidik:
+        if not st.button(f"🖨️ Siapkan {label}", key=f"siapkan_{key}", use_container_width=True):
+            return
+        with st.spinner(f"Menyiapkan {label}..."), profil.ukur(f"pdf:{key}"):
+            tersimpan = cache[key] = (sidik, buat_pdf(*args))
+    st.download_button(
+        f"📥 Download {label}",
+        data=tersimpan[1],
+        file_name=file_name,
+        mime=mime,
+        use_container_width=True,
+        key=f"unduh_{key}",
+    )
+
 
 # === Fungsi AgGrid ===
 def create_aggrid(df, key_suffix, height=400):
-    gb = GridOptionsBuilder.from_dataframe(df)
+    """Tampilkan tabel di AgGrid; kembalikan hanya baris yang berubah (lihat delta_grid)."""
+    # Salinan teks (st_aggrid juga menambah kolom ::auto_unique_id:: ke DataFrame yang diberikan)
+    tampil = tampilan_tabel(df)
+    gb = GridOptionsBuilder.from_dataframe(tampil)
     gb.configure_default_column(editable=True, resizable=True)
     gb.configure_grid_options(stopEditingWhenCellsLoseFocus=True)
+    if "_id" in df:
+        gb.configure_column("_id", hide=True, editable=False)
     
     for col in df.columns:
         if "(Rp)" in col:
@@ -91,128 +287,351 @@ def create_aggrid(df, key_suffix, height=400):
     
     grid_options = gb.build()
     
-    grid_response = AgGrid(
-        df,
-        gridOptions=grid_options,
-        update_mode=GridUpdateMode.VALUE_CHANGED,
-        fit_columns_on_grid_load=True,
-        allow_unsafe_jscode=True,
-        enable_enterprise_modules=False,
-        theme="streamlit",
-        height=height,
-        key=f"aggrid_{key_suffix}",
-        reload_data=False
+    with profil.ukur("aggrid", baris=len(df)):
+        grid_response = AgGrid(
+            tampil,
+            gridOptions=grid_options,
+            update_mode=GridUpdateMode.VALUE_CHANGED,
+            fit_columns_on_grid_load=True,
+            allow_unsafe_jscode=True,
+            enable_enterprise_modules=False,
+            theme="streamlit",
+            height=height,
+            key=f"aggrid_{key_suffix}",
+            reload_data=False
+        )
+        return delta_grid(df, grid_response["data"])
+
+def edit_tabel_grid(nama, key_suffix, height=400):
+    """Grid untuk tabel sesi ``nama``: delta dari grid langsung diterapkan, tabel terbaru dikembalikan."""
+    st.session_state[nama] = pastikan_id(st.session_state[nama])
+    perubahan = create_aggrid(st.session_state[nama], key_suffix, height)
+    st.session_state[nama] = terapkan_perubahan(st.session_state[nama], perubahan)
+    return st.session_state[nama]
+
+
+def editor_isian(nama, kolom, baris_kosong, label, refresh="laporan_refresh", height=180):
+    """Tombol Tambah/Hapus Kosong, grid, dan "Hapus Tertentu" untuk tabel isian laporan ``nama``.
+
+    ``kolom`` = kolom nama yang menandai baris terisi, ``baris_kosong`` = isi baris
+    baru; tabel tidak pernah dibiarkan tanpa baris. Mengembalikan isi tabel terbaru.
+    """
+    def ganti(df):
+        st.session_state[nama] = df.reset_index(drop=True) if len(df) else pd.DataFrame([baris_kosong])
+        st.session_state[refresh] += 1
+        st.rerun()
+
+    col_btn1, col_btn2 = st.columns(2)
+    with col_btn1:
+        if st.button("➕ Tambah", key=f"tambah_{nama}", use_container_width=True):
+            ganti(pd.concat([st.session_state[nama], pd.DataFrame([baris_kosong])], ignore_index=True))
+    with col_btn2:
+        if st.button("🗑️ Hapus Kosong", key=f"hapus_{nama}_kosong", use_container_width=True):
+            ganti(baris_terisi(st.session_state[nama], kolom))
+
+    hasil = edit_tabel_grid(nama, f"{nama}_{st.session_state[refresh]}", height=height)
+
+    terisi = baris_terisi(hasil, kolom)
+    if len(terisi) > 0:
+        with st.expander(f"🗑️ Hapus {label} Tertentu", expanded=False):
+            rows_del = []
+            for idx, row in terisi.iterrows():
+                if "Debit (Rp)" in terisi:
+                    angka = f"D: {format_rupiah(row['Debit (Rp)'])} | K: {format_rupiah(row['Kredit (Rp)'])}"
+                else:
+                    angka = format_rupiah(row["Jumlah (Rp)"])
+                if st.checkbox(f"{row[kolom]}: {angka}", key=f"chk_{nama}_{idx}_{st.session_state[refresh]}"):
+                    rows_del.append(idx)
+            if rows_del and st.button(f"🗑️ Hapus {len(rows_del)} Item", key=f"del_{nama}"):
+                ganti(st.session_state[nama].drop(rows_del))
+    return hasil
+
+
+# === Neraca Saldo sesi disinkron dari buku besar ===
+def sync_neraca_from_bukubesar(non_destructive: bool = True, bb=None):
+    if bb is None:
+        bb = st.session_state.get("buku_besar", {})
+    with profil.ukur("sync_neraca") as ukuran:
+        st.session_state.neraca_saldo = neraca_dari_buku_besar(bb, non_destructive)
+        ukuran["baris"] = len(st.session_state.neraca_saldo)
+
+
+# === Periode terpilih di sesi (indeks tanggal di-cache per isi kolom Tanggal) ===
+def indeks_periode_sesi():
+    # Parse ulang hanya kalau isi kolom Tanggal berubah
+    df = st.session_state.data
+    cache = st.session_state.get("indeks_periode")
+    if cache is not None and cache["data"] is df:
+        return cache["indeks"]
+    kunci = (len(df), int(pd.util.hash_pandas_object(df["Tanggal"], index=False).sum()))
+    if cache is None or cache["kunci"] != kunci:
+        cache = {"kunci": kunci, "indeks": buat_indeks_periode(df)}
+    cache["data"] = df
+    st.session_state.indeks_periode = cache
+    return cache["indeks"]
+
+
+def kunci_periode(tahun, bulan):
+    return [int(tahun), str(bulan), bool(st.session_state.get("batasi_periode", True))]
+
+
+def jurnal_periode(tahun, bulan):
+    if not st.session_state.get("batasi_periode", True):
+        return st.session_state.data
+    df = filter_periode(st.session_state.data, tahun, bulan, indeks_periode_sesi())
+    return df.reset_index(drop=True)
+
+
+def buku_besar_periode(tahun, bulan):
+    # Entri yang sama dengan tab Buku Besar; periode lain dibangun penuh (objek sendiri, tidak diubah di tempat)
+    return tampilan_turunan(
+        "buku_besar", kunci_periode(tahun, bulan),
+        lambda: gabung_saldo_awal(buat_buku_besar(jurnal_periode(tahun, bulan)), saldo_awal_sesi(tahun, bulan)),
     )
-    
-    # Konversi kolom numerik ke float
-    for col in df.columns:
-        if "(Rp)" in col:
-            grid_response["data"][col] = pd.to_numeric(grid_response["data"][col], errors="coerce").fillna(0)
-    # Konversi tanggal aman
-    if "Tanggal" in grid_response["data"]:
-        grid_response["data"]["Tanggal"] = grid_response["data"]["Tanggal"].apply(lambda x: "" if pd.isna(x) else str(x))
-    
-    return pd.DataFrame(grid_response["data"])
-
-# === Fungsi untuk membuat buku besar ===
-# === Fungsi untuk membuat buku besar ===
-def buat_buku_besar():
-    df = st.session_state.data.copy()
-    for col in ["Debit (Rp)", "Kredit (Rp)"]:
-        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0.0)
-
-    buku_besar = {}
-    for _, row in df.iterrows():
-        ref = str(row.get("Ref", "")).strip()
-        nama_akun_jurnal = str(row.get("Akun", "")).strip()
-
-        if not ref:
-            # Kalau ref kosong, pakai nama akun sebagai key (fallback)
-            key = nama_akun_jurnal if nama_akun_jurnal else f"Akun Tanpa Ref {_}"
-        else:
-            key = ref
-
-        if key not in buku_besar:
-            # Nama akun diambil dari Jurnal Umum; kalau kosong, beri placeholder
-            buku_besar[key] = {
-                "nama_akun": nama_akun_jurnal if nama_akun_jurnal else "Tidak Ada Nama Akun",
-                "debit": 0.0,
-                "kredit": 0.0,
-                "transaksi": []
-            }
 
-        debit_val = float(row.get("Debit (Rp)", 0) or 0)
-        kredit_val = float(row.get("Kredit (Rp)", 0) or 0)
-        tanggal = "" if pd.isna(row.get("Tanggal", "")) else str(row.get("Tanggal", ""))
-        keterangan = str(row.get("Keterangan", "")).strip()
-
-        if debit_val > 0:
-            buku_besar[key]["transaksi"].append({
-                "tanggal": tanggal,
-                "keterangan": keterangan,
-                "debit": debit_val,
-                "kredit": 0.0
-            })
-            buku_besar[key]["debit"] += debit_val
-        if kredit_val > 0:
-            buku_besar[key]["transaksi"].append({
-                "tanggal": tanggal,
-                "keterangan": keterangan,
-                "debit": 0.0,
-                "kredit": kredit_val
-            })
-            buku_besar[key]["kredit"] += kredit_val
-
-    return buku_besar
-
-import json
-
-
-def _signature_buku_besar(bb: dict) -> str:
-    # Buat tanda tangan sederhana untuk deteksi perubahan
-    items = []
-    for ref, data in (bb or {}).items():
-        items.append({
-            "ref": str(ref),
-            "nama": data.get("nama_akun", ""),
-            "debit": round(float(data.get("debit", 0) or 0), 2),
-            "kredit": round(float(data.get("kredit", 0) or 0), 2),
-        })
-    items.sort(key=lambda x: x["ref"])
-    return json.dumps(items, sort_keys=True)
 
-def sync_neraca_from_bukubesar(non_destructive: bool = True):
-    bb = st.session_state.get("buku_besar", {})
-    if not bb:
-        st.session_state.neraca_saldo = pd.DataFrame(columns=["Ref", "Akun", "Debit (Rp)", "Kredit (Rp)"])
-        return
+def buku_besar_tab(tahun, bulan):
+    """Buku besar periode tab Buku Besar, diperbarui inkremental dari buku besar mutasi sebelumnya."""
+    kunci = kunci_periode(tahun, bulan)
+
+    def hitung():
+        # perbarui_buku_besar mengubah buku besar mutasi di tempat: entri lama yang memakainya dilepas dulu
+        lama = st.session_state.get("buku_besar_kunci_mutasi")
+        if lama is not None:
+            cache_turunan().buang("buku_besar", lama)
+        st.session_state.buku_besar_mutasi, st.session_state.buku_besar_indeks = perbarui_buku_besar(
+            jurnal_periode(tahun, bulan),
+            st.session_state.get("buku_besar_mutasi"),
+            st.session_state.get("buku_besar_indeks"),
+        )
+        st.session_state.buku_besar_kunci_mutasi = kunci_turunan(*kunci)
+        # Saldo awal dibawa dari snapshot akhir bulan sebelumnya
+        return gabung_saldo_awal(st.session_state.buku_besar_mutasi, saldo_awal_sesi(tahun, bulan))
+
+    return tampilan_turunan("buku_besar", kunci, hitung)
+
+
+# === Bagan akun (klasifikasi per Ref, lookup dibangun sekali per isi bagan) ===
+@st.cache_resource(max_entries=1000)
+def indeks_bagan_bersama(sidik, _bagan):
+    # Satu lookup per isi bagan untuk semua sesi/unit (bagan bawaan dipakai hampir semua unit)
+    return indeks_bagan(_bagan)
+
+
+def _indeks_bagan_cache():
+    # (bagan, indeks, sidik isi bagan), dihitung ulang hanya kalau objek bagan diganti
+    bagan = st.session_state.bagan_akun
+    cache = st.session_state.get("indeks_bagan")
+    if cache is None or cache[0] is not bagan:
+        isi = bagan.drop(columns="_id", errors="ignore").reset_index(drop=True)
+        sidik = hash_konten(isi)
+        cache = st.session_state.indeks_bagan = (bagan, indeks_bagan_bersama(sidik, isi), sidik)
+    return cache
+
+
+def indeks_bagan_sesi():
+    return _indeks_bagan_cache()[1]
+
+
+# === Cache tampilan turunan (kunci: sidik jari jurnal + bagan akun + periode) ===
+def cache_turunan():
+    if "cache_turunan" not in st.session_state:
+        st.session_state.cache_turunan = CacheTurunan()
+    return st.session_state.cache_turunan
 
-    # Inisialisasi DataFrame Neraca Saldo
-    ns = pd.DataFrame(columns=["Ref", "Akun", "Debit (Rp)", "Kredit (Rp)"])
-
-    rows = []
-    for key, data in bb.items():
-        ref = key if key != data["nama_akun"] else ""  # kalau key sama dengan nama akun, berarti ref kosong
-        nama_akun = data["nama_akun"] if data["nama_akun"] else key
-        debit = float(data.get("debit", 0) or 0)
-        kredit = float(data.get("kredit", 0) or 0)
-
-        rows.append({
-            "Ref": ref,
-            "Akun": nama_akun,
-            "Debit (Rp)": debit,
-            "Kredit (Rp)": kredit
-        })
 
-    ns = pd.DataFrame(rows)
+def sidik_data():
+    # Jurnal tidak pernah diubah di tempat: sidik jari dihitung sekali per objek DataFrame
+    df = st.session_state.data
+    memo = st.session_state.get("sidik_data")
+    if memo is None or memo[0] is not df:
+        memo = st.session_state.sidik_data = (df, hash_konten(df))
+    return memo[1]
 
-    if not non_destructive:
-        # Hanya tampilkan Ref yang ada di buku besar
-        refs_bb = set(str(k) for k in bb.keys())
-        ns = ns[ns["Ref"].astype(str).isin(refs_bb)]
 
-    # Reset index
-    st.session_state.neraca_saldo = ns.reset_index(drop=True)
+def kunci_turunan(*kunci):
+    return (sidik_data(), _indeks_bagan_cache()[2], *kunci)
+
+
+def tampilan_turunan(nama, kunci, hitung):
+    """Nilai tampilan ``nama`` untuk isi jurnal/bagan sekarang dan ``kunci`` (mis. periode).
+
+    Hasil dipakai ulang lintas rerun dan lintas tab selama isinya sama;
+    nilai yang dikembalikan jangan diubah di tempat.
+    """
+    def hitung_diukur():
+        # Hanya miss yang tercatat di profil rerun; hit hampir tanpa biaya
+        with profil.ukur(nama) as ukuran:
+            nilai = hitung()
+            ukuran["baris"] = _jumlah_baris(nilai)
+        return nilai
+
+    return cache_turunan().ambil(nama, kunci_turunan(*kunci), hitung_diukur)
+
+
+def _jumlah_baris(nilai):
+    # Baris hasil untuk profil: baris tabel, atau jumlah transaksi buku besar
+    if isinstance(nilai, pd.DataFrame):
+        return len(nilai)
+    if isinstance(nilai, dict):
+        return sum(len(v["transaksi"]) for v in nilai.values() if isinstance(v, dict) and "transaksi" in v)
+    return None
+
+
+# === Saldo awal dari snapshot akhir bulan (cache per sesi dan per unit) ===
+UKURAN_SNAPSHOT_PER_UNIT = 16
+
+
+@st.cache_resource
+def snapshot_per_unit():
+    """LRU ``{unit: cache snapshot}`` terakhir yang dihitung sesi mana pun di proses ini.
+
+    DataFrame per bulan tidak pernah diubah di tempat, jadi sesi-sesi satu
+    unit cukup menyalin dict-nya saja; bulan yang sidik jarinya beda dengan
+    jurnal sesi tetap dihitung ulang oleh perbarui_snapshot. Dipakai semua
+    thread sesi sekaligus, jadi berkunci dan dibatasi ``UKURAN_SNAPSHOT_PER_UNIT``
+    unit (yang paling lama tidak dipakai dibuang).
+    """
+    return CacheBersama(UKURAN_SNAPSHOT_PER_UNIT)
+
+
+def _salin_snapshot(cache):
+    return {"hash": dict(cache["hash"]), "mutasi": dict(cache["mutasi"]), "snapshot": dict(cache["snapshot"])}
+
+
+def snapshot_sesi():
+    # Snapshot diambil dari sesi lain unit yang sama atau dari penyimpanan, lalu dijaga tetap segar
+    cache = st.session_state.get("snapshot_saldo")
+    indeks_akun = indeks_bagan_sesi()
+    if cache is not None and cache.get("data") is st.session_state.data and cache.get("indeks_akun") is indeks_akun:
+        return cache["snapshot"]
+    bersama = snapshot_per_unit()
+    if cache is None:
+        # Entri bersama tidak pernah diubah di tempat (selalu diganti salinan baru), jadi aman disalin di luar kunci
+        cache = bersama.ambil(unit_aktif)
+        if cache is not None:
+            cache = _salin_snapshot(cache)
+        elif penyimpanan is not None:
+            cache = penyimpanan.muat_snapshot()
+    with profil.ukur("snapshot_saldo", baris=len(st.session_state.data)):
+        cache, berubah = perbarui_snapshot(st.session_state.data, indeks_periode_sesi(), cache, indeks_akun)
+    bersama.simpan(unit_aktif, _salin_snapshot(cache))
+    cache["data"] = st.session_state.data
+    cache["indeks_akun"] = indeks_akun
+    st.session_state.snapshot_saldo = cache
+    if berubah:
+        st.session_state.snapshot_kotor = st.session_state.get("snapshot_kotor", set()) | berubah
+    return cache["snapshot"]
+
+
+def saldo_awal_sesi(tahun, bulan):
+    if not st.session_state.get("batasi_periode", True):
+        return None
+    return saldo_awal_periode(snapshot_sesi(), tahun, bulan, indeks_bagan_sesi())
+
+
+def simpan_sesi():
+    # Tulis balik perubahan ke penyimpanan dalam satu transaksi per jenis data
+    if penyimpanan is None:
+        return
+    data = st.session_state.data
+    lama = st.session_state.get("jurnal_tersimpan")
+    if penyimpanan.bersama:
+        # Jurnal yang belum pernah dibaca dari penyimpanan = semua baris baru
+        perubahan = diff_tabel(data.iloc[:0] if lama is None else lama, data)
+        if perubahan["ubah"] or perubahan["hapus"] or perubahan["tambah"] or perubahan["geser"]:
+            versi = st.session_state.setdefault("jurnal_versi", {})
+            hasil = penyimpanan.simpan_jurnal_bersama(data, perubahan, versi)
+            versi.update(hasil["versi"])
+            for i in set(perubahan["hapus"]) - set(hasil["konflik"]):
+                versi.pop(i, None)
+            if hasil["konflik"]:
+                # Isi terbaru baris konflik ditarik di awal run berikutnya (sinkron_buku_bersama)
+                st.session_state.konflik_jurnal = st.session_state.get("konflik_jurnal", []) + hasil["konflik"]
+    elif lama is None or list(lama.columns) != list(data.columns):
+        penyimpanan.simpan_jurnal(data)
+    else:
+        perubahan = diff_tabel(lama, data)
+        if perubahan["ubah"] or perubahan["hapus"] or perubahan["tambah"] or perubahan["geser"]:
+            penyimpanan.simpan_jurnal(data, perubahan)
+    st.session_state.jurnal_tersimpan = data
+
+    kotor = st.session_state.get("snapshot_kotor")
+    if kotor and st.session_state.get("snapshot_saldo") is not None:
+        penyimpanan.simpan_snapshot(st.session_state.snapshot_saldo, kotor)
+        st.session_state.snapshot_kotor = set()
+
+    tersimpan = st.session_state.tabel_tersimpan
+    berubah = {}
+    for nama in TABEL_TERSIMPAN:
+        isi = st.session_state.get(nama)
+        if isi is None:
+            continue
+        lama = tersimpan.get(nama)
+        if isinstance(isi, pd.DataFrame):
+            sama = isinstance(lama, pd.DataFrame) and isi.equals(lama)
+        else:
+            sama = isi == lama
+        if not sama:
+            berubah[nama] = isi
+    if berubah:
+        penyimpanan.simpan_tabel(berubah)
+        for nama, isi in berubah.items():
+            tersimpan[nama] = copy.deepcopy(isi)
+
+# === Buku bersama: tarik tulisan sesi lain sebelum halaman dirender ===
+def sinkron_buku_bersama():
+    if penyimpanan is None or not penyimpanan.bersama:
+        return
+    sejak = st.session_state.get("jurnal_revisi", 0)
+    if penyimpanan.revisi_jurnal() == sejak:
+        return
+    revisi, berubah, hapus, urutan = penyimpanan.tarik_jurnal(sejak)
+    versi = st.session_state.setdefault("jurnal_versi", {})
+    # Tulisan sesi ini sendiri sudah tercatat versinya saat disimpan
+    # Array bool, bukan list: list kosong dibaca pandas sebagai pilihan kolom
+    berubah = berubah[np.array([versi.get(i) != v for i, v in zip(berubah["_id"], berubah["_versi"])], dtype=bool)]
+    hapus = [i for i in hapus if i in versi]
+    if len(berubah) or hapus:
+        st.session_state.data = gabung_tarikan(st.session_state.data, berubah, hapus)
+        st.session_state.jurnal_tersimpan = gabung_tarikan(
+            st.session_state.get("jurnal_tersimpan", st.session_state.data.iloc[:0]), berubah, hapus
+        )
+        versi.update(zip(berubah["_id"], berubah["_versi"].tolist()))
+        for i in hapus:
+            versi.pop(i, None)
+        st.session_state.grid_key = st.session_state.get("grid_key", 0) + 1
+    if urutan is not None:
+        # Urutan baris disusun ulang sesi lain
+        data = ikuti_urutan(st.session_state.data, urutan)
+        if data is not st.session_state.data:
+            st.session_state.data = data
+            if st.session_state.get("jurnal_tersimpan") is not None:
+                st.session_state.jurnal_tersimpan = ikuti_urutan(st.session_state.jurnal_tersimpan, urutan)
+            st.session_state.grid_key = st.session_state.get("grid_key", 0) + 1
+    st.session_state.jurnal_revisi = revisi
+
+
+# === Editor jurnal per halaman (hanya jendela yang terlihat dikirim ke grid) ===
+UKURAN_HALAMAN_JURNAL = [50, 100, 250, 500]
+
+
+def posisi_jendela_jurnal(df, tahun=None, bulan=None, indeks=None):
+    # Semua posisi baris, atau baris periode terpilih + baris yang tanggalnya
+    # kosong/tak terbaca (mis. baris yang baru ditambah) supaya tetap bisa diisi
+    if tahun is None:
+        return np.arange(len(df))
+    if indeks is None:
+        indeks = buat_indeks_periode(df)
+    kode = int(tahun) * 12 + int(bulan) - 1
+    return np.flatnonzero((indeks["kode_bulan"] == kode) | (indeks["kode_bulan"] < 0))
+
+
+def halaman_jurnal(df, posisi, halaman, ukuran):
+    # Potongan jurnal untuk grid; baris dicocokkan balik lewat kolom _id
+    awal = (int(halaman) - 1) * int(ukuran)
+    return df.iloc[posisi[awal:awal + int(ukuran)]].reset_index(drop=True)
+
 
 # === Styling AgGrid ===
 st.markdown("""
@@ -231,9 +650,82 @@ st.markdown("""
     --ag-cell-vertical-padding: 6px;
     border-radius: 8px;
 }
+
+/* Tabel hasil laporan (lihat html_tabel) */
+.tabel-hasil {
+    max-height: 560px;
+    overflow: auto;
+    border: 1px solid #DDDDDD;
+    border-radius: 8px;
+    margin-bottom: 1rem;
+}
+.tabel-hasil table {
+    width: 100%;
+    border-collapse: collapse;
+    font-size: 14px;
+}
+.tabel-hasil th {
+    position: sticky;
+    top: 0;
+    background: #E9ECEF;
+    text-align: left;
+}
+.tabel-hasil th, .tabel-hasil td {
+    padding: 6px 10px;
+    border-bottom: 1px solid #EEEEEE;
+    white-space: pre;
+}
+.tabel-hasil .angka {
+    text-align: right;
+}
+.tabel-hasil tr.tebal td {
+    font-weight: bold;
+}
 </style>
 """, unsafe_allow_html=True)
 
+with profil.ukur("sinkron_buku_bersama"):
+    sinkron_buku_bersama()
+
+# === Paket buku (ekspor/impor Parquet) ===
+with st.expander("📦 Paket Buku (Parquet) untuk Rekap & Analitik", expanded=False):
+    st.caption(
+        "Jurnal, transaksi buku besar, neraca saldo, dan tabel laporan dalam satu ZIP berisi "
+        "berkas Parquet terkompresi. Bisa dibaca langsung dengan pandas/DuckDB/Spark."
+    )
+    kol_ekspor, kol_impor = st.columns(2)
+    with kol_ekspor:
+        tombol_pdf(
+            "Paket Buku", "paket_buku_bumdes.zip", buat_paket_buku,
+            st.session_state.data,
+            {nama: st.session_state.get(nama) for nama in TABEL_PAKET},
+            st.session_state.modal_data,
+            key="paket_buku", mime="application/zip",
+        )
+    with kol_impor:
+        berkas_paket = st.file_uploader("Impor paket buku", type=["zip"], key="berkas_paket")
+        if berkas_paket is not None and st.button(
+            "♻️ Ganti Buku dengan Isi Paket", key="proses_paket", use_container_width=True
+        ):
+            try:
+                tabel_paket, manifest_paket = baca_paket_buku(berkas_paket)
+            except (ValueError, KeyError, OSError, zipfile.BadZipFile) as e:
+                st.error(f"Paket tidak bisa dibaca: {e}")
+            else:
+                st.session_state.data = ketik_tabel(pastikan_id(tabel_paket.pop("jurnal")))
+                for nama, isi in tabel_paket.items():
+                    st.session_state[nama] = ketik_tabel(pastikan_id(isi))
+                if isinstance(manifest_paket.get("modal_data"), dict):
+                    st.session_state.modal_data = manifest_paket["modal_data"]
+                # Isian laporan dari paket jangan ditimpa auto-load; semua grid dirender ulang
+                st.session_state.pendapatan_loaded = True
+                for kunci in ["grid_key", "neraca_refresh_counter", "laporan_refresh", "arus_kas_refresh"]:
+                    st.session_state[kunci] = st.session_state.get(kunci, 0) + 1
+                st.success(
+                    f"Paket {manifest_paket.get('dibuat', '')} dimuat: "
+                    f"{len(st.session_state.data):,} baris jurnal.".replace(",", ".")
+                )
+
 # === Tabs ===
 tab1, tab2, tab3, tab4 = st.tabs(["🧾 Jurnal Umum", "📚 Buku Besar", "💵 Neraca Saldo", "📊 Laporan Keuangan"])
 
@@ -243,6 +735,12 @@ tab1, tab2, tab3, tab4 = st.tabs(["🧾 Jurnal Umum", "📚 Buku Besar", "💵 N
 with tab1:
     st.header("🧾 Jurnal Umum")
     st.info("💡 Tekan Enter sekali untuk menyimpan perubahan otomatis.")
+    if st.session_state.get("konflik_jurnal"):
+        st.warning(
+            f"⚠️ {len(st.session_state.konflik_jurnal)} baris jurnal sudah diubah/dihapus pengguna lain "
+            "sebelum perubahan Anda tersimpan. Perubahan Anda pada baris itu dibatalkan dan isi terbaru dimuat."
+        )
+        st.session_state.konflik_jurnal = []
 
     if "grid_key" not in st.session_state:
         st.session_state.grid_key = 0
@@ -260,6 +758,7 @@ with tab1:
         )[0]
     with col2:
         tahun_selected = st.number_input("Tahun", min_value=2000, max_value=2100, value=pd.Timestamp.now().year, step=1)
+    st.checkbox("Batasi Buku Besar, Neraca Saldo & Laporan ke periode terpilih", value=True, key="batasi_periode")
     
     # Fungsi untuk menambah baris
     def add_journal_row():
@@ -271,151 +770,146 @@ with tab1:
             "Debit (Rp)": [0], 
             "Kredit (Rp)": [0]
         })
-        # Simpan data yang ada dulu dari AgGrid
-        #if 'grid_response' in st.session_state:
-            #st.session_state.data = st.session_state.grid_response['data']
         # Tambah baris baru
-        st.session_state.data = pd.concat([st.session_state.data, new_row], ignore_index=True)
+        st.session_state.data = ketik_tabel(pd.concat([st.session_state.data, new_row], ignore_index=True))
         st.session_state.grid_key += 1
+        # Baris baru ada di ujung jurnal; batas ke halaman terakhir diatur saat render
+        st.session_state.halaman_jurnal = len(st.session_state.data)
     
     # Tombol tambah baris
     st.button("➕ Tambah Baris Jurnal", key="tambah_jurnal", on_click=add_journal_row)
+
+    # --- Impor massal dari CSV/Excel ---
+    with st.expander("📥 Impor Jurnal dari CSV/Excel", expanded=False):
+        berkas_impor = st.file_uploader("Pilih berkas", type=["csv", "xlsx"], key="berkas_impor")
+        if berkas_impor is not None:
+            try:
+                kolom_sumber = list(next(baca_potongan_impor(berkas_impor, berkas_impor.name, ukuran=5)).columns)
+            except (StopIteration, ValueError, pd.errors.ParserError, zipfile.BadZipFile) as e:
+                st.error(f"Berkas tidak bisa dibaca: {e}")
+                kolom_sumber = []
+            berkas_impor.seek(0)
+            if kolom_sumber:
+                tebakan = tebak_pemetaan(kolom_sumber)
+                pilihan = ["(tidak ada)"] + kolom_sumber
+                pemetaan = {}
+                kol_peta = st.columns(4)
+                for i, target in enumerate(list(KOLOM_JURNAL) + [KOLOM_BUKTI]):
+                    with kol_peta[i % 4]:
+                        dipilih = st.selectbox(
+                            target, pilihan,
+                            index=pilihan.index(tebakan[target]) if tebakan[target] else 0,
+                            key=f"peta_impor_{target}",
+                        )
+                    pemetaan[target] = None if dipilih == "(tidak ada)" else dipilih
+                st.caption("Tanpa kolom No. Bukti, voucher = baris berurutan bertanggal sama sampai debit dan kredit seimbang.")
+
+                if st.button("✅ Periksa & Impor", key="proses_impor", use_container_width=True):
+                    status_impor = st.empty()
+                    try:
+                        with st.spinner("Membaca & memeriksa berkas..."):
+                            jurnal_impor, masalah_impor = impor_jurnal(
+                                berkas_impor, berkas_impor.name, pemetaan,
+                                progres=lambda n: status_impor.caption(f"{n:,} baris dibaca...".replace(",", ".")),
+                            )
+                    except (ValueError, pd.errors.ParserError, zipfile.BadZipFile) as e:
+                        status_impor.empty()
+                        st.error(f"Berkas tidak bisa dibaca: {e}")
+                    else:
+                        status_impor.empty()
+                        if not masalah_impor.empty:
+                            st.error(f"Impor dibatalkan: {len(masalah_impor)} masalah ditemukan. Perbaiki berkas lalu coba lagi.")
+                            st.dataframe(masalah_impor.head(200), use_container_width=True, hide_index=True)
+                        elif jurnal_impor.empty:
+                            st.warning("Tidak ada baris yang bisa diimpor.")
+                        else:
+                            # Satu kali gabung untuk seluruh isi berkas
+                            st.session_state.data = ketik_tabel(pd.concat(
+                                [st.session_state.data, pastikan_id(jurnal_impor)], ignore_index=True
+                            ))
+                            st.session_state.grid_key += 1
+                            st.success(f"✅ {len(jurnal_impor):,} baris jurnal diimpor.".replace(",", "."))
     
-    # Setup AgGrid
-    gb = GridOptionsBuilder.from_dataframe(st.session_state.data)
+    # --- Jendela editor: hanya satu halaman jurnal yang dikirim ke grid ---
+    col_j1, col_j2, col_j3 = st.columns([2, 1, 1])
+    with col_j1:
+        jendela_jurnal = st.radio(
+            "Baris yang ditampilkan", ["Periode terpilih", "Semua baris"],
+            horizontal=True, key="jendela_jurnal",
+        )
+    posisi_jurnal = posisi_jendela_jurnal(
+        st.session_state.data,
+        *((tahun_selected, bulan_selected) if jendela_jurnal == "Periode terpilih" else (None, None)),
+        indeks=indeks_periode_sesi(),
+    )
+    with col_j2:
+        ukuran_halaman = st.selectbox("Baris per halaman", UKURAN_HALAMAN_JURNAL, index=1, key="ukuran_halaman_jurnal")
+    jumlah_halaman = max(1, -(-len(posisi_jurnal) // ukuran_halaman))
+    if st.session_state.get("halaman_jurnal", 1) > jumlah_halaman:
+        st.session_state.halaman_jurnal = jumlah_halaman
+    with col_j3:
+        halaman = st.number_input(
+            f"Halaman (dari {jumlah_halaman})", min_value=1, max_value=jumlah_halaman,
+            step=1, key="halaman_jurnal",
+        )
+    jendela = halaman_jurnal(st.session_state.data, posisi_jurnal, halaman, ukuran_halaman)
+
+    # Setup AgGrid (tanggal/kategori dikirim sebagai teks)
+    jendela_tampil = tampilan_tabel(jendela)
+    gb = GridOptionsBuilder.from_dataframe(jendela_tampil)
     gb.configure_default_column(editable=True, resizable=True)
     gb.configure_grid_options(stopEditingWhenCellsLoseFocus=True)
+    gb.configure_column("_id", hide=True, editable=False)
     
-    for col in st.session_state.data.columns:
+    for col in jendela.columns:
         if "(Rp)" in col:
             gb.configure_column(col, type=["numericColumn"], valueFormatter="value ? value.toLocaleString() : ''")
     
     grid_options = gb.build()
     
     # Render AgGrid
-    grid_response = AgGrid(
-        st.session_state.data,
-        gridOptions=grid_options,
-        update_mode=GridUpdateMode.VALUE_CHANGED,
-        fit_columns_on_grid_load=True,
-        allow_unsafe_jscode=True,
-        enable_enterprise_modules=False,
-        theme="streamlit",
-        height=320,
-        key=f"jurnal_grid_{st.session_state.grid_key}",
-        reload_data=True
-    )
+    with profil.ukur("aggrid", baris=len(jendela)):
+        grid_response = AgGrid(
+            jendela_tampil,  # salinan; st_aggrid menambah kolom ::auto_unique_id:: ke DataFrame yang diberikan
+            gridOptions=grid_options,
+            update_mode=GridUpdateMode.VALUE_CHANGED,
+            fit_columns_on_grid_load=True,
+            allow_unsafe_jscode=True,
+            enable_enterprise_modules=False,
+            theme="streamlit",
+            height=320,
+            key=f"jurnal_grid_{st.session_state.grid_key}_{jendela_jurnal}_{ukuran_halaman}_{halaman}",
+            reload_data=True
+        )
     
-    # Simpan data dari grid ke session state
-    st.session_state.data = grid_response['data']
+        # Hanya baris yang berubah di halaman ini yang ditulis balik ke jurnal lengkap (lewat _id)
+        st.session_state.data = terapkan_perubahan(st.session_state.data, delta_grid(jendela, grid_response['data']))
+    st.caption(f"Menampilkan {len(jendela)} dari {len(posisi_jurnal)} baris (total jurnal {len(st.session_state.data)} baris).")
     
-    # Tampilkan data yang sudah difilter
-    df_clean = st.session_state.data[st.session_state.data["Keterangan"].astype(str).str.strip() != ""]
+    # Tampilkan data yang sudah difilter (periode terpilih, keterangan terisi)
+    periode_jurnal = kunci_periode(tahun_selected, bulan_selected)
+    df_final = tampilan_turunan(
+        "jurnal_cetak", periode_jurnal, lambda: jurnal_cetak(jurnal_periode(tahun_selected, bulan_selected))
+    )
+    if st.session_state.batasi_periode and indeks_periode_sesi()["tak_terbaca"]:
+        st.caption(f"⚠️ {indeks_periode_sesi()['tak_terbaca']} baris jurnal tanggalnya tidak terbaca, jadi tidak masuk periode mana pun.")
     
-    if not df_clean.empty:
-        total_debit = df_clean["Debit (Rp)"].sum()
-        total_kredit = df_clean["Kredit (Rp)"].sum()
-        total_row = pd.DataFrame({
-            "Tanggal": [""],
-            "Keterangan": ["TOTAL"],
-            "Ref": [""],
-            "Akun": [""],
-            "Debit (Rp)": [total_debit],
-            "Kredit (Rp)": [total_kredit],
-        })
-        df_final = pd.concat([df_clean, total_row], ignore_index=True)
-
+    if not df_final.empty:
         st.write("### 📊 Hasil Jurnal")
-        df_final_display = df_final.copy()
-        df_final_display.index = range(1, len(df_final_display)+1)
-        df_final_display.index.name = "No"
-        st.dataframe(df_final_display.style.format({
-            "Debit (Rp)": format_rupiah,
-            "Kredit (Rp)": format_rupiah
-        }))
-
-        # --- PDF ---
-        def buat_pdf(df, bulan, tahun):
-            import calendar
-            pdf = FPDF()
-            pdf.add_page()
-            pdf.set_font("Arial", size=12)
-            
-            # Nama bulan
-            bulan_dict = {
-                1: "Januari", 2: "Februari", 3: "Maret", 4: "April", 5: "Mei",
-                6: "Juni", 7: "Juli", 8: "Agustus", 9: "September",
-                10: "Oktober", 11: "November", 12: "Desember"
-            }
-            try:
-                bulan_nama = bulan_dict.get(int(bulan), calendar.month_name[int(bulan)])
-            except:
-                bulan_nama = "Unknown"
-            
-            pdf.cell(200, 10, txt=f"Jurnal Umum BUMDes - {bulan_nama} {tahun}", ln=True, align="C")
-            pdf.ln(8)
-            
-            # Lebar kolom (Tanggal, Keterangan, Debit, Kredit)
-            col_widths = [25, 80, 40, 40]  # keterangan lebih lebar
-            line_height = 6
-        
-            # Header
-            pdf.set_font("Arial", size=10, style="B")
-            headers = ["Tanggal", "Keterangan", "Debit (Rp)", "Kredit (Rp)"]
-            for i, header in enumerate(headers):
-                pdf.cell(col_widths[i], line_height + 2, header, border=1, align="C")
-            pdf.ln()
-            
-            # Isi tabel
-            pdf.set_font("Arial", size=9)
-            for _, row in df.iterrows():
-                # Simpan posisi awal X, Y
-                x_start = pdf.get_x()
-                y_start = pdf.get_y()
-        
-                # Tanggal
-                pdf.multi_cell(col_widths[0], line_height, str(row["Tanggal"]), border=1, align="C")
-                x_after = x_start + col_widths[0]
-        
-                # Keterangan
-                pdf.set_xy(x_after, y_start)
-                pdf.multi_cell(col_widths[1], line_height, str(row["Keterangan"]), border=1, align="L")
-                x_after += col_widths[1]
-        
-                # Debit
-                pdf.set_xy(x_after, y_start)
-                debit_str = f"{row['Debit (Rp)']:,.0f}".replace(",", ".") if pd.notna(row['Debit (Rp)']) else "0"
-                pdf.multi_cell(col_widths[2], line_height, debit_str, border=1, align="R")
-                x_after += col_widths[2]
-        
-                # Kredit
-                pdf.set_xy(x_after, y_start)
-                kredit_str = f"{row['Kredit (Rp)']:,.0f}".replace(",", ".") if pd.notna(row['Kredit (Rp)']) else "0"
-                pdf.multi_cell(col_widths[3], line_height, kredit_str, border=1, align="R")
-        
-                # Pindah ke baris berikutnya sesuai tinggi terbesar
-                y_new = pdf.get_y()
-                pdf.set_y(y_new)
-        
-            # Footer
-            pdf.ln(5)
-            pdf.set_font("Arial", 'I', 8)
-            pdf.cell(0, 5, txt="Dicetak dari Sistem Akuntansi BUMDes", ln=True, align="C")
-        
-            # Simpan ke temp file
-            import tempfile
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-                pdf.output(tmp.name)
-                tmp.seek(0)
-                return tmp.read()
-        
-        pdf_data = buat_pdf(df_final, bulan_selected, tahun_selected)
-        st.download_button(
-            "📥 Download PDF",
-            data=pdf_data,
-            file_name=f"jurnal_umum_{bulan_selected}_{tahun_selected}.pdf",
-            mime="application/pdf",
-            use_container_width=True
+        df_final_display = tampilan_turunan(
+            "jurnal_tampil", periode_jurnal, lambda: tabel_bernomor(df_final, ["Debit (Rp)", "Kredit (Rp)"])
+        )
+        with profil.ukur("tabel_dataframe", baris=len(df_final_display)):
+            st.dataframe(
+                df_final_display,
+                column_config={"Debit (Rp)": KOLOM_RUPIAH, "Kredit (Rp)": KOLOM_RUPIAH},
+            )
+
+        tombol_pdf(
+            "PDF",
+            f"jurnal_umum_{bulan_selected}_{tahun_selected}.pdf",
+            pdf_jurnal, df_final, bulan_selected, tahun_selected,
+            key="jurnal", sidik=kunci_turunan(*periode_jurnal),
         )
     else:
         st.warning("Belum ada data valid di tabel.")
@@ -427,8 +921,10 @@ with tab1:
 with tab2:
     st.header("📚 Buku Besar")
     
-    # Perbarui buku besar berdasarkan jurnal
-    st.session_state.buku_besar = buat_buku_besar()
+    # Buku besar periode terpilih (dari cache; kalau jurnal berubah hanya baris yang berubah diproses)
+    st.session_state.buku_besar = buku_besar_tab(tahun_selected, bulan_selected)
+    if st.session_state.batasi_periode:
+        st.caption(f"Periode: {bulan_selected}/{tahun_selected} (ikut pilihan di tab Jurnal Umum)")
     
     if not st.session_state.buku_besar:
         st.info("ℹ️ Belum ada data untuk buku besar. Silakan isi Jurnal Umum terlebih dahulu.")
@@ -449,83 +945,44 @@ with tab2:
             st.metric("Total Debit", format_rupiah(akun_data["debit"]))
         with col2:
             st.metric("Total Kredit", format_rupiah(akun_data["kredit"]))
+        with col3:
+            st.metric("Saldo Akhir", format_rupiah(akun_data["debit"] - akun_data["kredit"]))
 
         # Tabel transaksi
         if akun_data["transaksi"]:
-            df_transaksi = pd.DataFrame(akun_data["transaksi"])
             st.write(f"### Transaksi Akun: {akun_no} - {akun_data['nama_akun']}")
+            df_transaksi_display = tampilan_turunan(
+                "transaksi_akun", (*kunci_periode(tahun_selected, bulan_selected), akun_no),
+                lambda: tabel_bernomor(pd.DataFrame(akun_data["transaksi"]), ["debit", "kredit"]),
+            )
 
-            df_transaksi_display = df_transaksi.copy()
-            df_transaksi_display.index = range(1, len(df_transaksi_display) + 1)
-            df_transaksi_display.index.name = "No"
-
-            st.dataframe(df_transaksi_display.style.format({
-                "debit": format_rupiah,
-                "kredit": format_rupiah
-            }))
-
-            # PDF semua akun
-            def buat_pdf_buku_besar(buku_besar):
-                pdf = FPDF()
-                pdf.add_page()
-                pdf.set_auto_page_break(auto=True, margin=10)
-
-                pdf.set_font("Arial", 'B', 14)
-                pdf.cell(0, 10, txt="Buku Besar Semua Akun", ln=True, align="C")
-                pdf.ln(5)
-
-                for akun_no, akun_data in buku_besar.items():
-                    # Judul akun
-                    pdf.set_font("Arial", 'B', 12)
-                    pdf.cell(0, 8, txt=f"{akun_no} - {akun_data['nama_akun']}", ln=True)
-                    
-                    # Total debit/kredit
-                    pdf.set_font("Arial", '', 10)
-                    pdf.cell(0, 6, txt=f"Total Debit  : {format_rupiah(akun_data['debit'])}", ln=True)
-                    pdf.cell(0, 6, txt=f"Total Kredit : {format_rupiah(akun_data['kredit'])}", ln=True)
-                    pdf.ln(2)
-
-                    # Header tabel transaksi
-                    pdf.set_font("Arial", 'B', 10)
-                    col_widths = [25, 60, 50, 50]
-                    headers = ["Tanggal", "Keterangan", "Debit (Rp)", "Kredit (Rp)"]
-                    for i, header in enumerate(headers):
-                        pdf.cell(col_widths[i], 8, header, border=1, align="C")
-                    pdf.ln()
-
-                    # Isi tabel transaksi
-                    pdf.set_font("Arial", '', 9)
-                    for trx in akun_data.get("transaksi", []):
-                        pdf.cell(col_widths[0], 8, str(trx["tanggal"]), border=1, align="C")
-
-                        ket = str(trx["keterangan"])
-                        if len(ket) > 30:
-                            ket = ket[:27] + "..."
-                        pdf.cell(col_widths[1], 8, ket, border=1, align="L")
-
-                        pdf.cell(col_widths[2], 8, format_rupiah(trx["debit"]), border=1, align="R")
-                        pdf.cell(col_widths[3], 8, format_rupiah(trx["kredit"]), border=1, align="R")
-                        pdf.ln()
-
-                    pdf.ln(5)  # Jeda antar akun
-
-                # Footer
-                pdf.set_font("Arial", 'I', 8)
-                pdf.cell(0, 5, txt="Dicetak dari Sistem Akuntansi BUMDes", ln=True, align="C")
-
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-                    pdf.output(tmp.name)
-                    tmp.seek(0)
-                    return tmp.read()
-
-            pdf_semua = buat_pdf_buku_besar(st.session_state.buku_besar)
-            st.download_button(
-                "📥 Download PDF Buku Besar",
-                data=pdf_semua,
-                file_name="buku_besar.pdf",
-                mime="application/pdf",
-                use_container_width=True
+            with profil.ukur("tabel_dataframe", baris=len(df_transaksi_display)):
+                st.dataframe(
+                    df_transaksi_display, column_config={"debit": KOLOM_RUPIAH, "kredit": KOLOM_RUPIAH}
+                )
+
+            bb_ekspor = st.session_state.buku_besar
+            sidik_bb = kunci_turunan(*kunci_periode(tahun_selected, bulan_selected))
+            format_ekspor = st.radio(
+                "Format ekspor buku besar", ["Satu PDF", "ZIP per akun"],
+                horizontal=True, key="format_ekspor_bb",
             )
+            if format_ekspor == "ZIP per akun":
+                tombol_pdf(
+                    "ZIP Buku Besar per Akun",
+                    "buku_besar_per_akun.zip",
+                    zip_buku_besar_per_akun, bb_ekspor,
+                    key="buku_besar_zip", mime="application/zip", sidik=sidik_bb,
+                )
+            else:
+                # Buku besar besar dirender per halaman dengan reportlab agar RAM tidak melonjak
+                tombol_pdf(
+                    "PDF Buku Besar",
+                    "buku_besar.pdf",
+                    pdf_buku_besar,
+                    bb_ekspor,
+                    key="buku_besar", sidik=sidik_bb,
+                )
         else:
             st.info("Tidak ada transaksi untuk akun ini.")
 
@@ -563,16 +1020,32 @@ with tab3:
     # INFO
     st.info("💡 Neraca Saldo di bawah ini disinkron otomatis dari Buku Besar. ")
 
+    # --- Bagan akun: Ref -> tipe, saldo normal, pos laporan ---
+    with st.expander("📒 Bagan Akun (klasifikasi Laporan Keuangan per Ref)", expanded=False):
+        st.caption(
+            "Pos Laporan: " + ", ".join(POS_LAPORAN) + ". Akun yang Ref-nya belum terdaftar "
+            "diklasifikasikan dari nama akun atau digit pertama Ref. Klik Reload di Laporan "
+            "Keuangan setelah mengubah bagan."
+        )
+        edit_tabel_grid("bagan_akun", f"bagan_{st.session_state.get('neraca_refresh_counter', 0)}", height=300)
+        ref_jurnal = pd.Index(kolom_teks(st.session_state.data, "Ref").unique())
+        belum_terdaftar = ref_jurnal[(ref_jurnal != "") & ~ref_jurnal.isin(indeks_bagan_sesi()["ref"].keys())]
+        if len(belum_terdaftar):
+            st.warning("Ref di jurnal yang belum ada di bagan akun: " + ", ".join(map(str, belum_terdaftar[:30])))
+
     # COUNTER
     if "neraca_refresh_counter" not in st.session_state:
         st.session_state.neraca_refresh_counter = 0
 
-    # 1) Pastikan buku_besar ada. Kalau Anda sudah build buku_besar di Tab 1, baris ini optional:
-    if "buku_besar" not in st.session_state:
-        st.session_state.buku_besar = buat_buku_besar()
-
-    # 2) AUTO SYNC SETIAP RERUN (tanpa signature, paling simpel dan pasti otomatis)
-    sync_neraca_from_bukubesar(non_destructive=True)
+    # AUTO SYNC hanya kalau isi buku besar berubah (pakai signature)
+    bb_neraca = buku_besar_periode(tahun_neraca, bulan_neraca)
+    signature_bb = tampilan_turunan(
+        "signature_buku_besar", kunci_periode(tahun_neraca, bulan_neraca), lambda: signature_buku_besar(bb_neraca)
+    )
+    if st.session_state.get("buku_besar_signature") != signature_bb:
+        sync_neraca_from_bukubesar(non_destructive=True, bb=bb_neraca)
+        st.session_state.buku_besar_signature = signature_bb
+    st.session_state.neraca_periode = kunci_periode(tahun_neraca, bulan_neraca)
 
     # Tombol kontrol
     col1, col2, col3 = st.columns(3)
@@ -610,11 +1083,6 @@ with tab3:
             st.session_state.neraca_refresh_counter += 1
             st.rerun()
 
-    # Info counter
-    total_rows = len(st.session_state.neraca_saldo)
-    filled_rows = len(st.session_state.neraca_saldo[st.session_state.neraca_saldo["Akun"].astype(str).str.strip() != ""])
-    #st.caption(f"📊 Total Baris: {total_rows} | Terisi: {filled_rows} | Kosong: {total_rows - filled_rows}")
-
     # --- Sistem Penghapusan dengan Checkbox ---
     df_terisi = st.session_state.neraca_saldo[st.session_state.neraca_saldo["Akun"].astype(str).str.strip() != ""]
     
@@ -653,18 +1121,14 @@ with tab3:
     # --- AgGrid dengan Dropdown Akun dari Buku Besar ---
     aggrid_key = f"neraca_{st.session_state.neraca_refresh_counter}"
     
-    # Ambil daftar akun dari Buku Besar (SAFE)
-    daftar_akun_values = []
-    
-    if "buku_besar" in st.session_state and st.session_state.buku_besar:
-        if isinstance(st.session_state.buku_besar, dict):
-            for akun_no, akun_data in st.session_state.buku_besar.items():
-                if isinstance(akun_data, dict) and "nama_akun" in akun_data:
-                    daftar_akun_values.append(akun_data["nama_akun"])
+    # Ambil daftar akun dari Buku Besar
+    daftar_akun_values = nama_akun_buku_besar(bb_neraca)
     
+    st.session_state.neraca_saldo = pastikan_id(st.session_state.neraca_saldo)
     gb = GridOptionsBuilder.from_dataframe(st.session_state.neraca_saldo)
     gb.configure_default_column(editable=True, resizable=True)
     gb.configure_grid_options(stopEditingWhenCellsLoseFocus=False)
+    gb.configure_column("_id", hide=True, editable=False)
     
     # Dropdown untuk kolom Akun (dari Buku Besar)
     if daftar_akun_values:
@@ -686,105 +1150,42 @@ with tab3:
 
     df_neraca_for_grid = st.session_state.neraca_saldo.reset_index(drop=True)
     
-    grid_response = AgGrid(
-        df_neraca_for_grid,
-        gridOptions=grid_options,
-        update_mode=GridUpdateMode.VALUE_CHANGED,
-        fit_columns_on_grid_load=True,
-        allow_unsafe_jscode=True,
-        enable_enterprise_modules=False,
-        theme="streamlit",
-        height=300,
-        key=aggrid_key,
-        reload_data=True
-    )
+    with profil.ukur("aggrid", baris=len(df_neraca_for_grid)):
+        grid_response = AgGrid(
+            df_neraca_for_grid.copy(),
+            gridOptions=grid_options,
+            update_mode=GridUpdateMode.VALUE_CHANGED,
+            fit_columns_on_grid_load=True,
+            allow_unsafe_jscode=True,
+            enable_enterprise_modules=False,
+            theme="streamlit",
+            height=300,
+            key=aggrid_key,
+            reload_data=True
+        )
     
-    new_neraca = pd.DataFrame(grid_response["data"])
-    if not new_neraca.equals(st.session_state.neraca_saldo):
-        st.session_state.neraca_saldo = new_neraca.copy()
-
-    # Filter data valid
-    df_neraca_clean = new_neraca[new_neraca["Akun"].astype(str).str.strip() != ""]
-
-    if not df_neraca_clean.empty:
-        total_debit = df_neraca_clean["Debit (Rp)"].sum()
-        total_kredit = df_neraca_clean["Kredit (Rp)"].sum()
-
-        total_row = pd.DataFrame({
-            "Ref": [""],
-            "Akun": ["Jumlah"],
-            "Debit (Rp)": [total_debit],
-            "Kredit (Rp)": [total_kredit]
-        })
+        st.session_state.neraca_saldo = terapkan_perubahan(
+            st.session_state.neraca_saldo, delta_grid(df_neraca_for_grid, grid_response["data"])
+        )
+    new_neraca = st.session_state.neraca_saldo
 
-        df_neraca_final = pd.concat([df_neraca_clean, total_row], ignore_index=True)
-        df_neraca_final.index = range(1, len(df_neraca_final) + 1)
-        df_neraca_final.index.name = "No"
+    # Baris valid + baris Jumlah
+    df_neraca_final = neraca_saldo_cetak(new_neraca)
 
+    if not df_neraca_final.empty:
         st.write("### 📊 Hasil Neraca Saldo")
-        st.dataframe(
-            df_neraca_final.style.format({
-                "Debit (Rp)": format_rupiah,
-                "Kredit (Rp)": format_rupiah,
-            }).apply(lambda x: ['font-weight: bold' if i == len(df_neraca_final) else '' for i in range(len(x))], axis=0),
-            use_container_width=True
+        # Baris terakhir (Jumlah) dicetak tebal
+        tampilkan_tabel_html(
+            teks_rupiah_tabel(df_neraca_final, ["Debit (Rp)", "Kredit (Rp)"]).reset_index(),
+            kanan=["Debit (Rp)", "Kredit (Rp)"],
+            tebal=np.arange(len(df_neraca_final)) == len(df_neraca_final) - 1,
         )
 
-        # PDF Export
-        def buat_pdf_neraca(df, bulan, tahun):
-            pdf = FPDF()
-            pdf.add_page()
-            
-            pdf.set_font("Arial", 'B', 14)
-            pdf.cell(0, 10, txt="Neraca Saldo BUMDes", ln=True, align="C")
-            pdf.set_font("Arial", '', 12)
-            pdf.cell(0, 8, txt=f"Periode: {bulan_dict[bulan]} {tahun}", ln=True, align="C")
-            pdf.ln(5)
-
-            pdf.set_font("Arial", 'B', 10)
-            col_widths = [15, 25, 70, 40, 40]
-            headers = ["No", "Ref", "Akun", "Debit (Rp)", "Kredit (Rp)"]
-            
-            for i, header in enumerate(headers):
-                pdf.cell(col_widths[i], 10, header, border=1, align="C")
-            pdf.ln()
-
-            pdf.set_font("Arial", '', 9)
-            for idx, row in df.iterrows():
-                pdf.cell(col_widths[0], 8, str(idx), border=1, align="C")
-                pdf.cell(col_widths[1], 8, str(row["Ref"]), border=1, align="C")
-                
-                akun = str(row["Akun"])
-                if len(akun) > 35:
-                    akun = akun[:32] + "..."
-                pdf.cell(col_widths[2], 8, akun, border=1, align="L")
-                
-                debit_val = row["Debit (Rp)"]
-                debit_text = format_rupiah(debit_val) if isinstance(debit_val, (int, float)) and debit_val != 0 else "-"
-                pdf.cell(col_widths[3], 8, debit_text, border=1, align="R")
-                
-                kredit_val = row["Kredit (Rp)"]
-                kredit_text = format_rupiah(kredit_val) if isinstance(kredit_val, (int, float)) and kredit_val != 0 else "-"
-                pdf.cell(col_widths[4], 8, kredit_text, border=1, align="R")
-                
-                pdf.ln()
-
-            pdf.ln(5)
-            pdf.set_font("Arial", 'I', 8)
-            pdf.cell(0, 5, txt="Dicetak dari Sistem Akuntansi BUMDes", ln=True, align="C")
-
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-                pdf.output(tmp.name)
-                tmp.seek(0)
-                return tmp.read()
-
-        pdf_neraca = buat_pdf_neraca(df_neraca_final, bulan_neraca, tahun_neraca)
-        st.download_button(
-            "📥 Download PDF Neraca Saldo",
-            data=pdf_neraca,
-            file_name=f"neraca_saldo_{bulan_neraca}_{tahun_neraca}.pdf",
-            mime="application/pdf",
-            use_container_width=True
+        tombol_pdf(
+            "PDF Neraca Saldo",
+            f"neraca_saldo_{bulan_neraca}_{tahun_neraca}.pdf",
+            pdf_neraca_saldo, df_neraca_final, bulan_neraca, tahun_neraca,
+            key="neraca_saldo",
         )
     else:
         st.warning("⚠️ Belum ada data valid di tabel Neraca Saldo.")
@@ -844,49 +1245,23 @@ with tab4:
     # ========================================
     if "pendapatan_loaded" not in st.session_state:
         st.session_state.pendapatan_loaded = False
+
+    # Ganti periode laporan = muat ulang dari Neraca Saldo periode itu
+    periode_laporan = kunci_periode(tahun_laporan, bulan_laporan)
+    if st.session_state.get("laporan_periode") not in (None, periode_laporan):
+        st.session_state.pendapatan_loaded = False
+    st.session_state.laporan_periode = periode_laporan
     
     if not st.session_state.pendapatan_loaded:
-        df_neraca = st.session_state.neraca_saldo[
-            st.session_state.neraca_saldo["Akun"].astype(str).str.strip() != ""
-        ]
-        
-        # Clear data lama
-        st.session_state.pendapatan = pd.DataFrame([{"Jenis Pendapatan": "", "Debit (Rp)": 0, "Kredit (Rp)": 0}])
-        st.session_state.beban = pd.DataFrame([{"Jenis Beban": "", "Debit (Rp)": 0, "Kredit (Rp)": 0}])
-        st.session_state.aktiva_lancar = pd.DataFrame([{"Item": "", "Jumlah (Rp)": 0}])
-        st.session_state.aktiva_tetap = pd.DataFrame([{"Item": "", "Jumlah (Rp)": 0}])
-        st.session_state.kewajiban = pd.DataFrame([{"Item": "", "Jumlah (Rp)": 0}])
-        st.session_state.modal_data = {"modal_awal": 0}
-        
-        # Auto-populate dari Neraca Saldo
-        for _, row in df_neraca.iterrows():
-            nama_akun = str(row["Akun"]).lower()
-            debit = row["Debit (Rp)"] if pd.notna(row["Debit (Rp)"]) else 0
-            kredit = row["Kredit (Rp)"] if pd.notna(row["Kredit (Rp)"]) else 0
-            
-            if "pendapatan" in nama_akun or "penjualan" in nama_akun:
-                new_row = pd.DataFrame([{"Jenis Pendapatan": row["Akun"], "Debit (Rp)": 0, "Kredit (Rp)": kredit}])
-                st.session_state.pendapatan = pd.concat([st.session_state.pendapatan, new_row], ignore_index=True)
-            
-            elif "beban" in nama_akun or "biaya" in nama_akun:
-                new_row = pd.DataFrame([{"Jenis Beban": row["Akun"], "Debit (Rp)": debit, "Kredit (Rp)": 0}])
-                st.session_state.beban = pd.concat([st.session_state.beban, new_row], ignore_index=True)
-            
-            elif "kas" in nama_akun or "perlengkapan" in nama_akun or "piutang" in nama_akun:
-                new_row = pd.DataFrame([{"Item": row["Akun"], "Jumlah (Rp)": debit}])
-                st.session_state.aktiva_lancar = pd.concat([st.session_state.aktiva_lancar, new_row], ignore_index=True)
-            
-            elif "peralatan" in nama_akun or "gedung" in nama_akun or "kendaraan" in nama_akun:
-                new_row = pd.DataFrame([{"Item": row["Akun"], "Jumlah (Rp)": debit}])
-                st.session_state.aktiva_tetap = pd.concat([st.session_state.aktiva_tetap, new_row], ignore_index=True)
-            
-            elif "modal" in nama_akun:
-                st.session_state.modal_data["modal_awal"] = kredit
-            
-            elif "hutang" in nama_akun or "utang" in nama_akun:
-                new_row = pd.DataFrame([{"Item": row["Akun"], "Jumlah (Rp)": kredit}])
-                st.session_state.kewajiban = pd.concat([st.session_state.kewajiban, new_row], ignore_index=True)
-        
+        if st.session_state.get("neraca_periode") == periode_laporan:
+            neraca_sumber = st.session_state.neraca_saldo
+        else:
+            neraca_sumber = neraca_dari_buku_besar(buku_besar_periode(tahun_laporan, bulan_laporan))
+        # Satu kali klasifikasi per Ref (bagan akun) lalu dipisah ke tabel isian
+        for nama, isi in pisah_neraca_saldo(neraca_sumber, indeks_bagan_sesi()).items():
+            st.session_state[nama] = isi
+        st.session_state.modal_awal_input = int(st.session_state.modal_data["modal_awal"])
+        st.session_state.prive_input = int(st.session_state.modal_data.get("prive", 0) or 0)
         st.session_state.pendapatan_loaded = True
 
     # === SUB-TABS ===
@@ -915,209 +1290,39 @@ with tab4:
         
         with col1:
             st.write("#### Input Pendapatan (Kredit):")
-            
-            col_btn1, col_btn2 = st.columns(2)
-            with col_btn1:
-                if st.button("➕ Tambah", key="tambah_pendapatan", use_container_width=True):
-                    new_row = pd.DataFrame([{"Jenis Pendapatan": "", "Debit (Rp)": 0, "Kredit (Rp)": 0}])
-                    st.session_state.pendapatan = pd.concat([st.session_state.pendapatan, new_row], ignore_index=True)
-                    st.session_state.laporan_refresh += 1
-                    st.rerun()
-            
-            with col_btn2:
-                if st.button("🗑️ Hapus Kosong", key="hapus_pendapatan_kosong", use_container_width=True):
-                    st.session_state.pendapatan = st.session_state.pendapatan[
-                        st.session_state.pendapatan["Jenis Pendapatan"].astype(str).str.strip() != ""
-                    ].reset_index(drop=True)
-                    if len(st.session_state.pendapatan) == 0:
-                        st.session_state.pendapatan = pd.DataFrame([{"Jenis Pendapatan": "", "Debit (Rp)": 0, "Kredit (Rp)": 0}])
-                    st.session_state.laporan_refresh += 1
-                    st.rerun()
-            
-            new_pendapatan = create_aggrid(st.session_state.pendapatan, f"pendapatan_{st.session_state.laporan_refresh}", height=250)
-            if not new_pendapatan.equals(st.session_state.pendapatan):
-                st.session_state.pendapatan = new_pendapatan.copy()
-            
-            # Hapus Tertentu
-            df_pend_terisi = st.session_state.pendapatan[
-                st.session_state.pendapatan["Jenis Pendapatan"].astype(str).str.strip() != ""
-            ]
-            
-            if len(df_pend_terisi) > 0:
-                with st.expander("🗑️ Hapus Pendapatan Tertentu", expanded=False):
-                    rows_del = []
-                    for idx in df_pend_terisi.index:
-                        row = df_pend_terisi.loc[idx]
-                        col_chk, col_txt = st.columns([1, 9])
-                        with col_chk:
-                            if st.checkbox("", key=f"chk_p_{idx}_{st.session_state.laporan_refresh}"):
-                                rows_del.append(idx)
-                        with col_txt:
-                            st.text(f"{row['Jenis Pendapatan']}: D: {format_rupiah(row['Debit (Rp)'])} | K: {format_rupiah(row['Kredit (Rp)'])}")
-                    
-                    if rows_del and st.button(f"🗑️ Hapus {len(rows_del)} Item", key="del_pend"):
-                        st.session_state.pendapatan = st.session_state.pendapatan.drop(rows_del).reset_index(drop=True)
-                        if len(st.session_state.pendapatan) == 0:
-                            st.session_state.pendapatan = pd.DataFrame([{"Jenis Pendapatan": "", "Debit (Rp)": 0, "Kredit (Rp)": 0}])
-                        st.session_state.laporan_refresh += 1
-                        st.rerun()
+            new_pendapatan = editor_isian(
+                "pendapatan", "Jenis Pendapatan", {"Jenis Pendapatan": "", "Debit (Rp)": 0, "Kredit (Rp)": 0},
+                "Pendapatan", height=250,
+            )
 
         with col2:
             st.write("#### Input Beban-Beban (Debit):")
-            
-            col_btn1, col_btn2 = st.columns(2)
-            with col_btn1:
-                if st.button("➕ Tambah", key="tambah_beban", use_container_width=True):
-                    new_row = pd.DataFrame([{"Jenis Beban": "", "Debit (Rp)": 0, "Kredit (Rp)": 0}])
-                    st.session_state.beban = pd.concat([st.session_state.beban, new_row], ignore_index=True)
-                    st.session_state.laporan_refresh += 1
-                    st.rerun()
-            
-            with col_btn2:
-                if st.button("🗑️ Hapus Kosong", key="hapus_beban_kosong", use_container_width=True):
-                    st.session_state.beban = st.session_state.beban[
-                        st.session_state.beban["Jenis Beban"].astype(str).str.strip() != ""
-                    ].reset_index(drop=True)
-                    if len(st.session_state.beban) == 0:
-                        st.session_state.beban = pd.DataFrame([{"Jenis Beban": "", "Debit (Rp)": 0, "Kredit (Rp)": 0}])
-                    st.session_state.laporan_refresh += 1
-                    st.rerun()
-            
-            new_beban = create_aggrid(st.session_state.beban, f"beban_{st.session_state.laporan_refresh}", height=250)
-            if not new_beban.equals(st.session_state.beban):
-                st.session_state.beban = new_beban.copy()
-            
-            # Hapus Tertentu
-            df_beban_terisi = st.session_state.beban[
-                st.session_state.beban["Jenis Beban"].astype(str).str.strip() != ""
-            ]
-            
-            if len(df_beban_terisi) > 0:
-                with st.expander("🗑️ Hapus Beban Tertentu", expanded=False):
-                    rows_del = []
-                    for idx in df_beban_terisi.index:
-                        row = df_beban_terisi.loc[idx]
-                        col_chk, col_txt = st.columns([1, 9])
-                        with col_chk:
-                            if st.checkbox("", key=f"chk_b_{idx}_{st.session_state.laporan_refresh}"):
-                                rows_del.append(idx)
-                        with col_txt:
-                            st.text(f"{row['Jenis Beban']}: D: {format_rupiah(row['Debit (Rp)'])} | K: {format_rupiah(row['Kredit (Rp)'])}")
-                    
-                    if rows_del and st.button(f"🗑️ Hapus {len(rows_del)} Item", key="del_beban"):
-                        st.session_state.beban = st.session_state.beban.drop(rows_del).reset_index(drop=True)
-                        if len(st.session_state.beban) == 0:
-                            st.session_state.beban = pd.DataFrame([{"Jenis Beban": "", "Debit (Rp)": 0, "Kredit (Rp)": 0}])
-                        st.session_state.laporan_refresh += 1
-                        st.rerun()
+            new_beban = editor_isian(
+                "beban", "Jenis Beban", {"Jenis Beban": "", "Debit (Rp)": 0, "Kredit (Rp)": 0},
+                "Beban", height=250,
+            )
 
         st.markdown("---")
 
-        # Hitung dan SIMPAN laba_bersih di session_state
-        df_pendapatan_clean = new_pendapatan[new_pendapatan["Jenis Pendapatan"].astype(str).str.strip() != ""]
-        df_beban_clean = new_beban[new_beban["Jenis Beban"].astype(str).str.strip() != ""]
-
-        # Pendapatan = Kredit, Beban = Debit
-        total_pendapatan = df_pendapatan_clean["Kredit (Rp)"].sum() if not df_pendapatan_clean.empty else 0
-        total_beban = df_beban_clean["Debit (Rp)"].sum() if not df_beban_clean.empty else 0
-        
-        # SIMPAN di session_state agar bisa diakses sub-tab lain!
-        st.session_state.laba_bersih = total_pendapatan - total_beban
+        # Hitung dan SIMPAN laba_bersih di session_state agar bisa diakses sub-tab lain!
+        df_labarugi, total_pendapatan, total_beban, st.session_state.laba_bersih = susun_laba_rugi(
+            new_pendapatan, new_beban
+        )
 
-        if not df_pendapatan_clean.empty or not df_beban_clean.empty:
+        if not baris_terisi(new_pendapatan, "Jenis Pendapatan").empty or not baris_terisi(new_beban, "Jenis Beban").empty:
             st.write("### 📊 Hasil Laporan Laba/Rugi")
             
-            result_data = []
-            result_data.append({"Keterangan": "Pendapatan:", "Debit": "", "Kredit": ""})
-            
-            for idx, row in df_pendapatan_clean.iterrows():
-                result_data.append({
-                    "Keterangan": f"  {idx+1}. {row['Jenis Pendapatan']}", 
-                    "Debit": row["Debit (Rp)"] if row["Debit (Rp)"] != 0 else "",
-                    "Kredit": row["Kredit (Rp)"]
-                })
-            
-            result_data.append({"Keterangan": "", "Debit": "", "Kredit": ""})
-            result_data.append({"Keterangan": "Total Pendapatan", "Debit": "", "Kredit": total_pendapatan})
-            result_data.append({"Keterangan": "", "Debit": "", "Kredit": ""})
-            result_data.append({"Keterangan": "Beban-Beban:", "Debit": "", "Kredit": ""})
-            
-            for idx, row in df_beban_clean.iterrows():
-                result_data.append({
-                    "Keterangan": f"  {idx+1}. {row['Jenis Beban']}", 
-                    "Debit": row["Debit (Rp)"],
-                    "Kredit": row["Kredit (Rp)"] if row["Kredit (Rp)"] != 0 else ""
-                })
-            
-            result_data.append({"Keterangan": "", "Debit": "", "Kredit": ""})
-            result_data.append({"Keterangan": "Total Beban", "Debit": total_beban, "Kredit": ""})
-            result_data.append({"Keterangan": "", "Debit": "", "Kredit": ""})
-            
-            # Laba Bersih = Kredit - Debit
-            if st.session_state.laba_bersih >= 0:
-                result_data.append({"Keterangan": "Laba Bersih", "Debit": "", "Kredit": st.session_state.laba_bersih})
-            else:
-                result_data.append({"Keterangan": "Rugi Bersih", "Debit": abs(st.session_state.laba_bersih), "Kredit": ""})
-
-            df_labarugi = pd.DataFrame(result_data)
-            
-            st.dataframe(
-                df_labarugi.style.format({
-                    "Debit": lambda x: format_rupiah(x) if isinstance(x, (int, float)) else x,
-                    "Kredit": lambda x: format_rupiah(x) if isinstance(x, (int, float)) else x
-                })
-                .apply(lambda x: ['font-weight: bold' if i < len(df_labarugi) and ('Total' in str(df_labarugi.iloc[i]['Keterangan']) or 'Laba' in str(df_labarugi.iloc[i]['Keterangan']) or 'Rugi' in str(df_labarugi.iloc[i]['Keterangan'])) else '' for i in range(len(x))], axis=0)
-                .set_properties(**{'text-align': 'left'}, subset=['Keterangan'])
-                .set_properties(**{'text-align': 'right'}, subset=['Debit', 'Kredit']),
-                use_container_width=True,
-                hide_index=True
+            tampilkan_tabel_html(
+                teks_rupiah_tabel(df_labarugi, ["Debit", "Kredit"]),
+                kanan=["Debit", "Kredit"],
+                tebal=baris_tebal(df_labarugi["Keterangan"], pola="Total|Laba|Rugi"),
             )
             
-            # PDF Export
-            def buat_pdf_labarugi(df, bulan, tahun):
-                pdf = FPDF()
-                pdf.add_page()
-                pdf.set_font("Arial", 'B', 14)
-                pdf.cell(0, 10, txt="Laporan Laba/Rugi", ln=True, align="C")
-                pdf.set_font("Arial", '', 12)
-                pdf.cell(0, 8, txt="BUMDes", ln=True, align="C")
-                pdf.cell(0, 8, txt=f"Periode: {bulan_dict[bulan]} {tahun}", ln=True, align="C")
-                pdf.ln(5)
-                pdf.set_font("Arial", 'B', 10)
-                pdf.cell(90, 10, "Keterangan", border=1, align="C")
-                pdf.cell(45, 10, "Debit (Rp)", border=1, align="C")
-                pdf.cell(45, 10, "Kredit (Rp)", border=1, align="C")
-                pdf.ln()
-                pdf.set_font("Arial", '', 9)
-                for idx in range(len(df)):
-                    row = df.iloc[idx]
-                    is_bold = 'Total' in str(row['Keterangan']) or 'Laba' in str(row['Keterangan']) or 'Rugi' in str(row['Keterangan'])
-                    if is_bold:
-                        pdf.set_font("Arial", 'B', 9)
-                    ket = str(row["Keterangan"])[:40] + "..." if len(str(row["Keterangan"])) > 43 else str(row["Keterangan"])
-                    pdf.cell(90, 8, ket, border=1, align="L")
-                    debit_text = format_rupiah(row["Debit"]) if isinstance(row["Debit"], (int, float)) else ""
-                    pdf.cell(45, 8, debit_text, border=1, align="R")
-                    kredit_text = format_rupiah(row["Kredit"]) if isinstance(row["Kredit"], (int, float)) else ""
-                    pdf.cell(45, 8, kredit_text, border=1, align="R")
-                    pdf.ln()
-                    if is_bold:
-                        pdf.set_font("Arial", '', 9)
-                pdf.ln(5)
-                pdf.set_font("Arial", 'I', 8)
-                pdf.cell(0, 5, txt="Dicetak dari Sistem Akuntansi BUMDes", ln=True, align="C")
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-                    pdf.output(tmp.name)
-                    tmp.seek(0)
-                    return tmp.read()
-
-            pdf_labarugi = buat_pdf_labarugi(df_labarugi, bulan_laporan, tahun_laporan)
-            st.download_button(
-                "📥 Download PDF Laba/Rugi",
-                data=pdf_labarugi,
-                file_name=f"laporan_labarugi_{bulan_laporan}_{tahun_laporan}.pdf",
-                mime="application/pdf",
-                use_container_width=True
+            tombol_pdf(
+                "PDF Laba/Rugi",
+                f"laporan_labarugi_{bulan_laporan}_{tahun_laporan}.pdf",
+                pdf_laba_rugi, df_labarugi, bulan_laporan, tahun_laporan,
+                key="labarugi",
             )
     
     # ========================================
@@ -1134,14 +1339,22 @@ with tab4:
             st.session_state.laporan_refresh += 1
             st.rerun()
         
-        # Input Modal
-        modal_awal = st.number_input(
-            "Modal Awal (Rp)", 
-            value=st.session_state.modal_data.get("modal_awal", 0), 
-            step=100000,
-            key="modal_awal_input"
-        )
+        # Input Modal dan Prive (nilainya diisi otomatis saat auto-load)
+        if "modal_awal_input" not in st.session_state:
+            st.session_state.modal_awal_input = int(st.session_state.modal_data.get("modal_awal", 0) or 0)
+        if "prive_input" not in st.session_state:
+            st.session_state.prive_input = int(st.session_state.modal_data.get("prive", 0) or 0)
+        col_modal, col_prive = st.columns(2)
+        with col_modal:
+            modal_awal = st.number_input(
+                "Modal Awal (Rp)", 
+                step=100000,
+                key="modal_awal_input"
+            )
+        with col_prive:
+            prive = st.number_input("Prive (Rp)", step=100000, key="prive_input")
         st.session_state.modal_data["modal_awal"] = modal_awal
+        st.session_state.modal_data["prive"] = prive
         
         st.markdown("---")
         
@@ -1150,257 +1363,36 @@ with tab4:
         
         with col1:
             st.write("#### Aktiva Lancar:")
-            col_btn1, col_btn2 = st.columns(2)
-            with col_btn1:
-                if st.button("➕ Tambah", key="tambah_aktiva_lancar", use_container_width=True):
-                    new_row = pd.DataFrame([{"Item": "", "Jumlah (Rp)": 0}])
-                    st.session_state.aktiva_lancar = pd.concat([st.session_state.aktiva_lancar, new_row], ignore_index=True)
-                    st.session_state.laporan_refresh += 1
-                    st.rerun()
-            with col_btn2:
-                if st.button("🗑️ Hapus Kosong", key="hapus_lancar_kosong", use_container_width=True):
-                    st.session_state.aktiva_lancar = st.session_state.aktiva_lancar[
-                        st.session_state.aktiva_lancar["Item"].astype(str).str.strip() != ""
-                    ].reset_index(drop=True)
-                    if len(st.session_state.aktiva_lancar) == 0:
-                        st.session_state.aktiva_lancar = pd.DataFrame([{"Item": "", "Jumlah (Rp)": 0}])
-                    st.session_state.laporan_refresh += 1
-                    st.rerun()
-            
-            new_aktiva_lancar = create_aggrid(st.session_state.aktiva_lancar, f"lancar_{st.session_state.laporan_refresh}", height=180)
-            if not new_aktiva_lancar.equals(st.session_state.aktiva_lancar):
-                st.session_state.aktiva_lancar = new_aktiva_lancar.copy()
-            
-            # Hapus Tertentu Aktiva Lancar
-            df_lancar_terisi = st.session_state.aktiva_lancar[
-                st.session_state.aktiva_lancar["Item"].astype(str).str.strip() != ""
-            ]
-            if len(df_lancar_terisi) > 0:
-                with st.expander("🗑️ Hapus Aktiva Lancar Tertentu", expanded=False):
-                    rows_del = []
-                    for idx in df_lancar_terisi.index:
-                        row = df_lancar_terisi.loc[idx]
-                        col_chk, col_txt = st.columns([1, 9])
-                        with col_chk:
-                            if st.checkbox("", key=f"chk_al_{idx}_{st.session_state.laporan_refresh}"):
-                                rows_del.append(idx)
-                        with col_txt:
-                            st.text(f"{row['Item']}: {format_rupiah(row['Jumlah (Rp)'])}")
-                    
-                    if rows_del and st.button(f"🗑️ Hapus {len(rows_del)} Item", key="del_lancar"):
-                        st.session_state.aktiva_lancar = st.session_state.aktiva_lancar.drop(rows_del).reset_index(drop=True)
-                        if len(st.session_state.aktiva_lancar) == 0:
-                            st.session_state.aktiva_lancar = pd.DataFrame([{"Item": "", "Jumlah (Rp)": 0}])
-                        st.session_state.laporan_refresh += 1
-                        st.rerun()
+            new_aktiva_lancar = editor_isian("aktiva_lancar", "Item", {"Item": "", "Jumlah (Rp)": 0}, "Aktiva Lancar")
 
             st.write("#### Aktiva Tetap:")
-            col_btn1, col_btn2 = st.columns(2)
-            with col_btn1:
-                if st.button("➕ Tambah", key="tambah_aktiva_tetap", use_container_width=True):
-                    new_row = pd.DataFrame([{"Item": "", "Jumlah (Rp)": 0}])
-                    st.session_state.aktiva_tetap = pd.concat([st.session_state.aktiva_tetap, new_row], ignore_index=True)
-                    st.session_state.laporan_refresh += 1
-                    st.rerun()
-            with col_btn2:
-                if st.button("🗑️ Hapus Kosong", key="hapus_tetap_kosong", use_container_width=True):
-                    st.session_state.aktiva_tetap = st.session_state.aktiva_tetap[
-                        st.session_state.aktiva_tetap["Item"].astype(str).str.strip() != ""
-                    ].reset_index(drop=True)
-                    if len(st.session_state.aktiva_tetap) == 0:
-                        st.session_state.aktiva_tetap = pd.DataFrame([{"Item": "", "Jumlah (Rp)": 0}])
-                    st.session_state.laporan_refresh += 1
-                    st.rerun()
-            
-            new_aktiva_tetap = create_aggrid(st.session_state.aktiva_tetap, f"tetap_{st.session_state.laporan_refresh}", height=180)
-            if not new_aktiva_tetap.equals(st.session_state.aktiva_tetap):
-                st.session_state.aktiva_tetap = new_aktiva_tetap.copy()
-            
-            # Hapus Tertentu Aktiva Tetap
-            df_tetap_terisi = st.session_state.aktiva_tetap[
-                st.session_state.aktiva_tetap["Item"].astype(str).str.strip() != ""
-            ]
-            if len(df_tetap_terisi) > 0:
-                with st.expander("🗑️ Hapus Aktiva Tetap Tertentu", expanded=False):
-                    rows_del = []
-                    for idx in df_tetap_terisi.index:
-                        row = df_tetap_terisi.loc[idx]
-                        col_chk, col_txt = st.columns([1, 9])
-                        with col_chk:
-                            if st.checkbox("", key=f"chk_at_{idx}_{st.session_state.laporan_refresh}"):
-                                rows_del.append(idx)
-                        with col_txt:
-                            st.text(f"{row['Item']}: {format_rupiah(row['Jumlah (Rp)'])}")
-                    
-                    if rows_del and st.button(f"🗑️ Hapus {len(rows_del)} Item", key="del_tetap"):
-                        st.session_state.aktiva_tetap = st.session_state.aktiva_tetap.drop(rows_del).reset_index(drop=True)
-                        if len(st.session_state.aktiva_tetap) == 0:
-                            st.session_state.aktiva_tetap = pd.DataFrame([{"Item": "", "Jumlah (Rp)": 0}])
-                        st.session_state.laporan_refresh += 1
-                        st.rerun()
+            new_aktiva_tetap = editor_isian("aktiva_tetap", "Item", {"Item": "", "Jumlah (Rp)": 0}, "Aktiva Tetap")
 
         with col2:
             st.write("#### Kewajiban:")
-            col_btn1, col_btn2 = st.columns(2)
-            with col_btn1:
-                if st.button("➕ Tambah", key="tambah_kewajiban", use_container_width=True):
-                    new_row = pd.DataFrame([{"Item": "", "Jumlah (Rp)": 0}])
-                    st.session_state.kewajiban = pd.concat([st.session_state.kewajiban, new_row], ignore_index=True)
-                    st.session_state.laporan_refresh += 1
-                    st.rerun()
-            with col_btn2:
-                if st.button("🗑️ Hapus Kosong", key="hapus_kewajiban_kosong", use_container_width=True):
-                    st.session_state.kewajiban = st.session_state.kewajiban[
-                        st.session_state.kewajiban["Item"].astype(str).str.strip() != ""
-                    ].reset_index(drop=True)
-                    if len(st.session_state.kewajiban) == 0:
-                        st.session_state.kewajiban = pd.DataFrame([{"Item": "", "Jumlah (Rp)": 0}])
-                    st.session_state.laporan_refresh += 1
-                    st.rerun()
-            
-            new_kewajiban = create_aggrid(st.session_state.kewajiban, f"kewajiban_{st.session_state.laporan_refresh}", height=180)
-            if not new_kewajiban.equals(st.session_state.kewajiban):
-                st.session_state.kewajiban = new_kewajiban.copy()
-            
-            # Hapus Tertentu Kewajiban
-            df_kewajiban_terisi = st.session_state.kewajiban[
-                st.session_state.kewajiban["Item"].astype(str).str.strip() != ""
-            ]
-            if len(df_kewajiban_terisi) > 0:
-                with st.expander("🗑️ Hapus Kewajiban Tertentu", expanded=False):
-                    rows_del = []
-                    for idx in df_kewajiban_terisi.index:
-                        row = df_kewajiban_terisi.loc[idx]
-                        col_chk, col_txt = st.columns([1, 9])
-                        with col_chk:
-                            if st.checkbox("", key=f"chk_k_{idx}_{st.session_state.laporan_refresh}"):
-                                rows_del.append(idx)
-                        with col_txt:
-                            st.text(f"{row['Item']}: {format_rupiah(row['Jumlah (Rp)'])}")
-                    
-                    if rows_del and st.button(f"🗑️ Hapus {len(rows_del)} Item", key="del_kewajiban"):
-                        st.session_state.kewajiban = st.session_state.kewajiban.drop(rows_del).reset_index(drop=True)
-                        if len(st.session_state.kewajiban) == 0:
-                            st.session_state.kewajiban = pd.DataFrame([{"Item": "", "Jumlah (Rp)": 0}])
-                        st.session_state.laporan_refresh += 1
-                        st.rerun()
+            new_kewajiban = editor_isian("kewajiban", "Item", {"Item": "", "Jumlah (Rp)": 0}, "Kewajiban")
 
         st.markdown("---")
 
-        # Hitung totals
-        df_aktiva_lancar_clean = new_aktiva_lancar[new_aktiva_lancar["Item"].astype(str).str.strip() != ""]
-        df_aktiva_tetap_clean = new_aktiva_tetap[new_aktiva_tetap["Item"].astype(str).str.strip() != ""]
-        df_kewajiban_clean = new_kewajiban[new_kewajiban["Item"].astype(str).str.strip() != ""]
-
-        total_aktiva_lancar = df_aktiva_lancar_clean["Jumlah (Rp)"].sum() if not df_aktiva_lancar_clean.empty else 0
-        total_aktiva_tetap = df_aktiva_tetap_clean["Jumlah (Rp)"].sum() if not df_aktiva_tetap_clean.empty else 0
-        total_aktiva = total_aktiva_lancar + total_aktiva_tetap
-        
-        total_kewajiban = df_kewajiban_clean["Jumlah (Rp)"].sum() if not df_kewajiban_clean.empty else 0
-        
         # GUNAKAN laba_bersih dari session_state
-        modal_akhir = modal_awal + st.session_state.laba_bersih
-        total_passiva = total_kewajiban + modal_akhir
-        
-        # Pastikan numeric
-        total_aktiva = 0 if pd.isna(total_aktiva) else float(total_aktiva)
-        total_passiva = 0 if pd.isna(total_passiva) else float(total_passiva)
+        df_neraca_lap, total_aktiva, total_passiva, modal_akhir = susun_neraca_lap(
+            new_aktiva_lancar, new_aktiva_tetap, new_kewajiban, modal_awal, st.session_state.laba_bersih, prive
+        )
 
         # Hasil Neraca
         st.write("### 📊 Hasil Laporan Neraca")
         
-        neraca_data = []
-        neraca_data.append({"Aktiva": "Aktiva", "Jumlah1": "", "Passiva": "Passiva", "Jumlah2": ""})
-        neraca_data.append({"Aktiva": "", "Jumlah1": "", "Passiva": "", "Jumlah2": ""})
-        neraca_data.append({"Aktiva": "Aktiva Lancar:", "Jumlah1": "", "Passiva": "Kewajiban:", "Jumlah2": ""})
-        
-        max_rows = max(len(df_aktiva_lancar_clean), len(df_kewajiban_clean)) if not df_aktiva_lancar_clean.empty or not df_kewajiban_clean.empty else 0
-        for i in range(max_rows):
-            aktiva_item = df_aktiva_lancar_clean.iloc[i]["Item"] if i < len(df_aktiva_lancar_clean) else ""
-            aktiva_val = df_aktiva_lancar_clean.iloc[i]["Jumlah (Rp)"] if i < len(df_aktiva_lancar_clean) else ""
-            kewajiban_item = df_kewajiban_clean.iloc[i]["Item"] if i < len(df_kewajiban_clean) else ""
-            kewajiban_val = df_kewajiban_clean.iloc[i]["Jumlah (Rp)"] if i < len(df_kewajiban_clean) else ""
-            
-            neraca_data.append({
-                "Aktiva": f"  {aktiva_item}",
-                "Jumlah1": aktiva_val,
-                "Passiva": f"  {kewajiban_item}",
-                "Jumlah2": kewajiban_val
-            })
-        
-        neraca_data.append({"Aktiva": "", "Jumlah1": "", "Passiva": "", "Jumlah2": ""})
-        neraca_data.append({"Aktiva": "Jml aktiva lancar", "Jumlah1": total_aktiva_lancar, "Passiva": "Ekuitas:", "Jumlah2": ""})
-        neraca_data.append({"Aktiva": "", "Jumlah1": "", "Passiva": "  Modal", "Jumlah2": modal_awal})
-        neraca_data.append({"Aktiva": "Aktiva Tetap:", "Jumlah1": "", "Passiva": "  Laba", "Jumlah2": st.session_state.laba_bersih})
-        
-        for idx, row in df_aktiva_tetap_clean.iterrows():
-            neraca_data.append({
-                "Aktiva": f"  {row['Item']}",
-                "Jumlah1": row["Jumlah (Rp)"],
-                "Passiva": "",
-                "Jumlah2": ""
-            })
-        
-        neraca_data.append({"Aktiva": "", "Jumlah1": "", "Passiva": "", "Jumlah2": ""})
-        neraca_data.append({"Aktiva": "Jml Aktiva", "Jumlah1": total_aktiva, "Passiva": "Jml Kewajiban & Ekuitas", "Jumlah2": total_passiva})
-        
-        df_neraca_lap = pd.DataFrame(neraca_data)
-        
-        st.dataframe(
-            df_neraca_lap.style.format({
-                "Jumlah1": lambda x: format_rupiah(x) if isinstance(x, (int, float)) else x,
-                "Jumlah2": lambda x: format_rupiah(x) if isinstance(x, (int, float)) else x
-            })
-            .apply(lambda x: ['font-weight: bold' if i < len(df_neraca_lap) and ('Jml' in str(df_neraca_lap.iloc[i].get('Aktiva', '')) or 'Jml' in str(df_neraca_lap.iloc[i].get('Passiva', ''))) else '' for i in range(len(x))], axis=0)
-            .set_properties(**{'text-align': 'left'}, subset=['Aktiva', 'Passiva'])
-            .set_properties(**{'text-align': 'right'}, subset=['Jumlah1', 'Jumlah2']),
-            use_container_width=True,
-            hide_index=True
+        tampilkan_tabel_html(
+            teks_rupiah_tabel(df_neraca_lap, ["Jumlah1", "Jumlah2"]),
+            kanan=["Jumlah1", "Jumlah2"],
+            tebal=baris_tebal(df_neraca_lap["Aktiva"], df_neraca_lap["Passiva"], pola="Jml"),
         )
         
-        # PDF Export
-        def buat_pdf_neraca_lap(df, bulan, tahun):
-            pdf = FPDF()
-            pdf.add_page()
-            pdf.set_font("Arial", 'B', 14)
-            pdf.cell(0, 10, txt="Laporan Neraca", ln=True, align="C")
-            pdf.set_font("Arial", '', 12)
-            pdf.cell(0, 8, txt="BUMDes", ln=True, align="C")
-            pdf.cell(0, 8, txt=f"Periode: {bulan_dict[bulan]} {tahun}", ln=True, align="C")
-            pdf.ln(5)
-            pdf.set_font("Arial", 'B', 10)
-            col_widths = [60, 30, 60, 30]
-            for h in ["Aktiva", "Jumlah (Rp)", "Passiva", "Jumlah (Rp)"]:
-                pdf.cell(col_widths[0] if h == "Aktiva" else (col_widths[2] if h == "Passiva" else col_widths[1]), 10, h, border=1, align="C")
-            pdf.ln()
-            pdf.set_font("Arial", '', 9)
-            for idx in range(len(df)):
-                row = df.iloc[idx]
-                is_bold = 'Jml' in str(row.get('Aktiva', '')) or 'Jml' in str(row.get('Passiva', ''))
-                if is_bold:
-                    pdf.set_font("Arial", 'B', 9)
-                pdf.cell(col_widths[0], 8, str(row["Aktiva"]), border=1, align="L")
-                pdf.cell(col_widths[1], 8, format_rupiah(row["Jumlah1"]) if isinstance(row["Jumlah1"], (int, float)) else "", border=1, align="R")
-                pdf.cell(col_widths[2], 8, str(row["Passiva"]), border=1, align="L")
-                pdf.cell(col_widths[3], 8, format_rupiah(row["Jumlah2"]) if isinstance(row["Jumlah2"], (int, float)) else "", border=1, align="R")
-                pdf.ln()
-                if is_bold:
-                    pdf.set_font("Arial", '', 9)
-            pdf.ln(5)
-            pdf.set_font("Arial", 'I', 8)
-            pdf.cell(0, 5, txt="Dicetak dari Sistem Akuntansi BUMDes", ln=True, align="C")
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-                pdf.output(tmp.name)
-                tmp.seek(0)
-                return tmp.read()
-
-        pdf_neraca = buat_pdf_neraca_lap(df_neraca_lap, bulan_laporan, tahun_laporan)
-        st.download_button(
-            "📥 Download PDF Neraca",
-            data=pdf_neraca,
-            file_name=f"laporan_neraca_{bulan_laporan}_{tahun_laporan}.pdf",
-            mime="application/pdf",
-            use_container_width=True
+        tombol_pdf(
+            "PDF Neraca",
+            f"laporan_neraca_{bulan_laporan}_{tahun_laporan}.pdf",
+            pdf_neraca, df_neraca_lap, bulan_laporan, tahun_laporan,
+            key="neraca_lap",
         )
     
     # ========================================
@@ -1411,196 +1403,79 @@ with tab4:
         st.markdown(f"**BUMDes - {bulan_dict[bulan_laporan]} {tahun_laporan}**")
         st.markdown("---")
         
-        st.info("💡 Input manual untuk aktivitas arus kas.")
+        st.info("💡 Isi otomatis dari jurnal (baris yang menyentuh akun Kas/Bank), lalu sesuaikan manual bila perlu.")
         
         if "arus_kas_refresh" not in st.session_state:
             st.session_state.arus_kas_refresh = 0
+
+        if st.button("⚙️ Isi Otomatis dari Jurnal", key="arus_kas_otomatis", use_container_width=True):
+            isian_arus, kas_bersih = arus_kas_dari_jurnal(
+                jurnal_periode(tahun_laporan, bulan_laporan), indeks_bagan_sesi()
+            )
+            for k, isi in isian_arus.items():
+                st.session_state[f"arus_kas_{k}"] = isi
+            st.session_state.arus_kas_dari_jurnal = (periode_laporan, kas_bersih)
+            st.session_state.arus_kas_refresh += 1
+            st.rerun()
+        info_otomatis = st.session_state.get("arus_kas_dari_jurnal")
+        if info_otomatis and info_otomatis[0] == periode_laporan:
+            st.caption(f"Diisi dari jurnal periode ini. Perubahan kas bersih: Rp {format_rupiah(info_otomatis[1])}")
         
         col1, col2, col3 = st.columns(3)
         
         with col1:
             st.write("#### Operasi:")
-            col_btn1, col_btn2 = st.columns(2)
-            with col_btn1:
-                if st.button("➕ Tambah", key="add_op", use_container_width=True):
-                    st.session_state.arus_kas_operasi = pd.concat([st.session_state.arus_kas_operasi, pd.DataFrame([{"Aktivitas": "", "Jumlah (Rp)": 0}])], ignore_index=True)
-                    st.session_state.arus_kas_refresh += 1
-                    st.rerun()
-            with col_btn2:
-                if st.button("🗑️ Hapus Kosong", key="del_op_empty", use_container_width=True):
-                    st.session_state.arus_kas_operasi = st.session_state.arus_kas_operasi[
-                        st.session_state.arus_kas_operasi["Aktivitas"].astype(str).str.strip() != ""
-                    ].reset_index(drop=True)
-                    if len(st.session_state.arus_kas_operasi) == 0:
-                        st.session_state.arus_kas_operasi = pd.DataFrame([{"Aktivitas": "", "Jumlah (Rp)": 0}])
-                    st.session_state.arus_kas_refresh += 1
-                    st.rerun()
-            
-            new_arus_operasi = create_aggrid(st.session_state.arus_kas_operasi, f"op_{st.session_state.arus_kas_refresh}", height=200)
-            if not new_arus_operasi.equals(st.session_state.arus_kas_operasi):
-                st.session_state.arus_kas_operasi = new_arus_operasi.copy()
-            
-            # Hapus Tertentu Operasi
-            df_op_terisi = st.session_state.arus_kas_operasi[
-                st.session_state.arus_kas_operasi["Aktivitas"].astype(str).str.strip() != ""
-            ]
-            if len(df_op_terisi) > 0:
-                with st.expander("🗑️ Hapus Item Tertentu", expanded=False):
-                    rows_del = []
-                    for idx in df_op_terisi.index:
-                        row = df_op_terisi.loc[idx]
-                        if st.checkbox(f"{row['Aktivitas']}: {format_rupiah(row['Jumlah (Rp)'])}", key=f"chk_op_{idx}_{st.session_state.arus_kas_refresh}"):
-                            rows_del.append(idx)
-                    if rows_del and st.button(f"🗑️ Hapus {len(rows_del)} Item", key="del_op"):
-                        st.session_state.arus_kas_operasi = st.session_state.arus_kas_operasi.drop(rows_del).reset_index(drop=True)
-                        if len(st.session_state.arus_kas_operasi) == 0:
-                            st.session_state.arus_kas_operasi = pd.DataFrame([{"Aktivitas": "", "Jumlah (Rp)": 0}])
-                        st.session_state.arus_kas_refresh += 1
-                        st.rerun()
+            new_arus_operasi = editor_isian(
+                "arus_kas_operasi", "Aktivitas", {"Aktivitas": "", "Jumlah (Rp)": 0}, "Item",
+                refresh="arus_kas_refresh", height=200,
+            )
 
         with col2:
             st.write("#### Investasi:")
-            col_btn1, col_btn2 = st.columns(2)
-            with col_btn1:
-                if st.button("➕ Tambah", key="add_inv", use_container_width=True):
-                    st.session_state.arus_kas_investasi = pd.concat([st.session_state.arus_kas_investasi, pd.DataFrame([{"Aktivitas": "", "Jumlah (Rp)": 0}])], ignore_index=True)
-                    st.session_state.arus_kas_refresh += 1
-                    st.rerun()
-            with col_btn2:
-                if st.button("🗑️ Hapus Kosong", key="del_inv_empty", use_container_width=True):
-                    st.session_state.arus_kas_investasi = st.session_state.arus_kas_investasi[
-                        st.session_state.arus_kas_investasi["Aktivitas"].astype(str).str.strip() != ""
-                    ].reset_index(drop=True)
-                    if len(st.session_state.arus_kas_investasi) == 0:
-                        st.session_state.arus_kas_investasi = pd.DataFrame([{"Aktivitas": "", "Jumlah (Rp)": 0}])
-                    st.session_state.arus_kas_refresh += 1
-                    st.rerun()
-            
-            new_arus_investasi = create_aggrid(st.session_state.arus_kas_investasi, f"inv_{st.session_state.arus_kas_refresh}", height=200)
-            if not new_arus_investasi.equals(st.session_state.arus_kas_investasi):
-                st.session_state.arus_kas_investasi = new_arus_investasi.copy()
-            
-            # Hapus Tertentu Investasi
-            df_inv_terisi = st.session_state.arus_kas_investasi[
-                st.session_state.arus_kas_investasi["Aktivitas"].astype(str).str.strip() != ""
-            ]
-            if len(df_inv_terisi) > 0:
-                with st.expander("🗑️ Hapus Item Tertentu", expanded=False):
-                    rows_del = []
-                    for idx in df_inv_terisi.index:
-                        row = df_inv_terisi.loc[idx]
-                        if st.checkbox(f"{row['Aktivitas']}: {format_rupiah(row['Jumlah (Rp)'])}", key=f"chk_inv_{idx}_{st.session_state.arus_kas_refresh}"):
-                            rows_del.append(idx)
-                    if rows_del and st.button(f"🗑️ Hapus {len(rows_del)} Item", key="del_inv"):
-                        st.session_state.arus_kas_investasi = st.session_state.arus_kas_investasi.drop(rows_del).reset_index(drop=True)
-                        if len(st.session_state.arus_kas_investasi) == 0:
-                            st.session_state.arus_kas_investasi = pd.DataFrame([{"Aktivitas": "", "Jumlah (Rp)": 0}])
-                        st.session_state.arus_kas_refresh += 1
-                        st.rerun()
+            new_arus_investasi = editor_isian(
+                "arus_kas_investasi", "Aktivitas", {"Aktivitas": "", "Jumlah (Rp)": 0}, "Item",
+                refresh="arus_kas_refresh", height=200,
+            )
 
         with col3:
             st.write("#### Pendanaan:")
-            col_btn1, col_btn2 = st.columns(2)
-            with col_btn1:
-                if st.button("➕ Tambah", key="add_pend", use_container_width=True):
-                    st.session_state.arus_kas_pendanaan = pd.concat([st.session_state.arus_kas_pendanaan, pd.DataFrame([{"Aktivitas": "", "Jumlah (Rp)": 0}])], ignore_index=True)
-                    st.session_state.arus_kas_refresh += 1
-                    st.rerun()
-            with col_btn2:
-                if st.button("🗑️ Hapus Kosong", key="del_pend_empty", use_container_width=True):
-                    st.session_state.arus_kas_pendanaan = st.session_state.arus_kas_pendanaan[
-                        st.session_state.arus_kas_pendanaan["Aktivitas"].astype(str).str.strip() != ""
-                    ].reset_index(drop=True)
-                    if len(st.session_state.arus_kas_pendanaan) == 0:
-                        st.session_state.arus_kas_pendanaan = pd.DataFrame([{"Aktivitas": "", "Jumlah (Rp)": 0}])
-                    st.session_state.arus_kas_refresh += 1
-                    st.rerun()
-            
-            new_arus_pendanaan = create_aggrid(st.session_state.arus_kas_pendanaan, f"pend_{st.session_state.arus_kas_refresh}", height=200)
-            if not new_arus_pendanaan.equals(st.session_state.arus_kas_pendanaan):
-                st.session_state.arus_kas_pendanaan = new_arus_pendanaan.copy()
-            
-            # Hapus Tertentu Pendanaan
-            df_pend_terisi = st.session_state.arus_kas_pendanaan[
-                st.session_state.arus_kas_pendanaan["Aktivitas"].astype(str).str.strip() != ""
-            ]
-            if len(df_pend_terisi) > 0:
-                with st.expander("🗑️ Hapus Item Tertentu", expanded=False):
-                    rows_del = []
-                    for idx in df_pend_terisi.index:
-                        row = df_pend_terisi.loc[idx]
-                        if st.checkbox(f"{row['Aktivitas']}: {format_rupiah(row['Jumlah (Rp)'])}", key=f"chk_pend_{idx}_{st.session_state.arus_kas_refresh}"):
-                            rows_del.append(idx)
-                    if rows_del and st.button(f"🗑️ Hapus {len(rows_del)} Item", key="del_pend"):
-                        st.session_state.arus_kas_pendanaan = st.session_state.arus_kas_pendanaan.drop(rows_del).reset_index(drop=True)
-                        if len(st.session_state.arus_kas_pendanaan) == 0:
-                            st.session_state.arus_kas_pendanaan = pd.DataFrame([{"Aktivitas": "", "Jumlah (Rp)": 0}])
-                        st.session_state.arus_kas_refresh += 1
-                        st.rerun()
+            new_arus_pendanaan = editor_isian(
+                "arus_kas_pendanaan", "Aktivitas", {"Aktivitas": "", "Jumlah (Rp)": 0}, "Item",
+                refresh="arus_kas_refresh", height=200,
+            )
 
         st.markdown("---")
 
         # Hasil Arus Kas
-        df_op = new_arus_operasi[new_arus_operasi["Aktivitas"].astype(str).str.strip() != ""]
-        df_inv = new_arus_investasi[new_arus_investasi["Aktivitas"].astype(str).str.strip() != ""]
-        df_pend = new_arus_pendanaan[new_arus_pendanaan["Aktivitas"].astype(str).str.strip() != ""]
+        df_ak = susun_arus_kas(new_arus_operasi, new_arus_investasi, new_arus_pendanaan)
 
-        if not df_op.empty or not df_inv.empty or not df_pend.empty:
+        if not df_ak.empty:
             st.write("### 📊 Hasil Arus Kas")
-            arus_data = []
-            arus_data.append({"Aktivitas": "Arus Kas Operasi:", "Jumlah": ""})
-            for _, r in df_op.iterrows():
-                arus_data.append({"Aktivitas": f"  {r['Aktivitas']}", "Jumlah": r["Jumlah (Rp)"]})
-            arus_data.append({"Aktivitas": "", "Jumlah": ""})
-            arus_data.append({"Aktivitas": "Arus Kas Investasi:", "Jumlah": ""})
-            for _, r in df_inv.iterrows():
-                arus_data.append({"Aktivitas": f"  {r['Aktivitas']}", "Jumlah": r["Jumlah (Rp)"]})
-            arus_data.append({"Aktivitas": "", "Jumlah": ""})
-            arus_data.append({"Aktivitas": "Arus Kas Pendanaan:", "Jumlah": ""})
-            for _, r in df_pend.iterrows():
-                arus_data.append({"Aktivitas": f"  {r['Aktivitas']}", "Jumlah": r["Jumlah (Rp)"]})
-            
-            df_ak = pd.DataFrame(arus_data)
-            st.dataframe(
-                df_ak.style.format({"Jumlah": lambda x: format_rupiah(x) if isinstance(x, (int, float)) else x})
-                .apply(lambda x: ['font-weight: bold' if i < len(df_ak) and 'Arus Kas' in str(df_ak.iloc[i]['Aktivitas']) else '' for i in range(len(x))], axis=0)
-                .set_properties(**{'text-align': 'left'}, subset=['Aktivitas'])
-                .set_properties(**{'text-align': 'right'}, subset=['Jumlah']),
-                use_container_width=True,
-                hide_index=True
+            tampilkan_tabel_html(
+                teks_rupiah_tabel(df_ak, ["Jumlah"]),
+                kanan=["Jumlah"],
+                tebal=baris_tebal(df_ak["Aktivitas"], pola="Arus Kas"),
             )
             
-            # PDF
-            def buat_pdf_ak(df, b, t):
-                pdf = FPDF()
-                pdf.add_page()
-                pdf.set_font("Arial", 'B', 14)
-                pdf.cell(0, 10, "Laporan Arus Kas", ln=True, align="C")
-                pdf.set_font("Arial", '', 12)
-                pdf.cell(0, 8, "BUMDes", ln=True, align="C")
-                pdf.cell(0, 8, f"Periode: {bulan_dict[b]} {t}", ln=True, align="C")
-                pdf.ln(5)
-                pdf.set_font("Arial", 'B', 10)
-                pdf.cell(120, 10, "Aktivitas", border=1, align="C")
-                pdf.cell(60, 10, "Jumlah (Rp)", border=1, align="C")
-                pdf.ln()
-                pdf.set_font("Arial", '', 9)
-                for i in range(len(df)):
-                    r = df.iloc[i]
-                    is_bold = 'Arus Kas' in str(r['Aktivitas'])
-                    if is_bold:
-                        pdf.set_font("Arial", 'B', 9)
-                    pdf.cell(120, 8, str(r["Aktivitas"])[:47], border=1, align="L")
-                    pdf.cell(60, 8, format_rupiah(r["Jumlah"]) if isinstance(r["Jumlah"], (int, float)) else "", border=1, align="R")
-                    pdf.ln()
-                    if is_bold:
-                        pdf.set_font("Arial", '', 9)
-                pdf.ln(5)
-                pdf.set_font("Arial", 'I', 8)
-                pdf.cell(0, 5, "Dicetak dari Sistem Akuntansi BUMDes", ln=True, align="C")
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-                    pdf.output(tmp.name)
-                    tmp.seek(0)
-                    return tmp.read()
-            
-            st.download_button("📥 Download PDF Arus Kas", buat_pdf_ak(df_ak, bulan_laporan, tahun_laporan), f"arus_kas_{bulan_laporan}_{tahun_laporan}.pdf", "application/pdf", use_container_width=True)
+            tombol_pdf("PDF Arus Kas", f"arus_kas_{bulan_laporan}_{tahun_laporan}.pdf", pdf_arus_kas, df_ak, bulan_laporan, tahun_laporan, key="arus_kas")
+
+# === Simpan perubahan sesi ini ===
+with profil.ukur("simpan_sesi"):
+    simpan_sesi()
+
+# === Statistik cache tampilan turunan (setelah semua tab dirender) ===
+with st.sidebar.expander("⚡ Statistik cache tampilan", expanded=False):
+    st.caption(f"{len(cache_turunan())} entri tersimpan (maks. {cache_turunan().ukuran}).")
+    st.dataframe(pd.DataFrame(cache_turunan().ringkasan()), hide_index=True)
+
+# === Profil rerun ini: panel debug dan berkas metrik ===
+profil.selesai()
+if BERKAS_METRIK:
+    try:
+        tulis_metrik(BERKAS_METRIK, profil.sebagai_json(unit=unit_aktif, baris_jurnal=len(st.session_state.data)))
+    except OSError as e:
+        st.sidebar.warning(f"Metrik rerun tidak bisa ditulis: {e}")
+if MODE_DEBUG:
+    with st.sidebar.expander("⏱️ Profil rerun", expanded=True):
+        st.caption(f"Rerun {profil.waktu}: {profil.total_ms:,.0f} ms".replace(",", "."))
+        st.dataframe(pd.DataFrame(profil.ringkasan()), hide_index=True)
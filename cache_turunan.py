@@ -0,0 +1,114 @@
+"""Cache tampilan turunan jurnal (buku besar periode, tabel cetak, sidik jari PDF).
+
+Tiap rerun Streamlit menjalankan ulang semua tab. Hasil turunan yang
+mahal disimpan per kunci (nama tampilan + sidik jari isi jurnal + periode)
+di LRU berukuran tetap, jadi pindah tab atau mengubah widget lain tidak
+menghitung ulang apa pun. Statistik hit/miss dan waktu yang dihemat
+dicatat per nama tampilan.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+UKURAN_CACHE_TURUNAN = 32
+
+
+class CacheTurunan:
+    """LRU ``{kunci: (nilai, detik hitung)}`` dengan statistik per nama tampilan."""
+
+    def __init__(self, ukuran=UKURAN_CACHE_TURUNAN):
+        self.ukuran = ukuran
+        self._isi = OrderedDict()
+        # {nama: {"hit", "miss", "dibuang", "detik_hitung", "detik_hemat"}}
+        self.statistik = {}
+
+    def _stat(self, nama):
+        return self.statistik.setdefault(
+            nama, {"hit": 0, "miss": 0, "dibuang": 0, "detik_hitung": 0.0, "detik_hemat": 0.0}
+        )
+
+    def ambil(self, nama, kunci, hitung):
+        """Nilai tampilan ``nama`` untuk ``kunci``; ``hitung()`` hanya dipanggil kalau belum ada."""
+        kunci = (nama, *kunci)
+        stat = self._stat(nama)
+        if kunci in self._isi:
+            self._isi.move_to_end(kunci)
+            nilai, detik = self._isi[kunci]
+            stat["hit"] += 1
+            stat["detik_hemat"] += detik
+            return nilai
+        mulai = time.perf_counter()
+        nilai = hitung()
+        detik = time.perf_counter() - mulai
+        stat["miss"] += 1
+        stat["detik_hitung"] += detik
+        self._isi[kunci] = (nilai, detik)
+        while len(self._isi) > self.ukuran:
+            dibuang, _ = self._isi.popitem(last=False)
+            self._stat(dibuang[0])["dibuang"] += 1
+        return nilai
+
+    def buang(self, nama, kunci):
+        """Lepas satu entri (mis. nilainya akan diubah di tempat); tidak dihitung sebagai dibuang LRU."""
+        self._isi.pop((nama, *kunci), None)
+
+    def kosongkan(self):
+        self._isi.clear()
+
+    def __len__(self):
+        return len(self._isi)
+
+    def ringkasan(self):
+        """Baris statistik per tampilan (list dict) plus baris total, untuk ditampilkan sebagai tabel."""
+        baris = []
+        total = {"hit": 0, "miss": 0, "dibuang": 0, "detik_hitung": 0.0, "detik_hemat": 0.0}
+        for nama, stat in self.statistik.items():
+            baris.append({"Tampilan": nama, **_rasio(stat)})
+            for k in total:
+                total[k] += stat[k]
+        baris.append({"Tampilan": "Total", **_rasio(total)})
+        return baris
+
+
+class CacheBersama:
+    """LRU ``{kunci: nilai}`` berukuran tetap yang aman dipakai banyak thread (st.cache_resource).
+
+    Nilai disimpan apa adanya dan tidak boleh diubah di tempat oleh pemanggil;
+    pemanggil yang perlu mengubahnya menyalin dulu, lalu menyimpan salinan baru.
+    """
+
+    def __init__(self, ukuran=UKURAN_CACHE_TURUNAN):
+        self.ukuran = ukuran
+        self._isi = OrderedDict()
+        self._lock = threading.Lock()
+
+    def ambil(self, kunci):
+        """Nilai untuk ``kunci`` atau None."""
+        with self._lock:
+            if kunci not in self._isi:
+                return None
+            self._isi.move_to_end(kunci)
+            return self._isi[kunci]
+
+    def simpan(self, kunci, nilai):
+        with self._lock:
+            self._isi[kunci] = nilai
+            self._isi.move_to_end(kunci)
+            while len(self._isi) > self.ukuran:
+                self._isi.popitem(last=False)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._isi)
+
+
+def _rasio(stat):
+    panggil = stat["hit"] + stat["miss"]
+    return {
+        "Hit": stat["hit"],
+        "Miss": stat["miss"],
+        "Hit rate (%)": round(100 * stat["hit"] / panggil, 1) if panggil else 0.0,
+        "Dibuang": stat["dibuang"],
+        "Waktu hitung (ms)": round(stat["detik_hitung"] * 1000, 1),
+        "Waktu hemat (ms)": round(stat["detik_hemat"] * 1000, 1),
+    }
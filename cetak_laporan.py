@@ -0,0 +1,177 @@
+"""Cetak laporan PDF akhir bulan untuk banyak unit BUMDes sekaligus, tanpa Streamlit.
+
+Contoh::
+
+    python cetak_laporan.py --tahun 2025 --bulan 2 --keluaran laporan
+    python cetak_laporan.py --tahun 2025 --bulan 2 --unit desa-a --unit desa-b
+    python cetak_laporan.py --tahun 2025 --bulan 2 --berkas desa_a.zip --berkas desa_b.xlsx
+
+Buku dibaca dari penyimpanan (alamat ``jenis:lokasi`` seperti env
+BUMDES_PENYIMPANAN; tanpa ``--unit`` = semua unit terdaftar) atau dari
+berkas paket buku (.zip) / jurnal CSV-Excel (satu berkas = satu unit).
+Unit dibagi ke beberapa proses; tiap unit menulis keenam PDF (Jurnal Umum,
+Buku Besar, Neraca Saldo, Laba/Rugi, Neraca, Arus Kas) ke
+``<keluaran>/<unit>/``. Isi laporan disusun dari jurnal lewat
+laporan_periode, sama dengan isian otomatis di tab aplikasi; isian manual
+tab Laporan Keuangan tidak ikut.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from penyimpanan import buka_penyimpanan
+from skema_buku import ketik_tabel
+from bagan_akun import INDEKS_DEFAULT, indeks_bagan
+from akuntansi import (
+    baris_terisi, buat_indeks_periode, jurnal_cetak, laporan_periode, neraca_saldo_cetak, perbarui_snapshot,
+)
+from impor_buku import baca_potongan_impor, impor_jurnal, tebak_pemetaan
+from paket_buku import baca_paket_buku
+from laporan_pdf import pdf_arus_kas, pdf_buku_besar, pdf_jurnal, pdf_laba_rugi, pdf_neraca, pdf_neraca_saldo
+
+# Penyimpanan milik proses pekerja (koneksi SQLite tidak bisa dibagi antarproses)
+_penyimpanan_proses = None
+
+
+def _buka_penyimpanan_proses(alamat):
+    global _penyimpanan_proses
+    _penyimpanan_proses = buka_penyimpanan(alamat)
+
+
+def buku_dari_berkas(path):
+    """(jurnal, bagan akun atau None) dari paket buku .zip atau jurnal CSV/XLSX."""
+    nama = os.path.basename(path)
+    with open(path, "rb") as berkas:
+        if nama.lower().endswith(".zip"):
+            tabel, _ = baca_paket_buku(berkas)
+            return tabel["jurnal"], tabel.get("bagan_akun")
+        kolom = list(next(baca_potongan_impor(berkas, nama, ukuran=5)).columns)
+        berkas.seek(0)
+        pemetaan = tebak_pemetaan(kolom)
+        jurnal, masalah = impor_jurnal(berkas, nama, pemetaan)
+    if not masalah.empty:
+        contoh = "; ".join(f"baris {b}: {m}" for b, m in masalah.head(3).itertuples(index=False))
+        raise ValueError(f"{len(masalah)} masalah di berkas jurnal ({contoh})")
+    return jurnal, None
+
+
+def buat_pdf_unit(jurnal, bagan, tahun, bulan, snapshot=None):
+    """``{nama berkas: bytes PDF}`` keenam laporan satu periode; laporan tanpa isi dilewati.
+
+    ``snapshot`` = cache perbarui_snapshot yang tersimpan (boleh None); bulan
+    yang jurnalnya tidak berubah tidak dihitung ulang.
+    """
+    # Kolom _id ikut seperti jurnal di sesi aplikasi, supaya sidik jari bulan di snapshot tersimpan cocok
+    jurnal = ketik_tabel(jurnal)
+    indeks_akun = INDEKS_DEFAULT if bagan is None else indeks_bagan(bagan.drop(columns="_id", errors="ignore"))
+    snapshot, _ = perbarui_snapshot(jurnal, buat_indeks_periode(jurnal), snapshot, indeks_akun)
+    hasil = laporan_periode(jurnal, tahun, bulan, indeks_akun, snapshot["snapshot"])
+    akhiran = f"{bulan}_{tahun}.pdf"
+    dokumen = {}
+    jurnal_final = jurnal_cetak(hasil["jurnal"])
+    if not jurnal_final.empty:
+        dokumen[f"jurnal_umum_{akhiran}"] = pdf_jurnal(jurnal_final, bulan, tahun)
+    if hasil["buku_besar"]:
+        dokumen[f"buku_besar_{akhiran}"] = pdf_buku_besar(hasil["buku_besar"])
+    # Neraca Saldo sudah memuat saldo awal: kosong = tidak ada mutasi maupun saldo bawaan, Neraca ikut dilewati
+    neraca_final = neraca_saldo_cetak(hasil["neraca_saldo"])
+    if not neraca_final.empty:
+        dokumen[f"neraca_saldo_{akhiran}"] = pdf_neraca_saldo(neraca_final, bulan, tahun)
+    ada_labarugi = not baris_terisi(hasil["pendapatan"], "Jenis Pendapatan").empty
+    if ada_labarugi or not baris_terisi(hasil["beban"], "Jenis Beban").empty:
+        dokumen[f"laporan_labarugi_{akhiran}"] = pdf_laba_rugi(hasil["labarugi"], bulan, tahun)
+    if not neraca_final.empty:
+        dokumen[f"laporan_neraca_{akhiran}"] = pdf_neraca(hasil["neraca_lap"], bulan, tahun)
+    if not hasil["arus_kas"].empty:
+        dokumen[f"arus_kas_{akhiran}"] = pdf_arus_kas(hasil["arus_kas"], bulan, tahun)
+    return dokumen
+
+
+def cetak_unit(berkas, unit, tahun, bulan, keluaran):
+    """Tulis PDF satu unit ke ``keluaran/unit``; kembalikan (unit, berkas tertulis, detik, galat).
+
+    ``berkas`` None = buku ``unit`` di penyimpanan proses ini.
+    """
+    mulai = time.perf_counter()
+    try:
+        if berkas is None:
+            penyimpanan = _penyimpanan_proses.untuk_unit(unit)
+            jurnal = penyimpanan.muat_jurnal()
+            if jurnal is None:
+                return unit, [], time.perf_counter() - mulai, None
+            bagan = penyimpanan.muat_tabel("bagan_akun")
+            snapshot = penyimpanan.muat_snapshot()
+        else:
+            jurnal, bagan = buku_dari_berkas(berkas)
+            snapshot = None
+        dokumen = buat_pdf_unit(jurnal, bagan, tahun, bulan, snapshot)
+        folder = os.path.join(keluaran, unit)
+        os.makedirs(folder, exist_ok=True)
+        for nama, isi in dokumen.items():
+            with open(os.path.join(folder, nama), "wb") as f:
+                f.write(isi)
+        return unit, sorted(dokumen), time.perf_counter() - mulai, None
+    except Exception as e:  # satu unit gagal tidak menghentikan unit lain
+        return unit, [], time.perf_counter() - mulai, f"{type(e).__name__}: {e}"
+
+
+def _argumen(argv):
+    parser = argparse.ArgumentParser(description="Cetak PDF laporan akhir bulan untuk banyak unit BUMDes.")
+    parser.add_argument("--tahun", type=int, required=True)
+    parser.add_argument("--bulan", type=int, required=True, choices=range(1, 13), metavar="1-12")
+    parser.add_argument("--keluaran", default="laporan", help="folder tujuan (default: laporan)")
+    parser.add_argument("--penyimpanan",
+                        help="alamat penyimpanan, mis. sqlite:bumdes.db (default: env BUMDES_PENYIMPANAN)")
+    parser.add_argument("--unit", action="append", default=[], help="kode unit di penyimpanan (boleh berulang)")
+    parser.add_argument("--berkas", action="append", default=[],
+                        help="paket buku .zip atau jurnal .csv/.xlsx, satu berkas = satu unit (boleh berulang)")
+    parser.add_argument("--proses", type=int, default=os.cpu_count() or 1, help="jumlah proses pekerja")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _argumen(argv)
+    bulan = f"{args.bulan:02d}"
+    tugas = [(path, os.path.splitext(os.path.basename(path))[0]) for path in args.berkas]
+    if args.unit or not args.berkas:
+        penyimpanan = buka_penyimpanan(args.penyimpanan)
+        if penyimpanan is None:
+            print("Penyimpanan dimatikan (alamat none); pakai --berkas.", file=sys.stderr)
+            return 2
+        terdaftar = [kode for kode, _ in penyimpanan.daftar_unit()]
+        # Koneksi induk ditutup sebelum proses pekerja dibuat; tiap pekerja membuka sendiri
+        penyimpanan.tutup()
+        tidak_ada = [u for u in args.unit if u not in terdaftar]
+        if tidak_ada:
+            print(f"Unit tidak terdaftar: {', '.join(tidak_ada)}", file=sys.stderr)
+            return 2
+        tugas += [(None, u) for u in (args.unit or terdaftar)]
+
+    mulai = time.perf_counter()
+    gagal = 0
+    proses = max(1, min(args.proses, len(tugas)))
+    alamat = args.penyimpanan if any(berkas is None for berkas, _ in tugas) else "none"
+    with ProcessPoolExecutor(
+        max_workers=proses, initializer=_buka_penyimpanan_proses, initargs=(alamat,)
+    ) as pool:
+        hasil = [pool.submit(cetak_unit, berkas, unit, args.tahun, bulan, args.keluaran) for berkas, unit in tugas]
+        for selesai in as_completed(hasil):
+            unit, dokumen, detik, galat = selesai.result()
+            if galat:
+                gagal += 1
+                print(f"GAGAL {unit}: {galat}", file=sys.stderr)
+            elif not dokumen:
+                print(f"{unit}: tidak ada jurnal maupun saldo awal untuk periode ini, tidak ada PDF")
+            else:
+                print(f"{unit}: {len(dokumen)} PDF ({detik:.1f} dtk)")
+    print(
+        f"{len(tugas) - gagal}/{len(tugas)} unit selesai dalam {time.perf_counter() - mulai:.1f} dtk "
+        f"dengan {proses} proses -> {args.keluaran}"
+    )
+    return 1 if gagal else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+"""Impor jurnal massal dari CSV/Excel untuk buku BUMDes.
+
+Berkas dibaca per potongan, kolomnya dipetakan ke kolom jurnal, lalu tiap
+voucher diperiksa seimbang sebelum baris-barisnya diterima.
+"""
+import codecs
+import itertools
+import re
+import zipfile
+import numpy as np
+import pandas as pd
+from penyimpanan import KOLOM_JURNAL
+from skema_buku import parse_tanggal, rupiah
+from akuntansi import periksa_voucher
+
+# === Impor jurnal massal dari CSV/Excel (dibaca per potongan) ===
+UKURAN_POTONGAN_IMPOR = 20000
+KOLOM_BUKTI = "No. Bukti"
+# Tebakan awal pemetaan: kata kunci nama kolom di berkas sumber
+_TEBAKAN_KOLOM = {
+    "Tanggal": ["tanggal", "tgl", "date"],
+    "Keterangan": ["keterangan", "uraian", "deskripsi", "description", "memo"],
+    "Ref": ["ref", "kode", "no akun", "no. akun"],
+    "Akun": ["akun", "account", "perkiraan"],
+    "Debit (Rp)": ["debit", "debet"],
+    "Kredit (Rp)": ["kredit", "credit"],
+    KOLOM_BUKTI: ["bukti", "voucher", "no transaksi"],
+}
+
+
+def _encoding_csv(berkas):
+    # UTF-8 kalau seluruh isi sah, selain itu cp1252 (ekspor bank/Excel Windows); dicek per blok sebelum
+    # potongan pertama dibaca, supaya byte asing di akhir berkas tidak menggagalkan impor di tengah jalan
+    dekoder = codecs.getincrementaldecoder("utf-8-sig")()
+    try:
+        for blok in iter(lambda: berkas.read(1 << 20), b""):
+            dekoder.decode(blok)
+        dekoder.decode(b"", final=True)
+        return "utf-8-sig"
+    except UnicodeDecodeError:
+        return "cp1252"
+    finally:
+        berkas.seek(0)
+
+
+def baca_potongan_impor(berkas, nama_file, ukuran=UKURAN_POTONGAN_IMPOR):
+    """Baca berkas CSV/XLSX per potongan ``ukuran`` baris (generator DataFrame).
+
+    Berkas yang bukan XLSX/CSV sah (mis. .xls yang diganti namanya) menjadi ValueError.
+    """
+    if nama_file.lower().endswith((".xlsx", ".xlsm")):
+        try:
+            from openpyxl import load_workbook
+            from openpyxl.utils.exceptions import InvalidFileException
+        except ImportError:
+            raise ValueError("Impor Excel butuh paket openpyxl (pip install openpyxl).")
+        try:
+            wb = load_workbook(berkas, read_only=True, data_only=True)
+        except (zipfile.BadZipFile, InvalidFileException, KeyError) as e:
+            raise ValueError(f"Bukan berkas Excel .xlsx yang sah ({e}).") from e
+        try:
+            baris = wb.active.iter_rows(values_only=True)
+            kepala = [str(h).strip() if h is not None else f"Kolom {i + 1}" for i, h in enumerate(next(baris, ()))]
+            while True:
+                isi = list(itertools.islice(baris, ukuran))
+                if not isi:
+                    break
+                yield pd.DataFrame([r[:len(kepala)] for r in isi], columns=kepala, dtype=object)
+        finally:
+            wb.close()
+        return
+    # CSV: pemisah ditebak dari baris judul (ekspor bank sering memakai ;)
+    encoding = _encoding_csv(berkas)
+    kepala = berkas.readline().decode(encoding, errors="replace")
+    berkas.seek(0)
+    sep = max([",", ";", "\t"], key=kepala.count)
+    # cp1252 tidak memetakan 5 byte; byte itu jadi karakter pengganti, bukan galat
+    yield from pd.read_csv(
+        berkas, sep=sep, dtype=str, keep_default_na=False, chunksize=ukuran,
+        encoding=encoding, encoding_errors="replace",
+    )
+
+
+def tebak_pemetaan(kolom_sumber):
+    # Kolom jurnal -> kolom sumber yang namanya paling cocok (None kalau tidak ada)
+    pemetaan = {}
+    for target, kata in _TEBAKAN_KOLOM.items():
+        # Satu kolom sumber hanya dipakai sekali ("No Akun" -> Ref, "Nama Akun" -> Akun)
+        cocok = [
+            c for c in kolom_sumber
+            if c not in pemetaan.values() and any(k in str(c).lower() for k in kata)
+        ]
+        pemetaan[target] = cocok[0] if cocok else None
+    return pemetaan
+
+
+def angka_impor(seri):
+    # 1500000 / 1.500.000 / 1.500.000,50 / Rp 1.500.000 / 1,500,000.50 -> float; NaN kalau bukan angka
+    teks = seri.map(lambda x: "" if pd.isna(x) else str(x)).str.replace(r"(?i)rp|\s", "", regex=True)
+    # Ribuan berkoma (1,500 / 1,500.00) dicek dulu: koma desimal rupiah paling banyak dua angka (1,5 / 1,50)
+    inggris = teks.str.fullmatch(r"-?\d{1,3}(,\d{3})+(\.\d+)?")
+    indo = teks.str.fullmatch(r"-?\d{1,3}(\.\d{3})+(,\d+)?|-?\d+,\d{1,2}") & ~inggris
+    hasil = teks.mask(inggris, teks.str.replace(",", "", regex=False))
+    hasil = hasil.mask(indo, teks.str.replace(".", "", regex=False).str.replace(",", ".", regex=False))
+    return pd.to_numeric(hasil.replace("", np.nan), errors="coerce")
+
+
+def siapkan_potongan_impor(potongan, pemetaan, baris_awal=0):
+    """Petakan satu potongan ke kolom jurnal dan periksa tipe datanya.
+
+    Mengembalikan (jurnal, nomor_baris, bukti, masalah). ``nomor_baris`` adalah
+    nomor baris di berkas sumber (baris judul = 1); baris yang seluruhnya kosong
+    dibuang diam-diam.
+    """
+    def teks(target):
+        kolom = pemetaan.get(target)
+        if not kolom:
+            return pd.Series("", index=potongan.index, dtype=object)
+        return potongan[kolom].map(lambda x: "" if pd.isna(x) else str(x).strip())
+
+    mentah = {target: teks(target) for target in list(KOLOM_JURNAL) + [KOLOM_BUKTI]}
+    isi = np.zeros(len(potongan), dtype=bool)
+    for seri in mentah.values():
+        isi |= (seri != "").to_numpy()
+    nomor = np.arange(len(potongan)) + baris_awal + 2
+    mentah = {k: v[isi] for k, v in mentah.items()}
+    nomor = nomor[isi]
+
+    tanggal = parse_tanggal(mentah["Tanggal"].replace("", np.nan))
+    debit = angka_impor(mentah["Debit (Rp)"])
+    kredit = angka_impor(mentah["Kredit (Rp)"])
+    debit_salah = debit.isna() & (mentah["Debit (Rp)"] != "")
+    kredit_salah = kredit.isna() & (mentah["Kredit (Rp)"] != "")
+    cek = [
+        (tanggal.isna(), "Tanggal kosong/tidak terbaca"),
+        (debit_salah, "Debit bukan angka"),
+        (kredit_salah, "Kredit bukan angka"),
+        ((debit < 0) | (kredit < 0), "Nilai negatif"),
+        (debit.fillna(0).eq(0) & kredit.fillna(0).eq(0) & ~debit_salah & ~kredit_salah, "Debit dan Kredit sama-sama 0"),
+        ((mentah["Ref"] == "") & (mentah["Akun"] == ""), "Ref dan Akun kosong"),
+    ]
+    masalah = [
+        pd.DataFrame({"Baris": nomor[mask.to_numpy()], "Masalah": pesan})
+        for mask, pesan in cek if mask.any()
+    ]
+
+    jurnal = pd.DataFrame({
+        "Tanggal": tanggal.to_numpy(),
+        "Keterangan": mentah["Keterangan"].to_numpy(),
+        "Ref": mentah["Ref"].to_numpy(),
+        "Akun": mentah["Akun"].to_numpy(),
+        # Pecahan (1.500.000,50) dibulatkan ke rupiah
+        "Debit (Rp)": rupiah(debit).to_numpy(),
+        "Kredit (Rp)": rupiah(kredit).to_numpy(),
+    })
+    bukti = mentah[KOLOM_BUKTI].to_numpy() if pemetaan.get(KOLOM_BUKTI) else None
+    return jurnal, nomor, bukti, masalah
+
+
+def impor_jurnal(berkas, nama_file, pemetaan, ukuran=UKURAN_POTONGAN_IMPOR, progres=None):
+    """Baca, petakan, dan validasi berkas impor.
+
+    Mengembalikan (jurnal_baru, masalah); ``masalah`` kosong berarti jurnal
+    boleh digabung. ``progres(n)`` dipanggil setelah tiap potongan.
+    """
+    bagian, nomor, bukti, masalah = [], [], [], []
+    dibaca = 0
+    try:
+        for potongan in baca_potongan_impor(berkas, nama_file, ukuran):
+            j, n, b, m = siapkan_potongan_impor(potongan, pemetaan, dibaca)
+            bagian.append(j)
+            nomor.append(n)
+            if b is not None:
+                bukti.append(b)
+            masalah.extend(m)
+            dibaca += len(potongan)
+            if progres:
+                progres(dibaca)
+    except pd.errors.ParserError as e:
+        # Mis. tanda kutip tak tertutup di potongan berikutnya: dicatat sebagai masalah, impor dibatalkan
+        # "row N" dari pandas = baris berkas terhitung dari 0 (judul = 0)
+        baris = re.search(r"row (\d+)", str(e))
+        masalah.append(pd.DataFrame({
+            "Baris": [int(baris.group(1)) + 1 if baris else dibaca + 2],
+            "Masalah": [f"Berkas tidak terbaca mulai baris ini: {e}"],
+        }))
+    if not bagian:
+        kosong = pd.DataFrame(columns=KOLOM_JURNAL)
+        return kosong, pd.concat(masalah, ignore_index=True) if masalah else pd.DataFrame(columns=["Baris", "Masalah"])
+    jurnal = pd.concat(bagian, ignore_index=True)
+    nomor = np.concatenate(nomor)
+
+    kode, tak_seimbang, total = periksa_voucher(jurnal, np.concatenate(bukti) if bukti else None)
+    if len(tak_seimbang):
+        pertama = pd.Series(nomor).groupby(kode).first()
+        masalah.append(pd.DataFrame({
+            "Baris": pertama.loc[tak_seimbang].to_numpy(),
+            "Masalah": [
+                "Voucher tidak seimbang (debit - kredit = "
+                + f"{total[k]:,}".replace(",", ".") + ")"
+                for k in tak_seimbang
+            ],
+        }))
+    masalah = (
+        pd.concat(masalah, ignore_index=True).sort_values("Baris", kind="stable").reset_index(drop=True)
+        if masalah else pd.DataFrame(columns=["Baris", "Masalah"])
+    )
+    return jurnal, masalah
@@ -0,0 +1,433 @@
+"""Ekspor PDF laporan BUMDes tanpa Streamlit.
+
+Satu fungsi per dokumen (Jurnal, Buku Besar, Neraca Saldo, Laba/Rugi,
+Neraca, Arus Kas), masing-masing mengembalikan bytes PDF. Dipakai tombol
+PDF di ``bumdes.py`` dan bisa dipanggil langsung dari skrip batch.
+"""
+import io
+import re
+import zipfile
+from fpdf import FPDF
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.pdfbase import pdfdoc
+from reportlab.pdfgen import canvas
+from skema_buku import rupiah
+from akuntansi import baris_tebal, format_rupiah, format_rupiah_kolom
+
+NAMA_BULAN = {
+    1: "Januari", 2: "Februari", 3: "Maret", 4: "April", 5: "Mei", 6: "Juni",
+    7: "Juli", 8: "Agustus", 9: "September", 10: "Oktober", 11: "November", 12: "Desember",
+}
+
+
+def nama_bulan(bulan):
+    # Pilihan bulan di aplikasi berupa "01".."12", skrip batch boleh memberi angka
+    try:
+        return NAMA_BULAN[int(bulan)]
+    except (KeyError, TypeError, ValueError):
+        return "Unknown"
+
+
+# === Render PDF di memori (tanpa file sementara) ===
+def pdf_ke_bytes(pdf):
+    """Kembalikan isi dokumen FPDF sebagai bytes tanpa menulis ke disk."""
+    hasil = pdf.output(dest="S")
+    # fpdf 1.x mengembalikan str latin-1, fpdf2 mengembalikan bytearray
+    if isinstance(hasil, str):
+        return hasil.encode("latin-1")
+    return bytes(hasil)
+
+
+# === Ekspor buku besar berukuran besar (reportlab, dirender per halaman) ===
+BATAS_PDF_STREAMING = 2000  # jumlah transaksi; di atas ini buku besar dirender dengan reportlab
+_KOLOM_PDF_BB = [(25, "Tanggal", "C"), (75, "Keterangan", "L"), (45, "Debit (Rp)", "R"), (45, "Kredit (Rp)", "R")]
+
+def _kompres_halaman_terakhir(c):
+    # reportlab menahan teks mentah semua halaman dan baru mengompresnya saat save();
+    # untuk ribuan halaman itu puluhan MB. Kompres halaman yang baru selesai sekarang
+    # juga supaya yang tertahan hanya versi zlib-nya. Ini memakai atribut internal
+    # reportlab (versi yang diuji dibatasi di requirements.txt); kalau strukturnya
+    # lain, halaman dibiarkan dan pageCompression=1 tetap mengompresnya saat save(),
+    # hanya puncak memorinya yang kembali sebanding jumlah halaman.
+    try:
+        halaman = c._doc.Pages.pages[-1]
+        mentah = halaman.stream
+    except (AttributeError, IndexError, TypeError):
+        return False
+    if not isinstance(mentah, (str, bytes)):
+        return False
+    isi = pdfdoc.PDFStream(content=pdfdoc.PDFZCompress.encode(mentah))
+    isi.dictionary["Filter"] = pdfdoc.PDFArray([pdfdoc.PDFName("FlateDecode")])
+    halaman.Contents = isi
+    halaman.stream = None
+    return True
+
+def tulis_pdf_buku_besar(buku_besar, tujuan, judul="Buku Besar Semua Akun"):
+    """Tulis buku besar ke ``tujuan`` (path atau file-like) dengan reportlab.
+
+    Akun dirender berurutan dan tiap halaman dikompres begitu selesai, jadi memori
+    yang terpakai sebanding dengan ukuran PDF terkompresi, bukan jumlah baris
+    seperti FPDF yang menahan semua halaman mentah sampai output().
+    """
+    c = canvas.Canvas(tujuan, pagesize=A4, pageCompression=1)
+    lebar, tinggi = A4
+    kiri, atas, bawah = 10 * mm, tinggi - 12 * mm, 14 * mm
+    baris = 6 * mm
+    posisi_x = [kiri]
+    for w, _, _ in _KOLOM_PDF_BB:
+        posisi_x.append(posisi_x[-1] + w * mm)
+    kanan = posisi_x[-1]
+
+    def tutup_halaman():
+        c.setFont("Helvetica-Oblique", 7)
+        c.drawCentredString(lebar / 2, 7 * mm, f"Dicetak dari Sistem Akuntansi BUMDes - Hal. {c.getPageNumber()}")
+        c.showPage()
+        _kompres_halaman_terakhir(c)
+
+    def garis_kolom(y_mulai, y_akhir):
+        # Garis vertikal tabel digambar sekali per potongan tabel, bukan per sel
+        for x in posisi_x:
+            c.line(x, y_mulai, x, y_akhir)
+
+    def header_tabel(y):
+        c.setFont("Helvetica-Bold", 9)
+        c.line(kiri, y, kanan, y)
+        for (w, teks, _), x in zip(_KOLOM_PDF_BB, posisi_x):
+            c.drawCentredString(x + w * mm / 2, y - baris + 2 * mm, teks)
+        c.line(kiri, y - baris, kanan, y - baris)
+        c.setFont("Helvetica", 8)
+        return y - baris
+
+    y = atas
+    c.setFont("Helvetica-Bold", 14)
+    c.drawCentredString(lebar / 2, y - 6 * mm, judul)
+    y -= 14 * mm
+
+    for akun_no, akun_data in buku_besar.items():
+        # Judul akun + ringkasan butuh ruang kira-kira 5 baris
+        if y - 5 * baris < bawah:
+            tutup_halaman()
+            y = atas
+        c.setFont("Helvetica-Bold", 11)
+        c.drawString(kiri, y - 5 * mm, f"{akun_no} - {akun_data['nama_akun']}")
+        c.setFont("Helvetica", 9)
+        c.drawString(kiri, y - 10 * mm, f"Total Debit  : {format_rupiah(akun_data['debit'])}")
+        c.drawString(kiri, y - 14.5 * mm, f"Total Kredit : {format_rupiah(akun_data['kredit'])}")
+        y -= 17 * mm
+
+        awal_tabel = y
+        y = header_tabel(y)
+        for trx in akun_data.get("transaksi", []):
+            if y - baris < bawah:
+                garis_kolom(awal_tabel, y)
+                tutup_halaman()
+                c.setFont("Helvetica-Oblique", 9)
+                c.drawString(kiri, atas - 5 * mm, f"{akun_no} - {akun_data['nama_akun']} (lanjutan)")
+                awal_tabel = atas - 7 * mm
+                y = header_tabel(awal_tabel)
+            teks_y = y - baris + 2 * mm
+            ket = str(trx["keterangan"])
+            if len(ket) > 45:
+                ket = ket[:42] + "..."
+            c.drawCentredString((posisi_x[0] + posisi_x[1]) / 2, teks_y, str(trx["tanggal"]))
+            c.drawString(posisi_x[1] + 1.5 * mm, teks_y, ket)
+            c.drawRightString(posisi_x[3] - 1.5 * mm, teks_y, format_rupiah(trx["debit"]))
+            c.drawRightString(posisi_x[4] - 1.5 * mm, teks_y, format_rupiah(trx["kredit"]))
+            y -= baris
+            c.line(kiri, y, kanan, y)
+        garis_kolom(awal_tabel, y)
+        y -= 5 * mm  # Jeda antar akun
+
+    tutup_halaman()
+    c.save()
+
+def pdf_buku_besar_stream(buku_besar):
+    """Bytes PDF buku besar lewat renderer reportlab (tanpa file sementara)."""
+    buf = io.BytesIO()
+    tulis_pdf_buku_besar(buku_besar, buf)
+    return buf.getvalue()
+
+def zip_buku_besar_per_akun(buku_besar):
+    """ZIP berisi satu PDF per akun; tiap PDF langsung ditulis ke entri ZIP-nya."""
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for akun_no, akun_data in buku_besar.items():
+            nama = re.sub(r"[^0-9A-Za-z._-]+", "_", f"{akun_no}_{akun_data['nama_akun']}").strip("_")
+            with zf.open(f"buku_besar_{nama}.pdf", "w") as entri:
+                tulis_pdf_buku_besar(
+                    {akun_no: akun_data}, entri, judul=f"Buku Besar {akun_no} - {akun_data['nama_akun']}"
+                )
+    return buf.getvalue()
+
+
+# === Dokumen laporan (FPDF) ===
+def pdf_jurnal(df, bulan, tahun):
+    """Jurnal Umum; ``df`` sudah bertanggal teks dan berbaris TOTAL (lihat jurnal_cetak)."""
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", size=12)
+
+    pdf.cell(200, 10, txt=f"Jurnal Umum BUMDes - {nama_bulan(bulan)} {tahun}", ln=True, align="C")
+    pdf.ln(8)
+
+    # Lebar kolom (Tanggal, Keterangan, Debit, Kredit)
+    col_widths = [25, 80, 40, 40]  # keterangan lebih lebar
+    line_height = 6
+
+    # Header
+    pdf.set_font("Arial", size=10, style="B")
+    headers = ["Tanggal", "Keterangan", "Debit (Rp)", "Kredit (Rp)"]
+    for i, header in enumerate(headers):
+        pdf.cell(col_widths[i], line_height + 2, header, border=1, align="C")
+    pdf.ln()
+
+    # Isi tabel
+    pdf.set_font("Arial", size=9)
+    debit_teks = format_rupiah_kolom(df["Debit (Rp)"])
+    kredit_teks = format_rupiah_kolom(df["Kredit (Rp)"])
+    for (_, row), debit_str, kredit_str in zip(df.iterrows(), debit_teks, kredit_teks):
+        # Simpan posisi awal X, Y
+        x_start = pdf.get_x()
+        y_start = pdf.get_y()
+
+        # Tanggal
+        pdf.multi_cell(col_widths[0], line_height, str(row["Tanggal"]), border=1, align="C")
+        x_after = x_start + col_widths[0]
+
+        # Keterangan
+        pdf.set_xy(x_after, y_start)
+        pdf.multi_cell(col_widths[1], line_height, str(row["Keterangan"]), border=1, align="L")
+        x_after += col_widths[1]
+
+        # Debit
+        pdf.set_xy(x_after, y_start)
+        pdf.multi_cell(col_widths[2], line_height, debit_str, border=1, align="R")
+        x_after += col_widths[2]
+
+        # Kredit
+        pdf.set_xy(x_after, y_start)
+        pdf.multi_cell(col_widths[3], line_height, kredit_str, border=1, align="R")
+
+        # Pindah ke baris berikutnya sesuai tinggi terbesar
+        y_new = pdf.get_y()
+        pdf.set_y(y_new)
+
+    # Footer
+    pdf.ln(5)
+    pdf.set_font("Arial", 'I', 8)
+    pdf.cell(0, 5, txt="Dicetak dari Sistem Akuntansi BUMDes", ln=True, align="C")
+
+    return pdf_ke_bytes(pdf)
+
+
+def _pdf_buku_besar_fpdf(buku_besar):
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_auto_page_break(auto=True, margin=10)
+
+    pdf.set_font("Arial", 'B', 14)
+    pdf.cell(0, 10, txt="Buku Besar Semua Akun", ln=True, align="C")
+    pdf.ln(5)
+
+    for akun_no, akun_data in buku_besar.items():
+        # Judul akun
+        pdf.set_font("Arial", 'B', 12)
+        pdf.cell(0, 8, txt=f"{akun_no} - {akun_data['nama_akun']}", ln=True)
+
+        # Total debit/kredit
+        pdf.set_font("Arial", '', 10)
+        pdf.cell(0, 6, txt=f"Total Debit  : {format_rupiah(akun_data['debit'])}", ln=True)
+        pdf.cell(0, 6, txt=f"Total Kredit : {format_rupiah(akun_data['kredit'])}", ln=True)
+        pdf.ln(2)
+
+        # Header tabel transaksi
+        pdf.set_font("Arial", 'B', 10)
+        col_widths = [25, 60, 50, 50]
+        headers = ["Tanggal", "Keterangan", "Debit (Rp)", "Kredit (Rp)"]
+        for i, header in enumerate(headers):
+            pdf.cell(col_widths[i], 8, header, border=1, align="C")
+        pdf.ln()
+
+        # Isi tabel transaksi
+        pdf.set_font("Arial", '', 9)
+        for trx in akun_data.get("transaksi", []):
+            pdf.cell(col_widths[0], 8, str(trx["tanggal"]), border=1, align="C")
+
+            ket = str(trx["keterangan"])
+            if len(ket) > 30:
+                ket = ket[:27] + "..."
+            pdf.cell(col_widths[1], 8, ket, border=1, align="L")
+
+            pdf.cell(col_widths[2], 8, format_rupiah(trx["debit"]), border=1, align="R")
+            pdf.cell(col_widths[3], 8, format_rupiah(trx["kredit"]), border=1, align="R")
+            pdf.ln()
+
+        pdf.ln(5)  # Jeda antar akun
+
+    # Footer
+    pdf.set_font("Arial", 'I', 8)
+    pdf.cell(0, 5, txt="Dicetak dari Sistem Akuntansi BUMDes", ln=True, align="C")
+
+    return pdf_ke_bytes(pdf)
+
+
+def pdf_neraca_saldo(df, bulan, tahun):
+    """Neraca Saldo; ``df`` bernomor urut mulai 1 dan berbaris Jumlah (lihat neraca_saldo_cetak)."""
+    pdf = FPDF()
+    pdf.add_page()
+
+    pdf.set_font("Arial", 'B', 14)
+    pdf.cell(0, 10, txt="Neraca Saldo BUMDes", ln=True, align="C")
+    pdf.set_font("Arial", '', 12)
+    pdf.cell(0, 8, txt=f"Periode: {nama_bulan(bulan)} {tahun}", ln=True, align="C")
+    pdf.ln(5)
+
+    pdf.set_font("Arial", 'B', 10)
+    col_widths = [15, 25, 70, 40, 40]
+    headers = ["No", "Ref", "Akun", "Debit (Rp)", "Kredit (Rp)"]
+
+    for i, header in enumerate(headers):
+        pdf.cell(col_widths[i], 10, header, border=1, align="C")
+    pdf.ln()
+
+    pdf.set_font("Arial", '', 9)
+    # Nilai 0 dicetak "-"
+    teks = {
+        col: format_rupiah_kolom(df[col]).where(rupiah(df[col]) != 0, "-")
+        for col in ["Debit (Rp)", "Kredit (Rp)"]
+    }
+    for idx, row in df.iterrows():
+        pdf.cell(col_widths[0], 8, str(idx), border=1, align="C")
+        pdf.cell(col_widths[1], 8, str(row["Ref"]), border=1, align="C")
+
+        akun = str(row["Akun"])
+        if len(akun) > 35:
+            akun = akun[:32] + "..."
+        pdf.cell(col_widths[2], 8, akun, border=1, align="L")
+
+        pdf.cell(col_widths[3], 8, teks["Debit (Rp)"][idx], border=1, align="R")
+        pdf.cell(col_widths[4], 8, teks["Kredit (Rp)"][idx], border=1, align="R")
+
+        pdf.ln()
+
+    pdf.ln(5)
+    pdf.set_font("Arial", 'I', 8)
+    pdf.cell(0, 5, txt="Dicetak dari Sistem Akuntansi BUMDes", ln=True, align="C")
+
+    return pdf_ke_bytes(pdf)
+
+
+def pdf_laba_rugi(df, bulan, tahun):
+    """Laporan Laba/Rugi dari tabel ``labarugi`` susun_laporan."""
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", 'B', 14)
+    pdf.cell(0, 10, txt="Laporan Laba/Rugi", ln=True, align="C")
+    pdf.set_font("Arial", '', 12)
+    pdf.cell(0, 8, txt="BUMDes", ln=True, align="C")
+    pdf.cell(0, 8, txt=f"Periode: {nama_bulan(bulan)} {tahun}", ln=True, align="C")
+    pdf.ln(5)
+    pdf.set_font("Arial", 'B', 10)
+    pdf.cell(90, 10, "Keterangan", border=1, align="C")
+    pdf.cell(45, 10, "Debit (Rp)", border=1, align="C")
+    pdf.cell(45, 10, "Kredit (Rp)", border=1, align="C")
+    pdf.ln()
+    pdf.set_font("Arial", '', 9)
+    debit_teks = format_rupiah_kolom(df["Debit"]).tolist()
+    kredit_teks = format_rupiah_kolom(df["Kredit"]).tolist()
+    tebal = baris_tebal(df["Keterangan"], pola="Total|Laba|Rugi")
+    for idx in range(len(df)):
+        row = df.iloc[idx]
+        is_bold = tebal[idx]
+        if is_bold:
+            pdf.set_font("Arial", 'B', 9)
+        ket = str(row["Keterangan"])[:40] + "..." if len(str(row["Keterangan"])) > 43 else str(row["Keterangan"])
+        pdf.cell(90, 8, ket, border=1, align="L")
+        pdf.cell(45, 8, debit_teks[idx], border=1, align="R")
+        pdf.cell(45, 8, kredit_teks[idx], border=1, align="R")
+        pdf.ln()
+        if is_bold:
+            pdf.set_font("Arial", '', 9)
+    pdf.ln(5)
+    pdf.set_font("Arial", 'I', 8)
+    pdf.cell(0, 5, txt="Dicetak dari Sistem Akuntansi BUMDes", ln=True, align="C")
+    return pdf_ke_bytes(pdf)
+
+
+def pdf_neraca(df, bulan, tahun):
+    """Laporan Neraca dari tabel ``neraca_lap`` susun_laporan."""
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", 'B', 14)
+    pdf.cell(0, 10, txt="Laporan Neraca", ln=True, align="C")
+    pdf.set_font("Arial", '', 12)
+    pdf.cell(0, 8, txt="BUMDes", ln=True, align="C")
+    pdf.cell(0, 8, txt=f"Periode: {nama_bulan(bulan)} {tahun}", ln=True, align="C")
+    pdf.ln(5)
+    pdf.set_font("Arial", 'B', 10)
+    col_widths = [60, 30, 60, 30]
+    for h in ["Aktiva", "Jumlah (Rp)", "Passiva", "Jumlah (Rp)"]:
+        pdf.cell(col_widths[0] if h == "Aktiva" else (col_widths[2] if h == "Passiva" else col_widths[1]), 10, h, border=1, align="C")
+    pdf.ln()
+    pdf.set_font("Arial", '', 9)
+    jumlah1 = format_rupiah_kolom(df["Jumlah1"]).tolist()
+    jumlah2 = format_rupiah_kolom(df["Jumlah2"]).tolist()
+    tebal = baris_tebal(df["Aktiva"], df["Passiva"], pola="Jml")
+    for idx in range(len(df)):
+        row = df.iloc[idx]
+        is_bold = tebal[idx]
+        if is_bold:
+            pdf.set_font("Arial", 'B', 9)
+        pdf.cell(col_widths[0], 8, str(row["Aktiva"]), border=1, align="L")
+        pdf.cell(col_widths[1], 8, jumlah1[idx], border=1, align="R")
+        pdf.cell(col_widths[2], 8, str(row["Passiva"]), border=1, align="L")
+        pdf.cell(col_widths[3], 8, jumlah2[idx], border=1, align="R")
+        pdf.ln()
+        if is_bold:
+            pdf.set_font("Arial", '', 9)
+    pdf.ln(5)
+    pdf.set_font("Arial", 'I', 8)
+    pdf.cell(0, 5, txt="Dicetak dari Sistem Akuntansi BUMDes", ln=True, align="C")
+    return pdf_ke_bytes(pdf)
+
+
+def pdf_arus_kas(df, bulan, tahun):
+    """Laporan Arus Kas dari tabel ``arus_kas`` susun_laporan."""
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", 'B', 14)
+    pdf.cell(0, 10, "Laporan Arus Kas", ln=True, align="C")
+    pdf.set_font("Arial", '', 12)
+    pdf.cell(0, 8, "BUMDes", ln=True, align="C")
+    pdf.cell(0, 8, f"Periode: {nama_bulan(bulan)} {tahun}", ln=True, align="C")
+    pdf.ln(5)
+    pdf.set_font("Arial", 'B', 10)
+    pdf.cell(120, 10, "Aktivitas", border=1, align="C")
+    pdf.cell(60, 10, "Jumlah (Rp)", border=1, align="C")
+    pdf.ln()
+    pdf.set_font("Arial", '', 9)
+    jumlah = format_rupiah_kolom(df["Jumlah"]).tolist()
+    tebal = baris_tebal(df["Aktivitas"], pola="Arus Kas")
+    for i in range(len(df)):
+        r = df.iloc[i]
+        is_bold = tebal[i]
+        if is_bold:
+            pdf.set_font("Arial", 'B', 9)
+        pdf.cell(120, 8, str(r["Aktivitas"])[:47], border=1, align="L")
+        pdf.cell(60, 8, jumlah[i], border=1, align="R")
+        pdf.ln()
+        if is_bold:
+            pdf.set_font("Arial", '', 9)
+    pdf.ln(5)
+    pdf.set_font("Arial", 'I', 8)
+    pdf.cell(0, 5, "Dicetak dari Sistem Akuntansi BUMDes", ln=True, align="C")
+    return pdf_ke_bytes(pdf)
+
+
+def pdf_buku_besar(buku_besar):
+    """Buku Besar semua akun; di atas ``BATAS_PDF_STREAMING`` transaksi dirender per halaman dengan reportlab."""
+    jumlah_trx = sum(len(a.get("transaksi", [])) for a in buku_besar.values())
+    if jumlah_trx > BATAS_PDF_STREAMING:
+        return pdf_buku_besar_stream(buku_besar)
+    return _pdf_buku_besar_fpdf(buku_besar)
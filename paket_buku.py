@@ -0,0 +1,104 @@
+"""Paket buku kolumnar (Parquet dalam ZIP) untuk rekap kantor kecamatan/analitik."""
+import io
+import json
+import zipfile
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from penyimpanan import KOLOM_JURNAL
+from skema_buku import parse_tanggal, rupiah, tampilan_tabel
+from akuntansi import buku_besar_kolumnar
+
+# === Paket buku kolumnar (Parquet) untuk rekap kantor kecamatan/analitik ===
+# 1 = Tanggal teks, uang float/int; 2 = Tanggal date32, kolom (Rp) selalu int64 rupiah
+VERSI_PAKET = 2
+TABEL_PAKET = [
+    "neraca_saldo", "pendapatan", "beban", "aktiva_lancar", "aktiva_tetap", "kewajiban",
+    "arus_kas_operasi", "arus_kas_investasi", "arus_kas_pendanaan", "bagan_akun",
+]
+
+
+def _tabel_arrow(df):
+    # Skema tetap: Tanggal date32 (kosong = null), kolom (Rp) int64 rupiah, sisanya teks; index tidak ikut
+    tampil = tampilan_tabel(df)
+    kolom = {}
+    for col in tampil.columns:
+        if col == "Tanggal":
+            kolom[col] = pa.array(parse_tanggal(df[col]), type=pa.date32(), from_pandas=True)
+        elif "(Rp)" in col:
+            kolom[col] = pa.array(rupiah(tampil[col]), type=pa.int64())
+        else:
+            kolom[col] = pa.array(tampil[col].fillna("").astype(str), type=pa.string())
+    return pa.table(kolom)
+
+
+def _tabel_pandas(tabel_arrow, versi):
+    df = tabel_arrow.to_pandas(date_as_object=False)
+    if versi < 2:
+        # Paket versi 1: uang bisa float; Tanggal teks diurai ketik_tabel di pemanggil
+        for col in df.columns:
+            if "(Rp)" in col:
+                df[col] = rupiah(df[col])
+    return df
+
+
+def buat_paket_buku(jurnal, tabel, modal_data):
+    """ZIP berisi satu berkas Parquet (zstd) per tabel plus ``manifest.json``.
+
+    Isi: jurnal (dengan ``_id``), buku_besar (transaksi datar, dibangun dari
+    jurnal), dan tabel laporan ``tabel`` ``{nama: DataFrame}``.
+    """
+    semua = {"jurnal": jurnal, "buku_besar": buku_besar_kolumnar(jurnal)}
+    semua.update({nama: df for nama, df in tabel.items() if isinstance(df, pd.DataFrame)})
+    manifest = {
+        "format": "bumdes-paket",
+        "versi": VERSI_PAKET,
+        "dibuat": pd.Timestamp.now().isoformat(timespec="seconds"),
+        "modal_data": modal_data,
+        "tabel": {},
+    }
+    buf = io.BytesIO()
+    # Parquet sudah terkompresi; ZIP hanya wadah
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_STORED) as zf:
+        for nama, df in semua.items():
+            tabel_arrow = _tabel_arrow(df)
+            isi = io.BytesIO()
+            pq.write_table(tabel_arrow, isi, compression="zstd")
+            zf.writestr(f"{nama}.parquet", isi.getvalue())
+            manifest["tabel"][nama] = {
+                "berkas": f"{nama}.parquet",
+                "baris": tabel_arrow.num_rows,
+                "kolom": {f.name: str(f.type) for f in tabel_arrow.schema},
+            }
+        zf.writestr("manifest.json", json.dumps(manifest, indent=2, default=str))
+    return buf.getvalue()
+
+
+def baca_paket_buku(berkas):
+    """Baca paket dari buat_paket_buku(); kembalikan (tabel ``{nama: DataFrame}``, manifest).
+
+    Buku besar di paket hanya untuk analitik; di aplikasi selalu dibangun ulang
+    dari jurnal, jadi tidak ikut dikembalikan.
+    """
+    try:
+        zf = zipfile.ZipFile(berkas)
+    except zipfile.BadZipFile:
+        raise ValueError("Berkas bukan paket buku (.zip).")
+    with zf:
+        try:
+            manifest = json.loads(zf.read("manifest.json"))
+        except KeyError:
+            raise ValueError("manifest.json tidak ada di paket.")
+        if manifest.get("format") != "bumdes-paket":
+            raise ValueError("Berkas bukan paket buku BUMDes.")
+        if manifest.get("versi", 0) > VERSI_PAKET:
+            raise ValueError(f"Versi paket {manifest['versi']} lebih baru dari aplikasi ini.")
+        tabel = {}
+        for nama, info in manifest["tabel"].items():
+            if nama != "jurnal" and nama not in TABEL_PAKET:
+                continue
+            with zf.open(info["berkas"]) as f:
+                tabel[nama] = _tabel_pandas(pq.read_table(f), manifest.get("versi", 1))
+    if "jurnal" not in tabel or any(c not in tabel["jurnal"] for c in KOLOM_JURNAL):
+        raise ValueError("Paket tidak berisi tabel jurnal yang lengkap.")
+    return tabel, manifest
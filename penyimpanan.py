@@ -0,0 +1,539 @@
+"""Penyimpanan permanen buku BUMDes (jurnal dan tabel laporan).
+
+Semua state aplikasi hidup di st.session_state dan hilang saat browser
+di-refresh atau server restart. Modul ini menyimpan isi buku ke backend
+yang bisa diganti; implementasi bawaan memakai SQLite lokal.
+
+Satu penyimpanan bisa memuat buku banyak unit BUMDes sekaligus; setiap
+tabel berkolom ``unit`` dan ``untuk_unit()`` memberi tampilan per unit
+yang tetap memakai koneksi yang sama.
+"""
+import copy
+import io
+import json
+import os
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+from skema_buku import rupiah, teks_tanggal
+
+KOLOM_JURNAL = ["Tanggal", "Keterangan", "Ref", "Akun", "Debit (Rp)", "Kredit (Rp)"]
+_KOLOM_DB = ["tanggal", "keterangan", "ref", "akun", "debit", "kredit"]
+_KOLOM_UANG = {"debit", "kredit", "saldo"}
+
+# Unit yang dipakai kalau tidak dipilih (dan tujuan isi database satu-unit lama)
+UNIT_DEFAULT = "utama"
+
+
+class PenyimpananBuku:
+    """Antarmuka backend penyimpanan.
+
+    Backend lain (mis. server database bersama) cukup mengimplementasikan
+    method di bawah lalu didaftarkan di ``JENIS_PENYIMPANAN``.
+    """
+
+    # Mode buku bersama: beberapa sesi menulis jurnal yang sama (lihat simpan_jurnal_bersama)
+    bersama = False
+    # Unit BUMDes yang dibaca/ditulis objek ini
+    unit = UNIT_DEFAULT
+
+    def untuk_unit(self, kode):
+        """Tampilan penyimpanan ini untuk unit ``kode`` (koneksi dan kunci dipakai bersama)."""
+        tampilan = copy.copy(self)
+        tampilan.unit = kode
+        return tampilan
+
+    def daftar_unit(self):
+        """Daftar ``(kode, nama)`` unit yang terdaftar, urut kode."""
+        return [(UNIT_DEFAULT, "Unit Utama")]
+
+    def simpan_unit(self, kode, nama):
+        """Daftarkan (atau ganti nama) unit ``kode``."""
+        raise NotImplementedError
+
+    def muat_jurnal(self):
+        """Kembalikan DataFrame jurnal, atau None kalau belum ada isinya."""
+        raise NotImplementedError
+
+    def revisi_jurnal(self):
+        """Nomor revisi jurnal terakhir (naik setiap kali ada sesi yang menulis)."""
+        raise NotImplementedError
+
+    def tarik_jurnal(self, sejak):
+        """Perubahan jurnal setelah revisi ``sejak``.
+
+        Mengembalikan (revisi sekarang, DataFrame baris yang ditulis berkolom
+        KOLOM_JURNAL + ``_id`` + ``_versi`` urut posisi, daftar id yang dihapus,
+        daftar semua id urut posisi kalau urutan baris diubah sesi lain sejak
+        ``sejak`` atau None).
+        """
+        raise NotImplementedError
+
+    def simpan_jurnal_bersama(self, df, perubahan, versi):
+        """Simpan hasil diff_tabel() dengan penguncian optimistis per baris.
+
+        ``versi`` = ``{id: versi}`` yang dilihat sesi saat membaca. Baris yang
+        versinya di penyimpanan sudah lain (diubah/dihapus sesi lain) tidak
+        ditulis dan dilaporkan sebagai konflik. Kalau ``perubahan["geser"]``,
+        urutan baris di penyimpanan mengikuti ``df`` (baris sesi lain yang belum
+        ditarik tetap di belakang). Mengembalikan
+        ``{"versi": {id: versi baru}, "konflik": [id]}``.
+        """
+        raise NotImplementedError
+
+    def simpan_jurnal(self, df, perubahan=None):
+        """Simpan jurnal. ``perubahan`` adalah hasil diff_tabel() (per ``_id``); None = tulis ulang semua."""
+        raise NotImplementedError
+
+    def muat_tabel(self, nama):
+        """Kembalikan tabel laporan (DataFrame/dict) bernama ``nama``, atau None."""
+        raise NotImplementedError
+
+    def simpan_tabel(self, tabel):
+        """Simpan beberapa tabel laporan ``{nama: DataFrame/dict}`` dalam satu transaksi."""
+        raise NotImplementedError
+
+    def muat_snapshot(self):
+        """Kembalikan cache snapshot saldo akhir bulan (lihat perbarui_snapshot), atau None."""
+        return None
+
+    def simpan_snapshot(self, cache, bulan):
+        """Simpan snapshot/mutasi untuk kode ``bulan`` yang berubah."""
+
+    def tutup(self):
+        pass
+
+
+# Versi skema SQLite (PRAGMA user_version); 2 = semua tabel berkolom unit, 3 = uang INTEGER rupiah
+VERSI_SKEMA = 3
+_TABEL_UNIT = ["jurnal", "jurnal_hapus", "revisi_jurnal", "tabel_laporan", "snapshot_bulan", "snapshot_saldo"]
+
+
+class PenyimpananSQLite(PenyimpananBuku):
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        # Satu koneksi dipakai bersama semua sesi Streamlit (thread berbeda)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._buat_skema()
+
+    def _buat_skema(self):
+        with self._lock, self._conn:
+            versi_skema = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            ada = {r[0] for r in self._conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            lama = []
+            if versi_skema < VERSI_SKEMA:
+                # Tabel skema lama dipindah dulu; isinya disalin ke skema baru di bawah
+                for nama in _TABEL_UNIT:
+                    if nama in ada:
+                        # Indeks ikut tabel yang dipindah; dibuang supaya dibuat ulang untuk tabel baru
+                        for (indeks,) in self._conn.execute(
+                            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+                            (nama,),
+                        ).fetchall():
+                            self._conn.execute(f"DROP INDEX {indeks}")
+                        self._conn.execute(f"ALTER TABLE {nama} RENAME TO {nama}_lama")
+                        lama.append(nama)
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS unit (
+                    kode TEXT PRIMARY KEY,
+                    nama TEXT NOT NULL DEFAULT ''
+                );
+
+                CREATE TABLE IF NOT EXISTS jurnal (
+                    unit       TEXT NOT NULL,
+                    id         TEXT NOT NULL,
+                    urutan     INTEGER NOT NULL,
+                    tanggal    TEXT NOT NULL DEFAULT '',
+                    keterangan TEXT NOT NULL DEFAULT '',
+                    ref        TEXT NOT NULL DEFAULT '',
+                    akun       TEXT NOT NULL DEFAULT '',
+                    debit      INTEGER NOT NULL DEFAULT 0,
+                    kredit     INTEGER NOT NULL DEFAULT 0,
+                    versi      INTEGER NOT NULL DEFAULT 0,  -- revisi terakhir yang menulis baris ini
+                    PRIMARY KEY (unit, id)
+                );
+                -- Semua query jurnal disaring per unit, jadi unit selalu kolom pertama indeks
+                CREATE INDEX IF NOT EXISTS idx_jurnal_unit_urutan ON jurnal (unit, urutan);
+                CREATE INDEX IF NOT EXISTS idx_jurnal_unit_versi ON jurnal (unit, versi);
+                CREATE INDEX IF NOT EXISTS idx_jurnal_unit_tanggal ON jurnal (unit, tanggal);
+                CREATE INDEX IF NOT EXISTS idx_jurnal_unit_ref ON jurnal (unit, ref);
+                CREATE INDEX IF NOT EXISTS idx_jurnal_unit_akun ON jurnal (unit, akun);
+
+                -- Jejak baris terhapus supaya sesi lain ikut menghapusnya
+                CREATE TABLE IF NOT EXISTS jurnal_hapus (
+                    unit  TEXT NOT NULL,
+                    id    TEXT NOT NULL,
+                    versi INTEGER NOT NULL,
+                    PRIMARY KEY (unit, id)
+                );
+                CREATE INDEX IF NOT EXISTS idx_jurnal_hapus_unit_versi ON jurnal_hapus (unit, versi);
+                CREATE TABLE IF NOT EXISTS revisi_jurnal (
+                    unit  TEXT PRIMARY KEY,
+                    nilai INTEGER NOT NULL
+                );
+                -- Revisi terakhir yang mengubah urutan baris (buku bersama: sesi lain ikut menyusun ulang)
+                CREATE TABLE IF NOT EXISTS urutan_jurnal (
+                    unit  TEXT PRIMARY KEY,
+                    versi INTEGER NOT NULL
+                );
+
+                CREATE TABLE IF NOT EXISTS tabel_laporan (
+                    unit TEXT NOT NULL,
+                    nama TEXT NOT NULL,
+                    isi  TEXT NOT NULL,
+                    PRIMARY KEY (unit, nama)
+                );
+
+                -- Snapshot saldo akhir bulan; bulan = tahun*12 + (bulan-1)
+                CREATE TABLE IF NOT EXISTS snapshot_bulan (
+                    unit  TEXT NOT NULL,
+                    bulan INTEGER NOT NULL,
+                    hash  TEXT NOT NULL,
+                    PRIMARY KEY (unit, bulan)
+                );
+                CREATE TABLE IF NOT EXISTS snapshot_saldo (
+                    unit      TEXT NOT NULL,
+                    bulan     INTEGER NOT NULL,
+                    jenis     TEXT NOT NULL,  -- 'mutasi' atau 'saldo'
+                    urutan    INTEGER NOT NULL,
+                    kunci     TEXT NOT NULL,
+                    nama_akun TEXT NOT NULL DEFAULT '',
+                    saldo     INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (unit, bulan, jenis, kunci)
+                );
+            """)
+            if lama:
+                self._salin_skema_lama(lama)
+            self._conn.execute("INSERT OR IGNORE INTO unit (kode, nama) VALUES (?, ?)", (UNIT_DEFAULT, "Unit Utama"))
+            self._conn.execute(f"PRAGMA user_version = {VERSI_SKEMA}")
+
+    def _salin_skema_lama(self, lama):
+        # Isi tabel skema lama disalin kolom demi kolom: database satu-unit jadi
+        # buku UNIT_DEFAULT, uang REAL dibulatkan ke rupiah bulat
+        for nama in lama:
+            kolom_lama = {r[1] for r in self._conn.execute(f"PRAGMA table_info({nama}_lama)")}
+            kolom, pilih, param = [], [], []
+            for col in (r[1] for r in self._conn.execute(f"PRAGMA table_info({nama})")):
+                if col in _KOLOM_UANG:
+                    pilih.append(f"CAST(ROUND({col}) AS INTEGER)")
+                elif col in kolom_lama:
+                    pilih.append(col)
+                elif col == "unit":
+                    pilih.append("?")
+                    param.append(UNIT_DEFAULT)
+                elif col == "id":
+                    # Jurnal versi awal dikunci per urutan (tanpa id)
+                    pilih.append("printf('%016x', random() & 9223372036854775807)")
+                else:
+                    continue
+                kolom.append(col)
+            self._conn.execute(
+                f"INSERT INTO {nama} ({', '.join(kolom)}) SELECT {', '.join(pilih)} FROM {nama}_lama", param
+            )
+            self._conn.execute(f"DROP TABLE {nama}_lama")
+
+    # --- Unit ---
+    def daftar_unit(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT kode, nama FROM unit ORDER BY kode").fetchall()
+        return rows
+
+    def simpan_unit(self, kode, nama):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO unit (kode, nama) VALUES (?, ?) ON CONFLICT (kode) DO UPDATE SET nama = excluded.nama",
+                (kode, nama),
+            )
+
+    # --- Jurnal ---
+    def muat_jurnal(self):
+        with self._lock:
+            df = pd.read_sql_query(
+                f"SELECT {', '.join(_KOLOM_DB)}, id FROM jurnal WHERE unit = ? ORDER BY urutan",
+                self._conn, params=(self.unit,),
+            )
+        if df.empty:
+            return None
+        df.columns = KOLOM_JURNAL + ["_id"]
+        return df
+
+    @staticmethod
+    def _baris_db(df, posisi):
+        bagian = df.iloc[posisi] if posisi is not None else df
+        kolom = []
+        for col in KOLOM_JURNAL:
+            if col not in bagian:
+                nilai = pd.Series("" if col in KOLOM_JURNAL[:4] else 0, index=bagian.index)
+            elif col in KOLOM_JURNAL[:4]:
+                nilai = teks_tanggal(bagian[col]) if col == "Tanggal" else bagian[col].map(
+                    lambda x: "" if pd.isna(x) else str(x)
+                )
+            else:
+                nilai = rupiah(bagian[col])
+            kolom.append(nilai.tolist())
+        urutan = range(len(df)) if posisi is None else posisi
+        return list(zip(bagian["_id"].tolist(), urutan, *kolom))
+
+    def _naikkan_revisi(self):
+        # Dipanggil di dalam transaksi tulis; satu revisi per penyimpanan per unit
+        self._conn.execute(
+            "INSERT INTO revisi_jurnal (unit, nilai) VALUES (?, 1) "
+            "ON CONFLICT (unit) DO UPDATE SET nilai = nilai + 1",
+            (self.unit,),
+        )
+        return self._revisi()
+
+    def _revisi(self):
+        row = self._conn.execute("SELECT nilai FROM revisi_jurnal WHERE unit = ?", (self.unit,)).fetchone()
+        return row[0] if row else 0
+
+    def simpan_jurnal(self, df, perubahan=None):
+        sql_upsert = (
+            f"INSERT OR REPLACE INTO jurnal (unit, id, urutan, {', '.join(_KOLOM_DB)}, versi) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+        )
+        unit = self.unit
+        with self._lock, self._conn:
+            revisi = self._naikkan_revisi()
+            if perubahan is None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO jurnal_hapus (unit, id, versi) SELECT unit, id, ? FROM jurnal WHERE unit = ?",
+                    (revisi, unit),
+                )
+                self._conn.execute("DELETE FROM jurnal WHERE unit = ?", (unit,))
+                self._conn.executemany(sql_upsert, [(unit, *b, revisi) for b in self._baris_db(df, None)])
+                return
+            if perubahan["hapus"]:
+                self._conn.executemany(
+                    "DELETE FROM jurnal WHERE unit = ? AND id = ?", [(unit, i) for i in perubahan["hapus"]]
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO jurnal_hapus (unit, id, versi) VALUES (?, ?, ?)",
+                    [(unit, i, revisi) for i in perubahan["hapus"]],
+                )
+            if perubahan.get("geser"):
+                # Baris yang tetap ada ikut bergeser posisinya; perbarui urutannya saja
+                self._conn.executemany(
+                    "UPDATE jurnal SET urutan = ? WHERE unit = ? AND id = ?",
+                    ((u, unit, i) for u, i in enumerate(df["_id"].tolist())),
+                )
+            posisi = pd.Index(df["_id"], dtype=object).get_indexer(perubahan["ubah"] + perubahan["tambah"])
+            if len(posisi):
+                self._conn.executemany(
+                    sql_upsert, [(unit, *b, revisi) for b in self._baris_db(df, sorted(posisi.tolist()))]
+                )
+
+    def revisi_jurnal(self):
+        with self._lock:
+            return self._revisi()
+
+    def tarik_jurnal(self, sejak):
+        with self._lock:
+            # Satu transaksi baca supaya revisi, baris, dan jejak hapus konsisten
+            self._conn.execute("BEGIN")
+            try:
+                revisi = self._revisi()
+                # sejak=0 = seluruh jurnal, termasuk baris versi 0 dari database lama
+                df = pd.read_sql_query(
+                    f"SELECT {', '.join(_KOLOM_DB)}, id, versi FROM jurnal "
+                    "WHERE unit = ? AND versi > ? ORDER BY urutan",
+                    self._conn, params=(self.unit, sejak if sejak > 0 else -1),
+                )
+                hapus = [r[0] for r in self._conn.execute(
+                    "SELECT id FROM jurnal_hapus WHERE unit = ? AND versi > ?", (self.unit, sejak)
+                )]
+                urutan = None
+                if sejak > 0 and self._conn.execute(
+                    "SELECT 1 FROM urutan_jurnal WHERE unit = ? AND versi > ?", (self.unit, sejak)
+                ).fetchone():
+                    urutan = [r[0] for r in self._conn.execute(
+                        "SELECT id FROM jurnal WHERE unit = ? ORDER BY urutan", (self.unit,)
+                    )]
+            finally:
+                self._conn.execute("COMMIT")
+        df.columns = KOLOM_JURNAL + ["_id", "_versi"]
+        return revisi, df, hapus, urutan
+
+    def simpan_jurnal_bersama(self, df, perubahan, versi):
+        sql_ubah = (
+            f"UPDATE jurnal SET {', '.join(f'{k} = ?' for k in _KOLOM_DB)}, versi = ? "
+            "WHERE unit = ? AND id = ? AND versi = ?"
+        )
+        sql_tambah = (
+            f"INSERT INTO jurnal (unit, id, urutan, {', '.join(_KOLOM_DB)}, versi) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+        )
+        unit = self.unit
+        index_id = pd.Index(df["_id"], dtype=object)
+        konflik, versi_baru = [], {}
+        with self._lock, self._conn:
+            revisi = self._naikkan_revisi()
+            # Ubah: hanya kalau baris belum disentuh sesi lain sejak dibaca
+            posisi = index_id.get_indexer(perubahan["ubah"])
+            for baris in self._baris_db(df, sorted(posisi[posisi >= 0].tolist())):
+                id_baris = baris[0]
+                cur = self._conn.execute(sql_ubah, (*baris[2:], revisi, unit, id_baris, versi.get(id_baris, -1)))
+                if cur.rowcount:
+                    versi_baru[id_baris] = revisi
+                else:
+                    konflik.append(id_baris)
+            # Hapus: baris yang sudah dihapus sesi lain bukan konflik, yang sudah diubah iya
+            for id_baris in perubahan["hapus"]:
+                cur = self._conn.execute(
+                    "DELETE FROM jurnal WHERE unit = ? AND id = ? AND versi = ?",
+                    (unit, id_baris, versi.get(id_baris, -1)),
+                )
+                if cur.rowcount:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO jurnal_hapus (unit, id, versi) VALUES (?, ?, ?)",
+                        (unit, id_baris, revisi),
+                    )
+                elif self._conn.execute(
+                    "SELECT 1 FROM jurnal WHERE unit = ? AND id = ?", (unit, id_baris)
+                ).fetchone():
+                    konflik.append(id_baris)
+            # Tambah: id acak tidak bisa bentrok; baris baru selalu di ujung jurnal
+            posisi = index_id.get_indexer(perubahan["tambah"])
+            if len(posisi):
+                mulai = self._conn.execute(
+                    "SELECT COALESCE(MAX(urutan), -1) + 1 FROM jurnal WHERE unit = ?", (unit,)
+                ).fetchone()[0]
+                baris_baru = self._baris_db(df, sorted(posisi[posisi >= 0].tolist()))
+                self._conn.executemany(
+                    sql_tambah, [(unit, b[0], mulai + k, *b[2:], revisi) for k, b in enumerate(baris_baru)]
+                )
+                versi_baru.update((b[0], revisi) for b in baris_baru)
+            if perubahan.get("geser"):
+                # Urutan bukan isi baris: tidak dikunci per versi, tulisan terakhir yang berlaku
+                sekarang = [
+                    r[0] for r in self._conn.execute("SELECT id FROM jurnal WHERE unit = ? ORDER BY urutan", (unit,))
+                ]
+                ada = set(sekarang)
+                ids = [i for i in df["_id"].tolist() if i in ada]
+                milik_sesi = set(ids)
+                urutan = ids + [i for i in sekarang if i not in milik_sesi]
+                # Hapus/sisip di tengah juga menandai geser; tulis hanya kalau urutan memang berubah
+                if urutan != sekarang:
+                    self._conn.executemany(
+                        "UPDATE jurnal SET urutan = ? WHERE unit = ? AND id = ?",
+                        ((u, unit, i) for u, i in enumerate(urutan)),
+                    )
+                    self._conn.execute(
+                        "INSERT INTO urutan_jurnal (unit, versi) VALUES (?, ?) "
+                        "ON CONFLICT (unit) DO UPDATE SET versi = excluded.versi",
+                        (unit, revisi),
+                    )
+        return {"versi": versi_baru, "konflik": konflik}
+
+    # --- Tabel laporan ---
+    def muat_tabel(self, nama):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT isi FROM tabel_laporan WHERE unit = ? AND nama = ?", (self.unit, nama)
+            ).fetchone()
+        if row is None:
+            return None
+        isi = json.loads(row[0])
+        if isi.get("jenis") == "dataframe":
+            return pd.read_json(
+                io.StringIO(isi["data"]), orient="split", dtype=False, convert_dates=False
+            )
+        return isi["data"]
+
+    def simpan_tabel(self, tabel):
+        rows = []
+        for nama, obj in tabel.items():
+            if isinstance(obj, pd.DataFrame):
+                isi = {"jenis": "dataframe", "data": obj.to_json(orient="split")}
+            else:
+                isi = {"jenis": "json", "data": obj}
+            rows.append((self.unit, nama, json.dumps(isi)))
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO tabel_laporan (unit, nama, isi) VALUES (?, ?, ?)", rows
+            )
+
+    # --- Snapshot saldo akhir bulan ---
+    def muat_snapshot(self):
+        with self._lock:
+            hash_rows = self._conn.execute(
+                "SELECT bulan, hash FROM snapshot_bulan WHERE unit = ?", (self.unit,)
+            ).fetchall()
+            df = pd.read_sql_query(
+                "SELECT bulan, jenis, kunci, nama_akun, saldo FROM snapshot_saldo "
+                "WHERE unit = ? ORDER BY bulan, jenis, urutan",
+                self._conn, params=(self.unit,),
+            )
+        if not hash_rows:
+            return None
+        cache = {"hash": {b: int(h) for b, h in hash_rows}, "mutasi": {}, "snapshot": {}}
+        tujuan = {"mutasi": cache["mutasi"], "saldo": cache["snapshot"]}
+        for (bulan, jenis), bagian in df.groupby(["bulan", "jenis"], sort=False):
+            tujuan[jenis][int(bulan)] = (
+                bagian.set_index("kunci")[["nama_akun", "saldo"]].rename_axis(None).astype({"saldo": np.int64})
+            )
+        return cache
+
+    def simpan_snapshot(self, cache, bulan):
+        # Snapshot selalu disusun ulang mulai bulan paling awal yang berubah
+        mulai = min(bulan)
+        rows = []
+        for jenis, isi in (("mutasi", cache["mutasi"]), ("saldo", cache["snapshot"])):
+            for b, df in isi.items():
+                if jenis == "mutasi" and b not in bulan or b < mulai:
+                    continue
+                rows.extend(
+                    (self.unit, b, jenis, i, str(k), str(n), int(v))
+                    for i, (k, n, v) in enumerate(zip(df.index, df["nama_akun"], df["saldo"]))
+                )
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM snapshot_bulan WHERE unit = ?", (self.unit,))
+            self._conn.executemany(
+                "INSERT INTO snapshot_bulan (unit, bulan, hash) VALUES (?, ?, ?)",
+                [(self.unit, b, str(h)) for b, h in cache["hash"].items()],
+            )
+            self._conn.executemany(
+                "DELETE FROM snapshot_saldo WHERE unit = ? AND bulan = ? AND jenis = 'mutasi'",
+                [(self.unit, b) for b in bulan],
+            )
+            self._conn.execute(
+                "DELETE FROM snapshot_saldo WHERE unit = ? AND bulan >= ? AND jenis = 'saldo'", (self.unit, mulai)
+            )
+            self._conn.executemany(
+                "INSERT INTO snapshot_saldo (unit, bulan, jenis, urutan, kunci, nama_akun, saldo) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def tutup(self):
+        with self._lock:
+            self._conn.close()
+
+
+JENIS_PENYIMPANAN = {
+    "sqlite": PenyimpananSQLite,
+}
+
+
+def buka_penyimpanan(alamat=None):
+    """Buka backend dari alamat ``jenis:lokasi`` (default dari env BUMDES_PENYIMPANAN).
+
+    Contoh: ``sqlite:bumdes.db``. Alamat ``none`` mematikan penyimpanan.
+    Env BUMDES_BUKU_BERSAMA=1 menyalakan mode buku bersama (beberapa
+    pengguna mengedit jurnal yang sama, dengan penguncian optimistis).
+    """
+    alamat = alamat or os.environ.get("BUMDES_PENYIMPANAN", "sqlite:bumdes.db")
+    if alamat == "none":
+        return None
+    jenis, _, lokasi = alamat.partition(":")
+    if jenis not in JENIS_PENYIMPANAN:
+        raise ValueError(f"Jenis penyimpanan tidak dikenal: {jenis}")
+    penyimpanan = JENIS_PENYIMPANAN[jenis](lokasi)
+    penyimpanan.bersama = os.environ.get("BUMDES_BUKU_BERSAMA", "0") == "1"
+    return penyimpanan
@@ -0,0 +1,69 @@
+"""Pengukuran waktu per tahap satu rerun aplikasi (tanpa Streamlit).
+
+Tiap rerun membuat satu ProfilRerun; tahap yang mahal (AgGrid, buku besar,
+sinkron neraca saldo, tabel hasil, PDF, simpan) dibungkus ``ukur(nama)``.
+Hasilnya bisa ditampilkan sebagai tabel atau ditulis sebagai satu baris JSON
+per rerun ke berkas metrik (env BUMDES_METRIK), untuk dibandingkan sebelum/
+sesudah optimasi atau dicari regresinya di produksi.
+"""
+import json
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+
+class ProfilRerun:
+    """Catatan ``{tahap, ms, baris}`` berurutan selesai; tahap boleh bersarang dan berulang."""
+
+    def __init__(self):
+        self.waktu = datetime.now().isoformat(timespec="seconds")
+        self._mulai = time.perf_counter()
+        self.catatan = []
+        self.total_ms = None
+
+    @contextmanager
+    def ukur(self, nama, baris=None):
+        """Ukur blok ``with``; ``baris`` boleh diisi belakangan lewat ``catatan["baris"]``."""
+        catatan = {"tahap": nama, "ms": 0.0, "baris": baris}
+        mulai = time.perf_counter()
+        try:
+            yield catatan
+        finally:
+            catatan["ms"] = round((time.perf_counter() - mulai) * 1000, 2)
+            self.catatan.append(catatan)
+
+    def selesai(self):
+        self.total_ms = round((time.perf_counter() - self._mulai) * 1000, 2)
+        return self.total_ms
+
+    def per_tahap(self):
+        """``{tahap: {"ms", "panggilan", "baris"}}`` dijumlah per nama, urut kemunculan."""
+        hasil = {}
+        for c in self.catatan:
+            tahap = hasil.setdefault(c["tahap"], {"ms": 0.0, "panggilan": 0, "baris": None})
+            tahap["ms"] = round(tahap["ms"] + c["ms"], 2)
+            tahap["panggilan"] += 1
+            if c["baris"] is not None:
+                tahap["baris"] = (tahap["baris"] or 0) + int(c["baris"])
+        return hasil
+
+    def ringkasan(self):
+        """Baris tabel per tahap (list dict) plus total rerun."""
+        baris = [
+            {"Tahap": nama, "Waktu (ms)": t["ms"], "Panggilan": t["panggilan"], "Baris": t["baris"]}
+            for nama, t in self.per_tahap().items()
+        ]
+        total = self.total_ms if self.total_ms is not None else self.selesai()
+        baris.append({"Tahap": "Total rerun", "Waktu (ms)": total, "Panggilan": 1, "Baris": None})
+        return baris
+
+    def sebagai_json(self, **info):
+        """Satu rekaman metrik: waktu, total, tahap, plus ``info`` (unit, jumlah baris jurnal, ...)."""
+        total = self.total_ms if self.total_ms is not None else self.selesai()
+        return {"waktu": self.waktu, **info, "total_ms": total, "tahap": self.per_tahap()}
+
+
+def tulis_metrik(path, rekaman):
+    """Tambahkan satu rekaman sebagai satu baris JSON; sesi lain boleh menulis ke berkas yang sama."""
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(rekaman, ensure_ascii=False) + "\n")
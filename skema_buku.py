@@ -0,0 +1,109 @@
+"""Skema bertipe tabel buku BUMDes.
+
+Jurnal disimpan di sesi dengan kolom bertipe tetap: uang sebagai int64
+rupiah, tanggal datetime64, Ref/Akun kategori, Keterangan string. Tabel
+laporan cukup kolom uangnya saja yang dibuat int64. Grid, PDF, dan
+penyimpanan tetap menerima/mengirim teks lewat ``tampilan_tabel`` dan
+``teks_tanggal``.
+"""
+import numpy as np
+import pandas as pd
+
+SKEMA_JURNAL = {
+    "Tanggal": "datetime64[ns]",
+    "Keterangan": "str",
+    "Ref": "category",
+    "Akun": "category",
+    "Debit (Rp)": "int64",
+    "Kredit (Rp)": "int64",
+}
+
+
+def parse_tanggal(seri):
+    # Tanggal diketik bebas: coba ISO (2025-01-31) dulu, sisanya format Indonesia (31/01/2025)
+    if pd.api.types.is_datetime64_dtype(seri.dtype):
+        return seri.astype("datetime64[ns]")
+    iso = pd.to_datetime(seri, errors="coerce", format="ISO8601")
+    sisa = iso.isna() & seri.notna()
+    if sisa.any():
+        lain = pd.to_datetime(seri[sisa].astype(str), errors="coerce", dayfirst=True, format="mixed")
+        iso = iso.where(~sisa, lain)
+    return iso.astype("datetime64[ns]")
+
+
+def teks_tanggal(seri):
+    """Tanggal sebagai teks ``YYYY-MM-DD`` ("" untuk tanggal kosong), tanpa strftime per baris."""
+    if not pd.api.types.is_datetime64_dtype(seri.dtype):
+        return seri.map(lambda x: "" if pd.isna(x) else str(x)).astype(object)
+    nilai = seri.to_numpy().astype("datetime64[D]")
+    teks = nilai.astype(str).astype(object)
+    teks[np.isnat(nilai)] = ""
+    return pd.Series(teks, index=seri.index, dtype=object)
+
+
+def rupiah(seri):
+    """Kolom uang sebagai int64 rupiah (isian kosong/tak terbaca = 0)."""
+    if seri.dtype == np.int64:
+        return seri
+    return pd.to_numeric(seri, errors="coerce").fillna(0).round().astype(np.int64)
+
+
+def _teks(seri):
+    return seri.astype(object).where(seri.notna(), "").astype(str)
+
+
+def ikuti_tipe(df, skema):
+    """Ubah kolom ``df`` ke tipe di ``skema`` (``{kolom: dtype}`` atau ``contoh.dtypes``).
+
+    Kolom yang tipenya sudah sama dibiarkan; objek yang sama dikembalikan
+    kalau tidak ada yang perlu diubah.
+    """
+    ganti = {}
+    for col, tipe in dict(skema).items():
+        if col not in df or col == "_id":
+            continue
+        seri = df[col]
+        tipe = pd.api.types.pandas_dtype(tipe) if isinstance(tipe, str) and tipe != "category" else tipe
+        if isinstance(tipe, pd.CategoricalDtype) or tipe == "category":
+            # Isi kategori boleh beda (mis. baris baru dari grid); cukup sama-sama kategori
+            if not isinstance(seri.dtype, pd.CategoricalDtype):
+                ganti[col] = _teks(seri).astype("category")
+        elif seri.dtype == tipe:
+            continue
+        elif pd.api.types.is_datetime64_dtype(tipe):
+            ganti[col] = parse_tanggal(seri)
+        elif tipe == np.int64:
+            ganti[col] = rupiah(seri)
+        elif pd.api.types.is_string_dtype(tipe) and not pd.api.types.is_object_dtype(tipe):
+            ganti[col] = _teks(seri).astype(tipe)
+    if not ganti:
+        return df
+    df = df.copy(deep=False)
+    for col, seri in ganti.items():
+        df[col] = seri
+    return df
+
+
+def skema_tabel(df):
+    """Skema untuk tabel ``df``: jurnal pakai ``SKEMA_JURNAL``, tabel lain hanya kolom uangnya."""
+    if all(col in df for col in SKEMA_JURNAL):
+        return SKEMA_JURNAL
+    return {col: "int64" for col in df.columns if "(Rp)" in col}
+
+
+def ketik_tabel(df):
+    """Terapkan ``skema_tabel`` ke ``df`` (objek sama kalau sudah bertipe)."""
+    if df is None:
+        return df
+    return ikuti_tipe(df, skema_tabel(df))
+
+
+def tampilan_tabel(df):
+    """Salinan untuk grid/tampilan/PDF: tanggal jadi teks, kategori jadi teks biasa."""
+    tampil = df.copy(deep=False)
+    for col in tampil.columns:
+        if pd.api.types.is_datetime64_dtype(tampil[col].dtype):
+            tampil[col] = teks_tanggal(tampil[col])
+        elif isinstance(tampil[col].dtype, pd.CategoricalDtype):
+            tampil[col] = tampil[col].astype(object)
+    return tampil
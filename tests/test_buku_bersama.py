@@ -0,0 +1,130 @@
+import pandas as pd
+
+from akuntansi import diff_tabel
+from benchmark_buku import periksa_buku_bersama, simulasi_buku_bersama
+from penyimpanan import KOLOM_JURNAL, PenyimpananSQLite
+
+
+def _jurnal(ids):
+    return pd.DataFrame({
+        "Tanggal": ["2025-01-02"] * len(ids),
+        "Keterangan": [f"Voucher {i}" for i in ids],
+        "Ref": ["101"] * len(ids),
+        "Akun": ["Kas"] * len(ids),
+        "Debit (Rp)": [1000] * len(ids),
+        "Kredit (Rp)": [0] * len(ids),
+        "_id": ids,
+    })
+
+
+def _buka(tmp_path):
+    penyimpanan = PenyimpananSQLite(str(tmp_path / "bersama.db"))
+    penyimpanan.bersama = True
+    return penyimpanan
+
+
+def _simpan(penyimpanan, lama, baru, versi):
+    hasil = penyimpanan.simpan_jurnal_bersama(baru, diff_tabel(lama, baru), versi)
+    versi.update(hasil["versi"])
+    return hasil
+
+
+def _tarik_semua(penyimpanan):
+    _, df, _, _ = penyimpanan.tarik_jurnal(0)
+    return df["_id"].tolist()
+
+
+def test_geser_tersimpan_dan_sampai_ke_sesi_lain(tmp_path):
+    penyimpanan = _buka(tmp_path)
+    awal = _jurnal(["a", "b", "c", "d"])
+    versi = {}
+    _simpan(penyimpanan, awal.iloc[:0], awal, versi)
+    revisi_sesi_lain = penyimpanan.revisi_jurnal()
+
+    urut = awal.iloc[[2, 0, 3, 1]].reset_index(drop=True)
+    hasil = _simpan(penyimpanan, awal, urut, versi)
+
+    assert hasil["konflik"] == []
+    assert _tarik_semua(penyimpanan) == ["c", "a", "d", "b"]
+    assert penyimpanan.muat_jurnal()["_id"].tolist() == ["c", "a", "d", "b"]
+    _, berubah, hapus, urutan = penyimpanan.tarik_jurnal(revisi_sesi_lain)
+    # Urutan bukan isi baris: versi baris tidak naik, sesi lain cukup menerima urutannya
+    assert berubah.empty and hapus == []
+    assert urutan == ["c", "a", "d", "b"]
+    penyimpanan.tutup()
+
+
+def test_hapus_di_tengah_tidak_menulis_urutan(tmp_path):
+    penyimpanan = _buka(tmp_path)
+    awal = _jurnal(["a", "b", "c"])
+    versi = {}
+    _simpan(penyimpanan, awal.iloc[:0], awal, versi)
+    revisi = penyimpanan.revisi_jurnal()
+
+    baru = awal.iloc[[0, 2]].reset_index(drop=True)
+    assert diff_tabel(awal, baru)["geser"]
+    _simpan(penyimpanan, awal, baru, versi)
+
+    assert _tarik_semua(penyimpanan) == ["a", "c"]
+    assert penyimpanan.tarik_jurnal(revisi)[3] is None
+    penyimpanan.tutup()
+
+
+def test_geser_menyisakan_baris_sesi_lain_di_belakang(tmp_path):
+    penyimpanan = _buka(tmp_path)
+    awal = _jurnal(["a", "b", "c"])
+    versi_a, versi_b = {}, {}
+    _simpan(penyimpanan, awal.iloc[:0], awal, versi_a)
+    versi_b.update(versi_a)
+
+    # Sesi B menambah baris yang belum ditarik sesi A
+    tambah_b = pd.concat([awal, _jurnal(["x"])], ignore_index=True)
+    _simpan(penyimpanan, awal, tambah_b, versi_b)
+    urut_a = awal.iloc[[2, 1, 0]].reset_index(drop=True)
+    _simpan(penyimpanan, awal, urut_a, versi_a)
+
+    assert _tarik_semua(penyimpanan) == ["c", "b", "a", "x"]
+    penyimpanan.tutup()
+
+
+def test_ubah_bersamaan_jadi_konflik(tmp_path):
+    penyimpanan = _buka(tmp_path)
+    awal = _jurnal(["a", "b"])
+    versi_a = {}
+    _simpan(penyimpanan, awal.iloc[:0], awal, versi_a)
+    versi_b = dict(versi_a)
+
+    ubah_a = awal.assign(Keterangan=["Sesi A", "Voucher b"])
+    ubah_b = awal.assign(Keterangan=["Sesi B", "Voucher b"])
+    assert _simpan(penyimpanan, awal, ubah_a, versi_a)["konflik"] == []
+    assert _simpan(penyimpanan, awal, ubah_b, versi_b)["konflik"] == ["a"]
+
+    _, akhir, _, _ = penyimpanan.tarik_jurnal(0)
+    assert list(akhir.columns[:len(KOLOM_JURNAL)]) == KOLOM_JURNAL
+    assert akhir["Keterangan"].tolist() == ["Sesi A", "Voucher b"]
+    penyimpanan.tutup()
+
+
+def test_simulasi_banyak_sesi_tanpa_tulisan_hilang(tmp_path):
+    penyimpanan = PenyimpananSQLite(str(tmp_path / "simulasi.db"))
+    penyimpanan.simpan_jurnal(_jurnal([f"{i:04x}" for i in range(40)]))
+    penyimpanan.tutup()
+
+    hasil = simulasi_buku_bersama(str(tmp_path / "simulasi.db"), n_sesi=6, n_tulis=20)
+
+    assert hasil["simpan"] == 120
+    assert hasil["hilang"] == 0
+
+
+def test_periksa_menangkap_tulisan_yang_menimpa(tmp_path):
+    penyimpanan = _buka(tmp_path)
+    awal = _jurnal(["a"])
+    versi = {}
+    _simpan(penyimpanan, awal.iloc[:0], awal, versi)
+    # Dua tulisan diterima yang sama-sama berdasar versi 1: yang kedua menimpa tanpa melihat yang pertama
+    catatan = [
+        ("ubah", "a", 1, 2, "Sesi A"),
+        ("ubah", "a", 1, 3, "Sesi B"),
+    ]
+    assert periksa_buku_bersama(penyimpanan, catatan) >= 1
+    penyimpanan.tutup()
@@ -0,0 +1,38 @@
+import threading
+
+from cache_turunan import CacheBersama
+
+
+def test_cache_bersama_membuang_yang_paling_lama():
+    cache = CacheBersama(2)
+    cache.simpan("a", 1)
+    cache.simpan("b", 2)
+    assert cache.ambil("a") == 1
+    cache.simpan("c", 3)
+
+    assert len(cache) == 2
+    assert cache.ambil("b") is None
+    assert (cache.ambil("a"), cache.ambil("c")) == (1, 3)
+
+
+def test_cache_bersama_banyak_thread_tetap_terbatas():
+    cache = CacheBersama(8)
+    galat = []
+
+    def sesi(nomor):
+        try:
+            for i in range(2000):
+                unit = f"unit-{(nomor * 7 + i) % 40}"
+                if cache.ambil(unit) is None:
+                    cache.simpan(unit, {"unit": unit})
+        except Exception as e:  # pragma: no cover - dicatat untuk assert
+            galat.append(e)
+
+    threads = [threading.Thread(target=sesi, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert galat == []
+    assert len(cache) == 8
@@ -0,0 +1,95 @@
+import io
+
+import pandas as pd
+import pytest
+
+from impor_buku import angka_impor, baca_potongan_impor, impor_jurnal, tebak_pemetaan
+
+
+@pytest.mark.parametrize("teks, angka", [
+    ("1500000", 1_500_000),
+    ("1.500", 1_500),
+    ("1.500.000", 1_500_000),
+    ("1.500.000,50", 1_500_000.5),
+    ("Rp 1.500.000", 1_500_000),
+    ("1,5", 1.5),
+    ("1,50", 1.5),
+    # Ribuan format Inggris tidak boleh terbaca sebagai desimal
+    ("1,500", 1_500),
+    ("1,500,000", 1_500_000),
+    ("1,500.00", 1_500),
+    ("1,500,000.50", 1_500_000.5),
+])
+def test_angka_impor(teks, angka):
+    assert angka_impor(pd.Series([teks])).iloc[0] == angka
+
+
+def test_angka_impor_bukan_angka_jadi_nan():
+    hasil = angka_impor(pd.Series(["", "abc", "1234,567", None]))
+    assert hasil.isna().all()
+
+
+def _impor_csv(teks):
+    isi = teks.encode()
+    kolom = list(next(baca_potongan_impor(io.BytesIO(isi), "jurnal.csv", ukuran=5)).columns)
+    return impor_jurnal(io.BytesIO(isi), "jurnal.csv", tebak_pemetaan(kolom))
+
+
+def test_impor_ribuan_berkoma_tidak_jadi_desimal():
+    jurnal, masalah = _impor_csv(
+        "Tanggal,Keterangan,Ref,Akun,Debit,Kredit\n"
+        '2025-02-01,Jual,101,Kas,"1,500",\n'
+        '2025-02-01,Jual,401,Pendapatan Usaha,,"1,500"\n'
+        '2025-02-02,Beli,121,Peralatan,"1,500,000.00",\n'
+        '2025-02-02,Beli,101,Kas,,"1.500.000"\n'
+    )
+    assert masalah.empty
+    assert jurnal["Debit (Rp)"].tolist() == [1_500, 0, 1_500_000, 0]
+    assert jurnal["Kredit (Rp)"].tolist() == [0, 1_500, 0, 1_500_000]
+
+
+def test_impor_desimal_tiga_angka_jadi_masalah_baris():
+    _, masalah = _impor_csv(
+        "Tanggal,Keterangan,Ref,Akun,Debit,Kredit\n"
+        '2025-02-01,Jual,101,Kas,"1234,567",\n'
+        '2025-02-01,Jual,401,Pendapatan Usaha,,"1234,567"\n'
+    )
+    assert masalah.loc[masalah["Baris"] == 2, "Masalah"].tolist() == ["Debit bukan angka"]
+    assert masalah.loc[masalah["Baris"] == 3, "Masalah"].tolist() == ["Kredit bukan angka"]
+
+
+def _csv_voucher(n):
+    # n voucher seimbang (2 baris tiap voucher) setelah baris judul
+    baris = ["Tanggal;Keterangan;Ref;Akun;Debit;Kredit"]
+    for i in range(n):
+        baris += [f"2025-02-01;Jual {i};101;Kas;1000;", f"2025-02-01;Jual {i};401;Pendapatan Usaha;;1000"]
+    return "\n".join(baris) + "\n"
+
+
+def test_impor_cp1252_setelah_potongan_pertama():
+    isi = (_csv_voucher(30) + "2025-02-02;Café;101;Kas;500;\n2025-02-02;Café;401;Pendapatan Usaha;;500\n")
+    berkas = io.BytesIO(isi.encode("cp1252"))
+    kolom = list(next(baca_potongan_impor(berkas, "bank.csv", ukuran=5)).columns)
+    berkas.seek(0)
+
+    jurnal, masalah = impor_jurnal(berkas, "bank.csv", tebak_pemetaan(kolom), ukuran=10)
+
+    assert masalah.empty
+    assert len(jurnal) == 62
+    assert jurnal["Keterangan"].iloc[-1] == "Café"
+
+
+def test_impor_kutip_rusak_setelah_potongan_pertama_jadi_masalah():
+    isi = _csv_voucher(30) + '2025-02-02;"Kutip tak tertutup;101;Kas;500;\n2025-02-02;x;401;Pendapatan Usaha;;500\n'
+    kolom = list(next(baca_potongan_impor(io.BytesIO(isi.encode()), "jurnal.csv", ukuran=5)).columns)
+
+    jurnal, masalah = impor_jurnal(io.BytesIO(isi.encode()), "jurnal.csv", tebak_pemetaan(kolom), ukuran=10)
+
+    assert len(jurnal) == 60
+    assert masalah["Baris"].tolist() == [62]
+    assert "tidak terbaca" in masalah["Masalah"].iloc[0]
+
+
+def test_xlsx_rusak_jadi_value_error():
+    with pytest.raises(ValueError, match="xlsx"):
+        next(baca_potongan_impor(io.BytesIO(b"not a zip"), "x.xlsx"))
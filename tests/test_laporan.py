@@ -0,0 +1,136 @@
+import pandas as pd
+import pytest
+
+from akuntansi import laporan_periode, susun_laba_rugi, susun_laporan, susun_neraca_lap
+
+
+def _neraca_saldo(baris):
+    return pd.DataFrame(baris, columns=["Ref", "Akun", "Debit (Rp)", "Kredit (Rp)"])
+
+
+# Neraca saldo seimbang (debit = kredit = 11.900.000) dengan prive
+NERACA_SALDO = _neraca_saldo([
+    ("101", "Kas", 5_700_000, 0),
+    ("103", "Piutang Usaha", 800_000, 0),
+    ("121", "Peralatan", 3_000_000, 0),
+    ("122", "Akumulasi Penyusutan Peralatan", 0, 500_000),
+    ("201", "Utang Usaha", 0, 1_000_000),
+    ("301", "Modal", 0, 6_000_000),
+    ("302", "Prive", 400_000, 0),
+    ("401", "Pendapatan Usaha", 0, 3_500_000),
+    ("402", "Pendapatan Jasa", 0, 900_000),
+    ("501", "Beban Gaji", 1_500_000, 0),
+    ("505", "Beban Penyusutan", 500_000, 0),
+])
+
+
+def _baris(tabel, kolom, teks):
+    return tabel[tabel[kolom] == teks].iloc[0]
+
+
+def test_susun_laporan_dari_neraca_saldo():
+    hasil = susun_laporan(NERACA_SALDO)
+
+    assert hasil["total_pendapatan"] == 4_400_000
+    assert hasil["total_beban"] == 2_000_000
+    assert hasil["laba_bersih"] == 2_400_000
+    assert hasil["modal_data"] == {"modal_awal": 6_000_000, "prive": 400_000}
+    # 6.000.000 + 2.400.000 - 400.000
+    assert hasil["modal_akhir"] == 8_000_000
+    assert hasil["total_aktiva"] == 9_000_000
+    assert hasil["total_passiva"] == 9_000_000
+
+
+def test_susun_laporan_tanpa_prive_tetap_seimbang():
+    neraca = NERACA_SALDO[NERACA_SALDO["Ref"] != "302"].copy()
+    neraca.loc[neraca["Ref"] == "101", "Debit (Rp)"] = 6_100_000
+    hasil = susun_laporan(neraca)
+
+    assert hasil["modal_data"]["prive"] == 0
+    assert hasil["modal_akhir"] == 8_400_000
+    assert hasil["total_aktiva"] == hasil["total_passiva"] == 9_400_000
+    assert "  Prive" not in hasil["neraca_lap"]["Passiva"].tolist()
+
+
+def test_susun_laba_rugi_laba_dan_rugi():
+    pendapatan = pd.DataFrame({
+        "Jenis Pendapatan": ["", "Pendapatan Usaha", "Pendapatan Jasa"],
+        "Debit (Rp)": [0, 0, 0],
+        "Kredit (Rp)": [0, 3_500_000, 900_000],
+    })
+    beban = pd.DataFrame({
+        "Jenis Beban": ["", "Beban Gaji"],
+        "Debit (Rp)": [0, 1_500_000],
+        "Kredit (Rp)": [0, 0],
+    })
+    tabel, total_pendapatan, total_beban, laba_bersih = susun_laba_rugi(pendapatan, beban)
+    assert (total_pendapatan, total_beban, laba_bersih) == (4_400_000, 1_500_000, 2_900_000)
+    assert _baris(tabel, "Keterangan", "Laba Bersih")["Kredit"] == 2_900_000
+    assert tabel["Keterangan"].tolist()[1:3] == ["  2. Pendapatan Usaha", "  3. Pendapatan Jasa"]
+
+    beban.loc[1, "Debit (Rp)"] = 5_000_000
+    tabel, _, _, laba_bersih = susun_laba_rugi(pendapatan, beban)
+    assert laba_bersih == -600_000
+    assert _baris(tabel, "Keterangan", "Rugi Bersih")["Debit"] == 600_000
+
+
+def test_susun_neraca_lap_prive_mengurangi_modal():
+    aktiva_lancar = pd.DataFrame({"Item": ["", "Kas"], "Jumlah (Rp)": [0, 7_000_000]})
+    aktiva_tetap = pd.DataFrame({"Item": ["", "Peralatan"], "Jumlah (Rp)": [0, 3_000_000]})
+    kewajiban = pd.DataFrame({"Item": ["", "Utang Usaha"], "Jumlah (Rp)": [0, 1_500_000]})
+
+    tabel, total_aktiva, total_passiva, modal_akhir = susun_neraca_lap(
+        aktiva_lancar, aktiva_tetap, kewajiban, 6_000_000, 3_000_000, prive=500_000,
+    )
+    assert (total_aktiva, total_passiva, modal_akhir) == (10_000_000, 10_000_000, 8_500_000)
+    assert _baris(tabel, "Passiva", "  Prive")["Jumlah2"] == -500_000
+    assert _baris(tabel, "Passiva", "  Laba")["Jumlah2"] == 3_000_000
+    assert _baris(tabel, "Aktiva", "Jml Aktiva")["Jumlah2"] == 10_000_000
+
+    _, _, total_passiva, modal_akhir = susun_neraca_lap(
+        aktiva_lancar, aktiva_tetap, kewajiban, 6_000_000, 3_000_000,
+    )
+    assert (total_passiva, modal_akhir) == (10_500_000, 9_000_000)
+
+
+def _jurnal(baris):
+    df = pd.DataFrame(baris, columns=["Tanggal", "Keterangan", "Ref", "Akun", "Debit (Rp)", "Kredit (Rp)"])
+    df["_id"] = [f"{i:016x}" for i in range(len(df))]
+    return df
+
+
+JURNAL_DUA_TAHUN = _jurnal([
+    ("2024-01-02", "Setoran modal", "101", "Kas", 10_000_000, 0),
+    ("2024-01-02", "Setoran modal", "301", "Modal", 0, 10_000_000),
+    ("2024-03-10", "Penjualan tunai", "101", "Kas", 4_000_000, 0),
+    ("2024-03-10", "Penjualan tunai", "401", "Pendapatan Usaha", 0, 4_000_000),
+    ("2024-06-15", "Bayar gaji", "501", "Beban Gaji", 1_000_000, 0),
+    ("2024-06-15", "Bayar gaji", "101", "Kas", 0, 1_000_000),
+    ("2024-12-20", "Prive pengurus", "302", "Prive", 500_000, 0),
+    ("2024-12-20", "Prive pengurus", "101", "Kas", 0, 500_000),
+    ("2025-01-05", "Penjualan tunai", "101", "Kas", 2_000_000, 0),
+    ("2025-01-05", "Penjualan tunai", "401", "Pendapatan Usaha", 0, 2_000_000),
+    ("2025-01-20", "Prive pengurus", "302", "Prive", 300_000, 0),
+    ("2025-01-20", "Prive pengurus", "101", "Kas", 0, 300_000),
+])
+
+
+@pytest.mark.parametrize("tahun, bulan, laba, modal_akhir, kas", [
+    # Desember: laba dan prive sepanjang tahun berjalan, belum ditutup ke modal
+    (2024, "12", 3_000_000, 12_500_000, 12_500_000),
+    # Tahun berikutnya: laba 3.000.000 dan prive 500.000 sudah masuk saldo awal ekuitas
+    (2025, "01", 2_000_000, 14_200_000, 14_200_000),
+])
+def test_laporan_periode_seimbang_lintas_tutup_tahun(tahun, bulan, laba, modal_akhir, kas):
+    hasil = laporan_periode(JURNAL_DUA_TAHUN, tahun, bulan)
+
+    assert hasil["laba_bersih"] == laba
+    assert hasil["modal_akhir"] == modal_akhir
+    assert hasil["total_aktiva"] == kas
+    assert hasil["total_aktiva"] == hasil["total_passiva"]
+
+
+def test_laporan_periode_tahun_berjalan_prive_terpisah():
+    hasil = laporan_periode(JURNAL_DUA_TAHUN, 2025, "01")
+    # Modal 10.000.000 + laba ditahan 2024 (3.000.000 - prive 500.000)
+    assert hasil["modal_data"] == {"modal_awal": 12_500_000, "prive": 300_000}
@@ -0,0 +1,87 @@
+import re
+import tempfile
+
+import pytest
+
+import laporan_pdf
+from akuntansi import buat_buku_besar, jurnal_cetak, laporan_periode, neraca_saldo_cetak
+from benchmark_buku import jurnal_sintetis
+from cetak_laporan import buat_pdf_unit
+from paket_buku import buat_paket_buku
+
+
+@pytest.fixture(scope="module")
+def buku_besar():
+    jurnal, _ = jurnal_sintetis(60, 1)
+    return buat_buku_besar(jurnal)
+
+
+def _jumlah_halaman(pdf):
+    return int(re.search(rb"/Count (\d+)", pdf).group(1))
+
+
+def test_pdf_stream_kompres_tiap_halaman(buku_besar, monkeypatch):
+    hasil = []
+    asli = laporan_pdf._kompres_halaman_terakhir
+    monkeypatch.setattr(laporan_pdf, "_kompres_halaman_terakhir", lambda c: hasil.append(asli(c)))
+
+    pdf = laporan_pdf.pdf_buku_besar_stream(buku_besar)
+
+    assert pdf.startswith(b"%PDF") and pdf.rstrip().endswith(b"%%EOF")
+    assert len(hasil) == _jumlah_halaman(pdf) > 1
+    # Versi reportlab di requirements.txt: jalur kompres per halaman harus aktif
+    assert all(hasil)
+
+
+def test_pdf_stream_tanpa_atribut_internal_tetap_utuh(buku_besar, monkeypatch):
+    assert laporan_pdf._kompres_halaman_terakhir(object()) is False
+    dengan_kompres = laporan_pdf.pdf_buku_besar_stream(buku_besar)
+
+    # Struktur internal reportlab berubah: halaman dibiarkan, save() yang mengompres
+    monkeypatch.setattr(laporan_pdf, "_kompres_halaman_terakhir", lambda c: False)
+    tanpa_kompres = laporan_pdf.pdf_buku_besar_stream(buku_besar)
+
+    assert tanpa_kompres.rstrip().endswith(b"%%EOF")
+    assert b"/FlateDecode" in tanpa_kompres
+    assert _jumlah_halaman(tanpa_kompres) == _jumlah_halaman(dengan_kompres)
+
+
+def test_semua_ekspor_tanpa_file_sementara(tmp_path, monkeypatch):
+    jurnal, bagan = jurnal_sintetis(40, 1)
+    hasil = laporan_periode(jurnal, 2025, "12")
+    kosong = tmp_path / "tmp"
+    kosong.mkdir()
+    monkeypatch.setenv("TMPDIR", str(kosong))
+    monkeypatch.setattr(tempfile, "tempdir", None)
+
+    ekspor = {
+        "pdf_jurnal": lambda: laporan_pdf.pdf_jurnal(jurnal_cetak(hasil["jurnal"]), "12", 2025),
+        "pdf_buku_besar_fpdf": lambda: laporan_pdf.pdf_buku_besar(hasil["buku_besar"]),
+        "pdf_buku_besar_stream": lambda: laporan_pdf.pdf_buku_besar_stream(hasil["buku_besar"]),
+        "zip_buku_besar_per_akun": lambda: laporan_pdf.zip_buku_besar_per_akun(hasil["buku_besar"]),
+        "pdf_neraca_saldo": lambda: laporan_pdf.pdf_neraca_saldo(
+            neraca_saldo_cetak(hasil["neraca_saldo"]), "12", 2025,
+        ),
+        "pdf_laba_rugi": lambda: laporan_pdf.pdf_laba_rugi(hasil["labarugi"], "12", 2025),
+        "pdf_neraca": lambda: laporan_pdf.pdf_neraca(hasil["neraca_lap"], "12", 2025),
+        "pdf_arus_kas": lambda: laporan_pdf.pdf_arus_kas(hasil["arus_kas"], "12", 2025),
+        "paket_buku": lambda: buat_paket_buku(jurnal, {"neraca_saldo": hasil["neraca_saldo"]}, hasil["modal_data"]),
+        "buat_pdf_unit": lambda: b"".join(buat_pdf_unit(jurnal, bagan, 2025, "12").values()),
+    }
+    # Semua jalur ekspor harus di memori: folder sementara tetap kosong setelah tiap ekspor
+    assert tempfile.gettempdir() == str(kosong)
+    for nama, buat in ekspor.items():
+        for _ in range(2):
+            isi = buat()
+            assert len(isi) > 0, nama
+        assert list(kosong.iterdir()) == [], nama
+
+
+def test_pdf_unit_tanpa_isi_tidak_menulis_neraca():
+    jurnal, _ = jurnal_sintetis(40, 1)
+
+    assert buat_pdf_unit(jurnal.iloc[:0], None, 2025, "03") == {}
+    # Bulan tanpa jurnal tapi bersaldo awal: Neraca Saldo dan Neraca tetap dicetak
+    sesudah = buat_pdf_unit(jurnal, None, 2026, "03")
+    assert {"neraca_saldo_03_2026.pdf", "laporan_neraca_03_2026.pdf"} <= set(sesudah)
+    assert "jurnal_umum_03_2026.pdf" not in sesudah
@@ -0,0 +1,82 @@
+import io
+import json
+import zipfile
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from paket_buku import VERSI_PAKET, baca_paket_buku, buat_paket_buku
+from skema_buku import ketik_tabel
+
+
+def _jurnal():
+    return ketik_tabel(pd.DataFrame({
+        "Tanggal": ["2025-01-02", "2025-01-02", "", "2025-02-10"],
+        "Keterangan": ["Setoran modal", "Setoran modal", "Tanpa tanggal", "Bayar listrik"],
+        "Ref": ["101", "301", "501", "502"],
+        "Akun": ["Kas", "Modal", "Beban Gaji", "Beban Listrik, Air & Telepon"],
+        "Debit (Rp)": [1_000_000, 0, 25_000, 50_000],
+        "Kredit (Rp)": [0, 1_000_000, 0, 0],
+        "_id": ["a", "b", "c", "d"],
+    }))
+
+
+def _paket_manual(versi, jurnal):
+    # Paket seperti yang ditulis aplikasi versi lama
+    buf = io.BytesIO()
+    isi = io.BytesIO()
+    pq.write_table(pa.Table.from_pandas(jurnal, preserve_index=False), isi)
+    with zipfile.ZipFile(buf, "w") as zf:
+        zf.writestr("jurnal.parquet", isi.getvalue())
+        zf.writestr("manifest.json", json.dumps({
+            "format": "bumdes-paket", "versi": versi, "modal_data": {},
+            "tabel": {"jurnal": {"berkas": "jurnal.parquet"}},
+        }))
+    return io.BytesIO(buf.getvalue())
+
+
+def test_paket_menulis_tanggal_date32_dan_uang_int64():
+    paket = buat_paket_buku(_jurnal(), {}, {"modal_awal": 0})
+    with zipfile.ZipFile(io.BytesIO(paket)) as zf:
+        manifest = json.loads(zf.read("manifest.json"))
+        skema = pq.read_schema(io.BytesIO(zf.read("jurnal.parquet")))
+
+    assert manifest["versi"] == VERSI_PAKET == 2
+    assert skema.field("Tanggal").type == pa.date32()
+    assert skema.field("Debit (Rp)").type == pa.int64()
+    assert manifest["tabel"]["buku_besar"]["kolom"]["Tanggal"] == "date32[day]"
+
+
+def test_paket_bolak_balik_sama_dengan_jurnal():
+    jurnal = _jurnal()
+    tabel, _ = baca_paket_buku(io.BytesIO(buat_paket_buku(jurnal, {}, {})))
+    hasil = ketik_tabel(tabel["jurnal"])
+
+    pd.testing.assert_frame_equal(hasil, jurnal, check_categorical=False, check_dtype=False)
+    assert hasil["Tanggal"].isna().tolist() == [False, False, True, False]
+
+
+def test_paket_versi_1_tanggal_teks_uang_float():
+    lama = pd.DataFrame({
+        "Tanggal": ["2025-01-02", ""],
+        "Keterangan": ["Setoran modal", "Setoran modal"],
+        "Ref": ["101", "301"],
+        "Akun": ["Kas", "Modal"],
+        "Debit (Rp)": [1_000_000.0, 0.0],
+        "Kredit (Rp)": [0.0, 1_000_000.0],
+        "_id": ["a", "b"],
+    })
+    tabel, manifest = baca_paket_buku(_paket_manual(1, lama))
+
+    assert manifest["versi"] == 1
+    assert tabel["jurnal"]["Debit (Rp)"].dtype == "int64"
+    hasil = ketik_tabel(tabel["jurnal"])
+    assert hasil["Tanggal"].tolist()[0] == pd.Timestamp("2025-01-02")
+    assert pd.isna(hasil["Tanggal"].iloc[1])
+
+
+def test_paket_versi_lebih_baru_ditolak():
+    with pytest.raises(ValueError, match="lebih baru"):
+        baca_paket_buku(_paket_manual(VERSI_PAKET + 1, _jurnal()))